@@ -23,6 +23,7 @@ setup(
             'issue-column = issuebranch.console_scripts:issue_column',
             'issue-icebox = issuebranch.console_scripts:issue_icebox',
             'issue-show = issuebranch.console_scripts:issue_show',
+            'issuebranch = issuebranch.console_scripts:issuebranch',
             'milestones = issuebranch.console_scripts:milestones',
             'projects = issuebranch.console_scripts:projects',
         ],
@@ -32,5 +33,8 @@ setup(
         'sh',
         'python-slugify',
         'pyyaml',
-    ]
+    ],
+    extras_require={
+        'async': ['aiohttp'],
+    },
 )
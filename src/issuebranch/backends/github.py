@@ -1,26 +1,68 @@
 import os
+import inspect
 import json
 import requests
 
 from requests.exceptions import HTTPError
 
-from functools import lru_cache as lru_cache_base, wraps
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
 from . import BaseBackend
-from ..exceptions import CommandError, PrefixError
+from .. import transport
+from ..cache import HTTPCache, TTLCache, get_cache_key
+from ..exceptions import CardError, CommandError, GraphQLError, PrefixError
+from ..mirror import Mirror
+from ..ratelimit import RateLimiter
+from ..stats import STATS
 
 CARD_CREATE_ENDPOINT = "/projects/columns/{column_id}/cards"
 CARD_ENDPOINT = "/projects/columns/cards/{id}"
 CARD_MOVE_ENDPOINT = CARD_ENDPOINT + "/moves"
 
-COLUMN_DELETE_ENDPOINT = "/projects/columns/{id}"
+COLUMN_ENDPOINT = "/projects/columns/{id}"
+COLUMN_DELETE_ENDPOINT = COLUMN_ENDPOINT
 COLUMN_MOVE_ENDPOINT = "/projects/columns/{id}/moves"
 
 ISSUE_BACKEND_API_KEY = os.environ.get("ISSUE_BACKEND_API_KEY")
 ISSUE_BACKEND_REPO = os.environ.get("ISSUE_BACKEND_REPO")
-ISSUE_BACKEND_URL = "https://api.github.com"
+# point at a stand-in server, e.g. `issuebranch standin`, to work offline
+ISSUE_BACKEND_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 ISSUE_BACKEND_USER = os.environ.get("ISSUE_BACKEND_USER")
 
+# responses cached by GithubSession are shared across all instances in the process
+GITHUB_CACHE_MAXSIZE = int(os.environ.get("GITHUB_CACHE_MAXSIZE", 1024))
+GITHUB_CACHE_TTL = float(os.environ.get("GITHUB_CACHE_TTL", 300))
+
+# paginated GETs are made conditional on the ETags stored here; set to an empty
+# string to disable the on-disk cache
+GITHUB_HTTP_CACHE_DIR = os.environ.get(
+    "GITHUB_HTTP_CACHE_DIR", "~/.cache/issuebranch/http"
+)
+
+# when set, reads are served from the local mirror kept up to date by
+# `issuebranch sync` as long as it was synced within this many seconds
+GITHUB_MIRROR_MAX_AGE = os.environ.get("GITHUB_MIRROR_MAX_AGE")
+GITHUB_MIRROR_PATH = os.environ.get(
+    "GITHUB_MIRROR_PATH", "~/.cache/issuebranch/mirror.sqlite3"
+)
+
+# requests are paced once fewer than GITHUB_RATELIMIT_RESERVE requests remain in
+# the window and rate limited requests are retried up to GITHUB_MAX_RETRIES times
+GITHUB_MAX_RETRIES = int(os.environ.get("GITHUB_MAX_RETRIES", 5))
+GITHUB_RATELIMIT_RESERVE = int(os.environ.get("GITHUB_RATELIMIT_RESERVE", 100))
+
+# the largest page size the API allows
+GITHUB_PER_PAGE = 100
+
+# the number of requests GithubSession.map makes at once
+GITHUB_MAX_WORKERS = int(os.environ.get("GITHUB_MAX_WORKERS", 8))
+
+# minimum number of seconds between write requests to avoid secondary limits
+GITHUB_WRITE_INTERVAL = float(os.environ.get("GITHUB_WRITE_INTERVAL", 0))
+
 ISSUE_LIST_ENDPOINT = "/repos/{owner}/{repo}/issues"
 ISSUE_COMMENT_ENDPOINT = ISSUE_LIST_ENDPOINT + "/{number}/comments"
 ISSUE_UPDATE_ENDPOINT = ISSUE_LIST_ENDPOINT + "/{number}"
@@ -40,29 +82,368 @@ REPO_LABELS_ENDPOINT = "/repos/{owner}/{repo}/labels"
 
 SEARCH_ISSUE_ENDPOINT = "/search/issues"
 
+# the search API stops returning results after this many
+SEARCH_MAX_RESULTS = 1000
+
+GRAPHQL_ENDPOINT = "/graphql"
+
+BOARD_CARD_FIELDS = """
+fragment IssueFields on Issue {
+  databaseId
+  number
+  state
+  title
+  repository { nameWithOwner }
+  labels(first: 100) { nodes { name } }
+  assignees(first: 20) { nodes { login } }
+  milestone { number title }
+}
+
+fragment PullRequestFields on PullRequest {
+  databaseId
+  number
+  state
+  title
+  repository { nameWithOwner }
+  labels(first: 100) { nodes { name } }
+  assignees(first: 20) { nodes { login } }
+  milestone { number title }
+}
+
+fragment CardFields on ProjectCardConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes {
+    databaseId
+    note
+    content {
+      __typename
+      ... on Issue { ...IssueFields }
+      ... on PullRequest { ...PullRequestFields }
+    }
+  }
+}
+"""
+
+BOARD_COLUMNS_QUERY = (
+    """
+query($projectId: ID!, $after: String) {
+  node(id: $projectId) {
+    ... on Project {
+      columns(first: 10, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes {
+          id
+          databaseId
+          name
+          cards(first: 100, archivedStates: [NOT_ARCHIVED]) { ...CardFields }
+        }
+      }
+    }
+  }
+}
+"""
+    + BOARD_CARD_FIELDS
+)
+
+BOARD_CARDS_QUERY = (
+    """
+query($columnId: ID!, $after: String) {
+  node(id: $columnId) {
+    ... on ProjectColumn {
+      cards(first: 100, after: $after, archivedStates: [NOT_ARCHIVED]) {
+        ...CardFields
+      }
+    }
+  }
+}
+"""
+    + BOARD_CARD_FIELDS
+)
+
+# the project cards of up to 100 issues by node id
+ISSUE_CARDS_QUERY = """
+query($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on Issue {
+      databaseId
+      projectCards(first: 20, archivedStates: [NOT_ARCHIVED]) {
+        nodes {
+          databaseId
+          note
+          project { databaseId }
+          column { id databaseId name }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+RESPONSE_CACHE = TTLCache(maxsize=GITHUB_CACHE_MAXSIZE, ttl=GITHUB_CACHE_TTL)
+
+HTTP_CACHE = HTTPCache(GITHUB_HTTP_CACHE_DIR) if GITHUB_HTTP_CACHE_DIR else None
+
+MIRROR = Mirror(GITHUB_MIRROR_PATH)
+
+# the mirror tables holding each kind of cached data
+MIRROR_TABLES = {
+    "cards": "cards",
+    "columns": "columns",
+    "issue": "issues",
+    "labels": "labels",
+    "projects": "projects",
+}
+
+# the method, endpoint and kinds of cached data changed by each write
+WRITES = {
+    "add_label": ("post", ISSUE_LABELS_ENDPOINT, ("board", "issue", "search")),
+    "close_project": ("patch", PROJECT_ENDPOINT, ("projects",)),
+    "comment": ("post", ISSUE_COMMENT_ENDPOINT, ()),
+    "create_card": ("post", CARD_CREATE_ENDPOINT, ("board", "cards")),
+    "create_column": ("post", PROJECT_CREATE_COLUMN, ("board", "column", "columns")),
+    "create_issue": ("post", ISSUE_LIST_ENDPOINT, ("search",)),
+    "create_label": ("post", LABELS_CREATE_ENDPOINT, ("labels",)),
+    "create_project": ("post", PROJECTS_ENDPOINT, ("projects",)),
+    "delete_card": ("delete", CARD_ENDPOINT, ("board", "cards")),
+    "delete_column": (
+        "delete",
+        COLUMN_DELETE_ENDPOINT,
+        ("board", "cards", "column", "columns"),
+    ),
+    "move_card": ("post", CARD_MOVE_ENDPOINT, ("board", "cards")),
+    "move_column": ("post", COLUMN_MOVE_ENDPOINT, ("board", "columns")),
+    "update_issue": ("patch", ISSUE_UPDATE_ENDPOINT, ("board", "issue", "search")),
+}
+
+RATE_LIMITER = RateLimiter(
+    reserve=GITHUB_RATELIMIT_RESERVE,
+    max_retries=GITHUB_MAX_RETRIES,
+    write_interval=GITHUB_WRITE_INTERVAL,
+)
+
+
+def get_content_state(content):
+    """
+    Returns the REST state of an issue or pull request GraphQL node
+
+    Merged pull requests are `closed` in the REST API, so they are here too.
+    """
+    state = content["state"].lower()
+
+    return "closed" if state == "merged" else state
+
+
+def get_board_cards(column, connection):
+    """
+    Returns REST-shaped cards from a GraphQL card connection
+    """
+    cards = []
+
+    for node in connection["nodes"]:
+        card_id = node["databaseId"]
+        content = node["content"]
+
+        issue = None
+        content_url = None
+        if content:
+            owner_repo = content["repository"]["nameWithOwner"]
+            content_url = get_full_url(
+                ISSUE_BACKEND_ENDPOINT,
+                owner=owner_repo.split("/", 1)[0],
+                repo=owner_repo.split("/", 1)[1],
+                issue=content["number"],
+            )
+
+            milestone = content["milestone"]
+
+            issue = {
+                "id": content["databaseId"],
+                "number": content["number"],
+                "state": get_content_state(content),
+                "content_type": content["__typename"],
+                "title": content["title"],
+                "url": content_url,
+                "labels": content["labels"]["nodes"],
+                "assignees": content["assignees"]["nodes"],
+                "milestone": milestone,
+            }
+
+        cards.append(
+            {
+                "id": card_id,
+                "url": get_full_url(CARD_ENDPOINT, id=card_id),
+                "column_url": column["url"],
+                "project_url": column["project_url"],
+                "content_url": content_url,
+                "note": node["note"],
+                "issue": issue,
+            }
+        )
 
-class CardError(Exception):
-    pass
+    return cards
 
 
-class HDict(dict):
-    def __hash__(self):
-        return hash(json.dumps(self))
+def get_board_column(project, node):
+    """
+    Returns a REST-shaped column from a GraphQL column node
+    """
+    column_url = get_full_url(COLUMN_ENDPOINT, id=node["databaseId"])
 
+    return {
+        "id": node["databaseId"],
+        "node_id": node["id"],
+        "name": node["name"],
+        "url": column_url,
+        "cards_url": f"{column_url}/cards",
+        "project_url": project["url"],
+        "cards": [],
+    }
+
+
+def cached(kind):
+    """
+    Caches the decorated method's return value in RESPONSE_CACHE
+
+    The cache key is the kind followed by the method's arguments; API data dicts
+    are keyed by their url or id instead of their entire contents.  Coroutines,
+    e.g. the methods of AsyncGithubSession, are cached the same way.
+
+    Args:
+        kind (str): the kind of data cached, used for invalidation
+    """
 
-def lru_cache():
     def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @wraps(fn)
+            async def async_wrapper(self, *args):
+                key = (kind,) + tuple(get_cache_key(x) for x in args)
+
+                try:
+                    return get_cached(kind, key)
+                except KeyError:
+                    pass
+
+                return RESPONSE_CACHE.set(key, await fn(self, *args))
+
+            return async_wrapper
+
         @wraps(fn)
-        def wrapper(*args, **kwargs):
-            h_args = [HDict(x) if isinstance(x, dict) else x for x in args]
+        def wrapper(self, *args):
+            key = (kind,) + tuple(get_cache_key(x) for x in args)
 
-            return lru_cache_base()(fn)(*h_args, **kwargs)
+            try:
+                return get_cached(kind, key)
+            except KeyError:
+                pass
+
+            return RESPONSE_CACHE.set(key, fn(self, *args))
 
         return wrapper
 
     return decorator
 
 
+def get_cached(kind, key):
+    """
+    Returns the value cached under the given key, recording the lookup in STATS
+
+    Raises:
+        KeyError when nothing is cached under the key
+    """
+    try:
+        value = RESPONSE_CACHE.get(key)
+    except KeyError:
+        STATS.record_cache(kind, False)
+
+        raise
+
+    STATS.record_cache(kind, True)
+
+    return value
+
+
+def get_full_url(endpoint, **format_args):
+    """
+    Returns the API url of the given endpoint
+    """
+    return f"{ISSUE_BACKEND_URL}{endpoint}".format(**format_args)
+
+
+def get_repo_url(endpoint, **format_args):
+    """
+    Returns the API url of the given endpoint, by default in ISSUE_BACKEND_REPO
+    """
+    format_args.setdefault("owner", ISSUE_BACKEND_USER)
+    format_args.setdefault("repo", ISSUE_BACKEND_REPO)
+
+    return get_full_url(endpoint, **format_args)
+
+
+def get_write(name, **format_args):
+    """
+    Returns the method, url and invalidated kinds of one of the WRITES
+    """
+    method, endpoint, kinds = WRITES[name]
+
+    return method, get_repo_url(endpoint, **format_args), kinds
+
+
+def invalidate(*kinds):
+    """
+    Invalidates cached and mirrored data of the given kinds after a write
+    """
+    RESPONSE_CACHE.invalidate(*kinds)
+
+    if GITHUB_MIRROR_MAX_AGE:
+        tables = set([MIRROR_TABLES[x] for x in kinds if x in MIRROR_TABLES])
+        if tables:
+            MIRROR.expire(*tables)
+
+
+class CardIndex(object):
+    """
+    Maps the issue urls on a project board to their cards and columns
+    """
+
+    def __init__(self):
+        self.cards = {}
+
+    def add(self, card, column):
+        """
+        Adds or replaces the card for its issue
+
+        Notes, which have no content_url, are not indexed.
+        """
+        content_url = card.get("content_url")
+        if content_url:
+            self.cards[content_url] = (card, column)
+
+    def get(self, content_url):
+        """
+        Returns the (card, column) tuple for the given issue url
+
+        Raises:
+            KeyError when the issue does not have a card on the board
+        """
+        return self.cards[content_url]
+
+    def remove(self, card):
+        """
+        Removes the given card from the index
+        """
+        content_url = card.get("content_url")
+        if self.cards.get(content_url, ({},))[0].get("id") == card["id"]:
+            del self.cards[content_url]
+
+            return
+
+        for content_url, (_card, _) in list(self.cards.items()):
+            if _card["id"] == card["id"]:
+                del self.cards[content_url]
+
+
 class GithubLinkHeader(object):
     def __init__(self, **kwargs):
         self.url = None
@@ -101,11 +482,363 @@ class GithubLinkHeader(object):
         return links
 
 
-class GithubSession(object):
+def get_page_urls(next_url, last_url):
+    """
+    Returns the urls of the pages from next_url through last_url
+
+    An empty list is returned when the links are not numbered by a `page`
+    parameter, e.g. cursor based pagination, as the pages in between cannot
+    be known ahead of time.
+
+    Args:
+        next_url (str): the url of the "next" link
+        last_url (str): the url of the "last" link
+    """
+    next_query = parse_qs(urlsplit(next_url).query)
+    last_parts = urlsplit(last_url)
+    last_query = parse_qs(last_parts.query)
+
+    if "page" not in next_query or "page" not in last_query:
+        return []
+
+    first_page = int(next_query["page"][0])
+    last_page = int(last_query["page"][0])
+
+    urls = []
+    for page in range(first_page, last_page + 1):
+        last_query["page"] = [str(page)]
+        query = urlencode(last_query, doseq=True)
+
+        urls.append(urlunsplit(last_parts._replace(query=query)))
+
+    return urls
+
+
+def get_next_page_urls(response):
+    """
+    Returns the urls of the pages that follow the response's page
+
+    When the response links to the last page all the remaining pages are returned,
+    so they can be fetched at the same time; otherwise only the next page is and
+    its response links to the ones after it.  The list is empty on the last page.
+    """
+    links = {}
+    link_header = response.headers.get("Link")
+    if link_header:
+        links = dict([(x.rel, x.url) for x in GithubLinkHeader.parse(link_header)])
+
+    if "next" not in links:
+        return []
+
+    # the link urls carry the query params of the original request
+    page_urls = []
+    if "last" in links:
+        page_urls = get_page_urls(links["next"], links["last"])
+
+    return page_urls or [links["next"]]
+
+
+def get_conditional_request(url, **kwargs):
+    """
+    Returns a GET made conditional on the response stored in HTTP_CACHE
+
+    Returns:
+        tuple: the cache key, the cache entry or None and the request kwargs
+    """
+    params = kwargs.get("params")
+    full_url = requests.Request("GET", url, params=params).prepare().url
+
+    entry = HTTP_CACHE.get(full_url)
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    headers.update(HTTP_CACHE.get_conditional_headers(entry))
+
+    return full_url, entry, dict(kwargs, headers=headers)
+
+
+def get_conditional_response(full_url, entry, response):
+    """
+    Returns the cached response for a 304, or stores and returns the new one
+    """
+    if entry and response.status_code == 304:
+        return HTTP_CACHE.get_response(entry)
+
+    HTTP_CACHE.set(full_url, response)
+
+    return response
+
+
+def get_longest_increasing(values):
+    """
+    Returns the indexes of a longest strictly increasing subsequence of values
+    """
+    # tails[n] is the index of the smallest value ending an increasing run of n + 1
+    tails = []
+    tail_values = []
+    previous = [None] * len(values)
+
+    for index, value in enumerate(values):
+        position = bisect_left(tail_values, value)
+        if position:
+            previous[index] = tails[position - 1]
+
+        if position == len(tails):
+            tails.append(index)
+            tail_values.append(value)
+        else:
+            tails[position] = index
+            tail_values[position] = value
+
+    indexes = []
+    index = tails[-1] if tails else None
+    while index is not None:
+        indexes.append(index)
+        index = previous[index]
+
+    return indexes[::-1]
+
+
+def plan_moves(current, desired):
+    """
+    Returns the fewest card moves that put a column's cards in the desired order
+
+    The longest run of cards that are already in the right order relative to each
+    other stays where it is and every other card is moved after the card that
+    should precede it.  Cards that are only in current are left where they are.
+
+    Args:
+        current (list): the card ids in their current order
+        desired (list): the card ids in the order they should be in
+
+    Returns:
+        list: (card id, position) tuples, where position is `top` or
+            `after:<card id>`, that have to be made in order
+    """
+    ranks = dict([(card_id, rank) for rank, card_id in enumerate(desired)])
+
+    in_place = [x for x in current if x in ranks]
+    kept = set(
+        [in_place[x] for x in get_longest_increasing([ranks[x] for x in in_place])]
+    )
+
+    moves = []
+    for index, card_id in enumerate(desired):
+        if card_id in kept:
+            continue
+
+        position = f"after:{desired[index - 1]}" if index else "top"
+        moves.append((card_id, position))
+
+    return moves
+
+
+def get_label_writes(labels, current=None):
+    """
+    Returns the labels to add to each issue, see GithubSession.add_labels
+
+    Returns:
+        list: (issue number, names of the missing labels) tuples
+    """
+    current = current or {}
+
+    writes = []
+    for number, names in labels.items():
+        existing = set(current.get(number, ()))
+
+        missing = [x for x in dict.fromkeys(names) if x not in existing]
+        if missing:
+            writes.append((number, missing))
+
+    return writes
+
+
+def get_move_data(column, position=None):
+    """
+    Returns the request data of a card move
+
+    Raises:
+        CardError when the position is not valid
+    """
+    position = position or "top"
+    if position not in ("bottom", "top") and not position.startswith("after:"):
+        raise CardError("position must be 'bottom', 'top' or 'after:<card id>'")
+
+    return {"position": position, "column_id": column["id"]}
+
+
+def get_move_chains(moves):
+    """
+    Returns the indexes of the moves grouped by the column they are made into
+
+    Moves into the same column have to be made one after the other so that the
+    cards end up in the given order; the chains can be made at the same time.
+
+    Args:
+        moves (list): (card, column, position) tuples
+    """
+    chains = {}
+    for index, (card, column, position) in enumerate(moves):
+        chains.setdefault(column["id"], []).append(index)
+
+    return list(chains.values())
+
+
+def get_reorder_moves(column, cards, current):
+    """
+    Returns the moves that put a column's cards in the given order
+
+    See GithubSession.reorder_cards
+    """
+    cards_by_id = dict([(x["id"], x) for x in cards])
+
+    moves = plan_moves([x["id"] for x in current], [x["id"] for x in cards])
+
+    return [(cards_by_id[card_id], column, position) for card_id, position in moves]
+
+
+def get_issue_chunks(issues):
+    """
+    Returns the node ids of the issues in chunks of up to GITHUB_PER_PAGE
+    """
+    ids = [x["node_id"] for x in issues]
+
+    return [ids[x : x + GITHUB_PER_PAGE] for x in range(0, len(ids), GITHUB_PER_PAGE)]
+
+
+def get_issue_cards(project, issues, nodes):
+    """
+    Returns the cards the issues have on the project board, see
+    GithubSession.get_project_cards
+
+    Args:
+        project (dict): the project data from the github api
+        issues (list): issue data from the github api
+        nodes (list): the ISSUE_CARDS_QUERY nodes of the issues in the same order
+    """
+    cards = []
+    for issue, node in zip(issues, nodes):
+        for card_node in (node or {}).get("projectCards", {}).get("nodes", []):
+            if card_node["project"]["databaseId"] != project["id"]:
+                continue
+
+            # cards awaiting triage are on the board but not in a column
+            if card_node["column"] is None:
+                continue
+
+            column = get_board_column(project, card_node["column"])
+            column.pop("cards")
+
+            card_id = card_node["databaseId"]
+            card = {
+                "id": card_id,
+                "url": get_full_url(CARD_ENDPOINT, id=card_id),
+                "column_url": column["url"],
+                "project_url": column["project_url"],
+                "content_url": issue["url"],
+                "note": card_node["note"],
+            }
+
+            cards.append((card, column, issue))
+
+    return cards
+
+
+class BaseGithubSession(object):
+    """
+    The state and bookkeeping shared by GithubSession and AsyncGithubSession
+
+    Nothing here makes a request; the sessions differ only in how they make them.
+    """
+
     # alias exceptions to make it easy to get without additional imports
     CardError = CardError
+    GraphQLError = GraphQLError
+    HTTPError = HTTPError
     PrefixError = PrefixError
 
+    # the issue that methods taking an optional issue number act on
+    issue_number = None
+
+    # serve reads from the local mirror when GITHUB_MIRROR_MAX_AGE is set
+    use_mirror = True
+
+    @property
+    def card_indexes(self):
+        """
+        Returns the card indexes built by this session keyed by project url
+        """
+        # GithubSession has no __init__ since Backend mixes it in
+        return self.__dict__.setdefault("_card_indexes", {})
+
+    def forget_card_index(self, column):
+        """
+        Drops the index of a column's project, e.g. when the column is deleted
+        """
+        self.card_indexes.pop(column.get("project_url"), None)
+
+    def get_full_url(self, endpoint, **format_args):
+        return get_full_url(endpoint, **format_args)
+
+    def get_mirrored(self, kind, *args):
+        """
+        Returns data of the given kind from the local mirror
+
+        Returns None when the mirror is disabled or the data in it is missing or
+        older than GITHUB_MIRROR_MAX_AGE, in which case the API should be used.
+
+        Args:
+            kind (str): one of project, columns, cards, issue, labels or milestones
+            args: the arguments to the read method
+        """
+        if not (GITHUB_MIRROR_MAX_AGE and self.use_mirror):
+            return None
+
+        return MIRROR.get(kind, *args, max_age=float(GITHUB_MIRROR_MAX_AGE))
+
+    @property
+    def owner(self):
+        return ISSUE_BACKEND_USER
+
+    def remove_from_card_indexes(self, card):
+        """
+        Removes a deleted card from the card indexes
+        """
+        for card_index in self.card_indexes.values():
+            card_index.remove(card)
+
+    @property
+    def repo(self):
+        return ISSUE_BACKEND_REPO
+
+    def set_card_index(self, project, columns, cards):
+        """
+        Indexes a project's cards, see GithubSession.get_card_index
+
+        Args:
+            project (dict): the project data from the github api
+            columns (list): the project's columns
+            cards (list): the list of cards in each column
+        """
+        card_index = CardIndex()
+
+        for column, column_cards in zip(columns, cards):
+            for card in column_cards:
+                card_index.add(card, column)
+
+        self.card_indexes[project["url"]] = card_index
+
+        return card_index
+
+    def update_card_index(self, card, column):
+        """
+        Records a card written to the given column in the project's card index
+        """
+        card_index = self.card_indexes.get(column.get("project_url"))
+        if card_index is not None:
+            card_index.add(card, column)
+
+
+class GithubSession(BaseGithubSession):
     def add_label(self, label_data, number=None):
         """
         Adds a label to an issue
@@ -116,65 +849,92 @@ class GithubSession(object):
         """
         number = number or self.issue_number
 
-        url = self.get_full_url(
-            ISSUE_LABELS_ENDPOINT,
-            owner=ISSUE_BACKEND_USER,
-            repo=ISSUE_BACKEND_REPO,
-            number=number,
-        )
+        return self.write("add_label", [label_data["name"]], number=number)
+
+    def add_labels(self, labels, current=None):
+        """
+        Adds labels to many issues with at most one request per issue
 
-        data = [label_data["name"]]
+        The labels an issue already has are not sent again and issues that have
+        all of theirs are skipped; the rest are labeled concurrently.
 
-        return self.request("post", url, json=data)
+        Args:
+            labels (dict): issue number to the names of the labels it should have
+            current (dict): issue number to the names of the labels it has, e.g.
+                from the issue data of `load_board` or `get_issues`
+
+        Returns:
+            dict: issue number to the response of each request that was made
+        """
+        writes = get_label_writes(labels, current)
+
+        def write(item):
+            number, names = item
+
+            return self.write("add_label", names, number=number)
+
+        responses = self.map(write, writes)
+
+        return dict(zip([x[0] for x in writes], responses))
 
     def close_project(self, project_data):
         """
         closes the given project
         """
-        url = self.get_full_url(PROJECT_ENDPOINT, project_id=project_data["id"])
-
         data = {"state": "closed"}
 
-        return self.request("patch", url, json=data).json()
+        return self.write("close_project", data, project_id=project_data["id"]).json()
 
     def comment(self, comment, number=None):
         number = number or self.issue_number
 
-        url = self.get_full_url(
-            ISSUE_COMMENT_ENDPOINT,
-            owner=ISSUE_BACKEND_USER,
-            repo=ISSUE_BACKEND_REPO,
-            number=number,
-        )
-
         data = {"body": comment}
 
-        return self.request("post", url, json=data).json()
+        return self.write("comment", data, number=number).json()
+
+    def conditional_get(self, url, **kwargs):
+        """
+        Makes a GET request conditional on the response stored in HTTP_CACHE
+
+        When GitHub responds with 304 Not Modified the cached response is returned;
+        304s do not count against the rate limit.
+        """
+        if HTTP_CACHE is None:
+            return self.request("get", url, **kwargs)
+
+        full_url, entry, kwargs = get_conditional_request(url, **kwargs)
+
+        response = self.request("get", url, **kwargs)
+
+        return get_conditional_response(full_url, entry, response)
 
     def create_card(self, column_data, issue_data):
-        url = self.get_full_url(CARD_CREATE_ENDPOINT, column_id=column_data["id"])
-        data = {"content_id": issue_data["id"], "content_type": "Issue"}
+        # board cards say whether they are for a pull request, issue data does not
+        data = {
+            "content_id": issue_data["id"],
+            "content_type": issue_data.get("content_type", "Issue"),
+        }
 
-        return self.request("post", url, json=data)
+        response = self.write("create_card", data, column_id=column_data["id"])
+
+        self.update_card_index(response.json(), column_data)
+
+        return response
 
     def create_column(self, project, name):
-        url = self.get_full_url(PROJECT_CREATE_COLUMN, project_id=project["id"])
         data = {"name": name}
 
-        return self.request("post", url, json=data).json()
+        return self.write("create_column", data, project_id=project["id"]).json()
 
     def create_issue(self, title, **kwargs):
         """
         Create an issue on the default board.
         """
-        url = self.get_full_url(
-            ISSUE_LIST_ENDPOINT, owner=ISSUE_BACKEND_USER, repo=ISSUE_BACKEND_REPO
-        )
         required_fields = {"title": title}
         data = dict([(k, v) for k, v in kwargs.items() if v])
         data.update(required_fields)
 
-        return self.request("post", url, json=data).json()
+        return self.write("create_issue", data).json()
 
     def create_label(self, name: str, color: str):
         """
@@ -184,34 +944,32 @@ class GithubSession(object):
             name: the label name
             color: the hexcolor _without_ pound sign
         """
-        url = self.get_full_url(
-            LABELS_CREATE_ENDPOINT, owner=ISSUE_BACKEND_USER, repo=ISSUE_BACKEND_REPO
-        )
-
         data = {"name": name, "color": color}
 
-        return self.request("post", url, json=data).json()
+        return self.write("create_label", data).json()
 
     def create_project(self, name, body):
-        url = self.get_full_url(PROJECTS_ENDPOINT, owner=ISSUE_BACKEND_USER)
-
         data = {"name": name, "body": body}
 
         print(data)
 
-        return self.request("post", url, json=data).json()
+        return self.write("create_project", data).json()
 
     def delete_card(self, card_data):
-        url = self.get_full_url(CARD_ENDPOINT, id=card_data["id"])
+        response = self.write("delete_card", id=card_data["id"])
+
+        self.remove_from_card_indexes(card_data)
 
-        return self.request("delete", url)
+        return response
 
     def delete_column(self, column_data):
-        url = self.get_full_url(COLUMN_DELETE_ENDPOINT, id=column_data["id"])
+        response = self.write("delete_column", id=column_data["id"])
 
-        return self.request("delete", url)
+        # the column's cards went with it, so rebuild the index on next use
+        self.forget_card_index(column_data)
+
+        return response
 
-    @lru_cache()
     def get_card(self, project, issue_data):
         """
         Returns the card for this issue within the project
@@ -222,32 +980,53 @@ class GithubSession(object):
         """
         issue_url = issue_data["url"]
 
-        # print('\n\nissue:')
-        # print(json.dumps(issue_data, indent=4))
-
-        for column in self.get_columns(project):
-            for card in self.get_cards(column):
-                # use .get() here to prevent blowing up when encountering a note
-                # which does not contain a content_url key
-                if card.get("content_url") == issue_url:
-                    return card
-        else:
+        try:
+            card, _ = self.get_card_index(project).get(issue_url)
+        except KeyError:
             raise CardError(f"Unable to find card for issue {issue_url}")
 
-    @lru_cache()
+        return card
+
+    def get_card_index(self, project):
+        """
+        Returns the index of the project's cards by issue url
+
+        The index is built from a single load of the board the first time it is
+        needed and kept up to date by this session's card writes.
+
+        Args:
+            project (dict): the project data from the github api
+        """
+        card_index = self.card_indexes.get(project["url"])
+        if card_index is None:
+            columns = self.get_columns(project)
+            cards = self.map(self.get_cards, columns)
+
+            card_index = self.set_card_index(project, columns, cards)
+
+        return card_index
+
+    @cached("cards")
     def get_cards(self, column_data):
         """
-        Iterates through all the cards in a column_data
+        Returns a list of all the cards in a column_data
 
         This method checks the response headers for the "Link" header
         which provides pagination urls to get the next batch of cards
         """
+        cards = self.get_mirrored("cards", column_data)
+        if cards is not None:
+            return cards
+
         cards_url = column_data["cards_url"]
+
+        cards = []
         for response in self.get_paginated(cards_url):
-            for item in response.json():
-                yield item
+            cards.extend(response.json())
+
+        return cards
 
-    @lru_cache()
+    @cached("column")
     def get_column(self, project, name):
         columns = self.get_columns(project)
         for column in columns:
@@ -256,31 +1035,32 @@ class GithubSession(object):
         else:
             raise CommandError(f"Unable to find name={name}")
 
-    @lru_cache()
+    @cached("columns")
     def get_columns(self, project):
         """
-        Returns the columns in the given project
+        Returns a list of the columns in the given project
 
         Args:
             project (dict): the dictionary from the projects API requests
         """
+        columns = self.get_mirrored("columns", project)
+        if columns is not None:
+            return columns
+
         columns_url = project["columns_url"]
-        for response in self.get_paginated(columns_url):
-            for item in response.json():
-                yield item
 
-    def get_full_url(self, endpoint, **format_args):
-        full_url = f"{ISSUE_BACKEND_URL}{endpoint}".format(**format_args)
+        columns = []
+        for response in self.get_paginated(columns_url):
+            columns.extend(response.json())
 
-        return full_url
+        return columns
 
     def get_issue(self, issue_number):
-        full_url = self.get_full_url(
-            ISSUE_BACKEND_ENDPOINT,
-            owner=ISSUE_BACKEND_USER,
-            repo=ISSUE_BACKEND_REPO,
-            issue=issue_number,
-        )
+        issue_data = self.get_mirrored("issue", issue_number)
+        if issue_data is not None:
+            return issue_data
+
+        full_url = get_repo_url(ISSUE_BACKEND_ENDPOINT, issue=issue_number)
 
         return self.request("get", full_url).json()
 
@@ -291,9 +1071,7 @@ class GithubSession(object):
         Args:
             filters (dict): parameters per the v3 API
         """
-        url = self.get_full_url(
-            ISSUE_LIST_ENDPOINT, owner=ISSUE_BACKEND_USER, repo=ISSUE_BACKEND_REPO
-        )
+        url = get_repo_url(ISSUE_LIST_ENDPOINT)
 
         params = filters or {}
 
@@ -301,13 +1079,69 @@ class GithubSession(object):
             for item in response.json():
                 yield item
 
+    def get_issues_by_number(self, numbers):
+        """
+        Returns the issues for the given numbers, fetched concurrently
+
+        Args:
+            numbers (list): issue numbers
+
+        Returns:
+            list: issue data in the same order as numbers
+        """
+        return self.map(self.get_issue, numbers)
+
+    def get_project_cards(self, project, issues):
+        """
+        Returns the cards the given issues have on the project board
+
+        Cards are looked up from the issues with GraphQL, 100 issues per query,
+        rather than by loading the board.
+
+        Args:
+            project (dict): the project data from the github api
+            issues (list): issue data from the github api, e.g. search results
+
+        Returns:
+            list: (card, column, issue) tuples in the order of the issues; the
+                card and column are shaped like their REST counterparts
+        """
+        issues = list(issues)
+
+        def get_nodes(ids):
+            return self.graphql(ISSUE_CARDS_QUERY, ids=ids)["nodes"]
+
+        nodes = []
+        for chunk_nodes in self.map(get_nodes, get_issue_chunks(issues)):
+            nodes.extend(chunk_nodes)
+
+        return get_issue_cards(project, issues, nodes)
+
+    def get_urls(self, urls):
+        """
+        Returns the JSON data at the given API urls, fetched concurrently
+
+        This is useful for fetching issues from the `content_url` of cards.
+
+        Args:
+            urls (list): API urls
+
+        Returns:
+            list: data in the same order as urls
+        """
+        return self.map(lambda url: self.request("get", url).json(), urls)
+
     def get_labels(self):
         """
         Returns all the labels for ISSUE_BACKEND_REPO
         """
-        url = self.get_full_url(
-            REPO_LABELS_ENDPOINT, owner=ISSUE_BACKEND_USER, repo=ISSUE_BACKEND_REPO
-        )
+        labels = self.get_mirrored("labels")
+        if labels is not None:
+            yield from labels
+
+            return
+
+        url = get_repo_url(REPO_LABELS_ENDPOINT)
 
         for response in self.get_paginated(url):
             for item in response.json():
@@ -327,29 +1161,55 @@ class GithubSession(object):
         """
         Returns all the milestones for the user/repo values in the environment
         """
-        columns_url = self.get_full_url(
-            MILESTONES_ENDPOINT, owner=ISSUE_BACKEND_USER, repo=ISSUE_BACKEND_REPO
-        )
-        for response in self.get_paginated(columns_url):
+        milestones = self.get_mirrored("milestones")
+        if milestones is not None:
+            yield from milestones
+
+            return
+
+        url = get_repo_url(MILESTONES_ENDPOINT)
+
+        for response in self.get_paginated(url):
             for item in response.json():
                 yield item
 
-    def get_paginated(self, url, *args, **kwargs):
-        while url:
-            response = self.request("get", url, *args, **kwargs)
+    def get_paginated(self, url, params=None, **kwargs):
+        """
+        Yields the response for each page of the given url
+
+        Pages are requested at the maximum page size.  When the first response
+        links to the last page, the remaining pages are fetched concurrently;
+        otherwise the "next" links are followed one at a time.  Either way,
+        responses are yielded in page order.
+        """
+        params = dict(params or {})
+        params.setdefault("per_page", GITHUB_PER_PAGE)
 
+        response = self.conditional_get(url, params=params, **kwargs)
+
+        while True:
             yield response
 
-            url = None
-            link_header = response.headers.get("Link")
-            if link_header:
-                links = GithubLinkHeader.parse(link_header)
-                for link in links:
-                    if link.rel == "next":
-                        url = link.url
-                        break
+            page_urls = get_next_page_urls(response)
+            if len(page_urls) > 1:
+
+                def get_page(page_url):
+                    return self.conditional_get(page_url, **kwargs)
+
+                yield from self.map(get_page, page_urls)
+
+                break
+
+            if not page_urls:
+                break
+
+            response = self.conditional_get(page_urls[0], **kwargs)
 
     def get_project(self, name):
+        project = self.get_mirrored("project", name)
+        if project is not None:
+            return project
+
         projects = self.projects
         for project in projects:
             if project["name"].lower() == name.lower():
@@ -357,52 +1217,202 @@ class GithubSession(object):
         else:
             raise CommandError(f"Unable to find project name={name}")
 
+    def graphql(self, query, **variables):
+        """
+        Runs a GraphQL query and returns its data
+
+        Args:
+            query (str): the GraphQL query
+            variables (dict): the query's variables
+        """
+        url = self.get_full_url(GRAPHQL_ENDPOINT)
+        data = {"query": query, "variables": variables}
+
+        response_data = self.request("post", url, json=data).json()
+
+        errors = response_data.get("errors")
+        if errors:
+            raise GraphQLError("; ".join([x["message"] for x in errors]))
+
+        return response_data["data"]
+
+    @cached("board")
+    def load_board(self, project):
+        """
+        Returns a project's columns, their cards and each card's issue
+
+        The whole board is loaded with GraphQL in a handful of queries rather than
+        a REST request per column page and per card.  Columns and cards are shaped
+        like their REST counterparts with the following additions:
+
+        - each column has a `cards` list
+        - each card has an `issue` dict, or None for notes, with the keys `id`,
+          `number`, `state`, `title`, `labels`, `assignees` and `milestone`
+
+        Args:
+            project (dict): the project data from the github api
+
+        Returns:
+            list: the columns in board order
+        """
+        columns = []
+
+        after = None
+        while True:
+            data = self.graphql(
+                BOARD_COLUMNS_QUERY, projectId=project["node_id"], after=after
+            )
+            connection = data["node"]["columns"]
+
+            for node in connection["nodes"]:
+                column = get_board_column(project, node)
+
+                cards = node["cards"]
+                column["cards"].extend(get_board_cards(column, cards))
+
+                while cards["pageInfo"]["hasNextPage"]:
+                    cards_data = self.graphql(
+                        BOARD_CARDS_QUERY,
+                        columnId=node["id"],
+                        after=cards["pageInfo"]["endCursor"],
+                    )
+                    cards = cards_data["node"]["cards"]
+                    column["cards"].extend(get_board_cards(column, cards))
+
+                columns.append(column)
+
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+
+            after = connection["pageInfo"]["endCursor"]
+
+        return columns
+
+    def map(self, fn, items):
+        """
+        Calls fn with each item using up to GITHUB_MAX_WORKERS threads
+
+        Requests made by fn are still scheduled by RATE_LIMITER.
+
+        Returns:
+            list: the results in the same order as items
+        """
+        items = list(items)
+
+        workers = min(GITHUB_MAX_WORKERS, len(items))
+        if workers < 2:
+            return [fn(x) for x in items]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fn, items))
+
     def move_card(self, card, column, position=None):
-        position = position or "top"
-        if position not in ("bottom", "top"):
-            raise CardError("position must be 'bottom' or 'top'")
+        data = get_move_data(column, position)
 
-        full_url = self.get_full_url(CARD_MOVE_ENDPOINT, id=card["id"])
-        data = {"position": position, "column_id": column["id"]}
+        response = self.write("move_card", data, id=card["id"])
 
-        try:
-            return self.request("post", full_url, json=data)
-        except Exception as exc:
-            import pdb
+        self.update_card_index(dict(card, column_url=column["url"]), column)
 
-            pdb.set_trace()
-            print(exc)
+        return response
 
-    def move_column(self, column_data, position):
-        url = self.get_full_url(COLUMN_MOVE_ENDPOINT, id=column_data["id"])
-        data = {"position": position}
+    def move_cards(self, moves):
+        """
+        Moves many cards, concurrently where their order allows
 
-        return self.request("post", url, json=data)
+        Moves into the same column are made one after the other in the given order
+        so that the cards end up in that order; moves into different columns are
+        made at the same time.
 
-    @property
-    def owner(self):
-        return ISSUE_BACKEND_USER
+        Args:
+            moves (list): (card, column, position) tuples
 
-    @property
-    def repo(self):
-        return ISSUE_BACKEND_REPO
+        Returns:
+            list: the responses in the same order as moves
+        """
+        moves = list(moves)
+
+        def move_chain(indexes):
+            return [(x, self.move_card(*moves[x])) for x in indexes]
+
+        responses = [None] * len(moves)
+        for chain in self.map(move_chain, get_move_chains(moves)):
+            for index, response in chain:
+                responses[index] = response
+
+        return responses
+
+    def reorder_cards(self, column, cards, current=None):
+        """
+        Puts a column's cards in the given order with as few moves as possible
+
+        Args:
+            column (dict): the column data from the github api
+            cards (list): the column's cards in the order they should be in
+            current (list): the column's cards in their current order; they are
+                fetched when not given
+
+        Returns:
+            list: the responses of the moves that were made
+        """
+        if current is None:
+            current = self.get_cards(column)
+
+        return self.move_cards(get_reorder_moves(column, cards, current))
+
+    def move_column(self, column_data, position):
+        data = {"position": position}
+
+        return self.write("move_column", data, id=column_data["id"])
 
     @property
-    @lru_cache()
+    @cached("projects")
     def projects(self):
         full_url = self.get_full_url(PROJECTS_ENDPOINT, owner=ISSUE_BACKEND_REPO)
 
         return self.request("get", full_url).json()
 
     def request(self, method, *args, **kwargs):
+        """
+        Makes a request, waiting out the rate limit rather than failing on it
+        """
         method_fn = getattr(self.session, method)
 
-        response = method_fn(*args, **kwargs)
+        attempt = 0
+        while True:
+            RATE_LIMITER.wait(method)
+
+            response = method_fn(*args, **kwargs)
+
+            RATE_LIMITER.update(response)
+
+            retry_delay = RATE_LIMITER.get_retry_delay(response, attempt)
+            if retry_delay is None:
+                break
+
+            attempt += 1
+
+            RATE_LIMITER.sleep(retry_delay)
+
         response.raise_for_status()
 
         return response
 
-    @lru_cache()
+    def search_issues(self, q):
+        """
+        Returns all the issues matching a search, up to SEARCH_MAX_RESULTS
+
+        Args:
+            q (str): a github api search query
+        """
+        url = self.get_full_url(SEARCH_ISSUE_ENDPOINT)
+
+        items = []
+        for response in self.get_paginated(url, params={"q": q}):
+            items.extend(response.json()["items"])
+
+        return items
+
+    @cached("search")
     def search(self, q):
         """
         Args:
@@ -414,34 +1424,57 @@ class GithubSession(object):
         return self.request("get", url, params=params).json()
 
     @property
-    @lru_cache()
     def session(self):
-        s = requests.Session()
-        s.headers.update(
-            {
-                "Authorization": "token {}".format(ISSUE_BACKEND_API_KEY),
-                "Accept": "application/vnd.github.inertia-preview+json",
-            }
-        )
+        s = self.__dict__.get("_session")
+        if s is None:
+            s = requests.Session()
+            s.headers.update(
+                {
+                    "Authorization": "token {}".format(ISSUE_BACKEND_API_KEY),
+                    "Accept": "application/vnd.github.inertia-preview+json",
+                }
+            )
+
+            transport.install(s)
+
+            s = self.__dict__["_session"] = STATS.install(s)
 
         return s
 
+    def share(self, other):
+        """
+        Makes this session use the other session's connection pool and card indexes
+        """
+        self.__dict__["_session"] = other.session
+        self.__dict__["_card_indexes"] = other.card_indexes
+
+        return self
+
     def update_issue(self, number=None, **kwargs):
         number = number or self.issue_number
 
-        url = self.get_full_url(
-            ISSUE_UPDATE_ENDPOINT,
-            owner=ISSUE_BACKEND_USER,
-            repo=ISSUE_BACKEND_REPO,
-            number=number,
-        )
+        return self.write("update_issue", kwargs, number=number).json()
 
-        return self.request("patch", url, json=kwargs).json()
+    def write(self, name, data=None, **format_args):
+        """
+        Makes one of the WRITES and invalidates the data it changes, even when the
+        request fails since it may have been made anyway
+
+        Args:
+            name (str): the name of the write
+            data: the JSON body of the request
+            format_args: the endpoint's parameters besides the owner and repo
+        """
+        method, url, kinds = get_write(name, **format_args)
+
+        try:
+            return self.request(method, url, json=data)
+        finally:
+            invalidate(*kinds)
 
 
 class Backend(BaseBackend, GithubSession):
     @property
-    @lru_cache()
     def issue(self):
         return self.get_issue(self.issue_number)
 
@@ -0,0 +1,574 @@
+"""
+An asyncio variant of GithubSession
+
+Requires the `async` extra: pip install issuebranch[async]
+"""
+import asyncio
+import os
+import time
+
+import aiohttp
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from . import github
+from .github import (
+    BOARD_CARDS_QUERY,
+    BOARD_COLUMNS_QUERY,
+    GITHUB_PER_PAGE,
+    GRAPHQL_ENDPOINT,
+    ISSUE_BACKEND_ENDPOINT,
+    ISSUE_CARDS_QUERY,
+    ISSUE_LIST_ENDPOINT,
+    MILESTONES_ENDPOINT,
+    PROJECTS_ENDPOINT,
+    RATE_LIMITER,
+    REPO_LABELS_ENDPOINT,
+    SEARCH_ISSUE_ENDPOINT,
+    BaseGithubSession,
+    CardError,
+    GraphQLError,
+    cached,
+    get_board_cards,
+    get_board_column,
+    get_conditional_request,
+    get_conditional_response,
+    get_issue_cards,
+    get_issue_chunks,
+    get_label_writes,
+    get_move_chains,
+    get_move_data,
+    get_next_page_urls,
+    get_reorder_moves,
+    get_repo_url,
+    get_write,
+    invalidate,
+)
+from ..exceptions import CommandError
+from ..stats import STATS
+
+# the number of connections kept open to the API
+GITHUB_ASYNC_CONNECTIONS = int(os.environ.get("GITHUB_ASYNC_CONNECTIONS", 100))
+
+
+class AsyncGithubSession(BaseGithubSession):
+    """
+    Mirrors the public methods of GithubSession as coroutines
+
+    All requests go through one aiohttp connection pool and share the
+    process-wide rate limiter, response cache, ETag cache and mirror with
+    GithubSession, so many board operations can be driven concurrently:
+
+        async with AsyncGithubSession() as session:
+            project = await session.get_project("kanban board")
+            columns = await session.get_columns(project)
+            cards = await asyncio.gather(*[session.get_cards(x) for x in columns])
+
+    Responses are returned as `requests` responses so callers can use `.json()`
+    and `raise_for_status()` the same way they do with GithubSession.
+
+    `map` and `share` are only on GithubSession: use `asyncio.gather` to run
+    coroutines concurrently, and each session has its own connection pool.
+    """
+
+    def __init__(self, issue_number=None):
+        self.issue_number = issue_number
+
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def add_label(self, label_data, number=None):
+        number = number or self.issue_number
+
+        return await self.write("add_label", [label_data["name"]], number=number)
+
+    async def add_labels(self, labels, current=None):
+        """
+        See GithubSession.add_labels
+        """
+        writes = get_label_writes(labels, current)
+
+        responses = await asyncio.gather(
+            *[self.write("add_label", names, number=number) for number, names in writes]
+        )
+
+        return dict(zip([x[0] for x in writes], responses))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+            self._session = None
+
+    async def close_project(self, project_data):
+        data = {"state": "closed"}
+
+        response = await self.write(
+            "close_project", data, project_id=project_data["id"]
+        )
+
+        return response.json()
+
+    async def comment(self, comment, number=None):
+        number = number or self.issue_number
+
+        response = await self.write("comment", {"body": comment}, number=number)
+
+        return response.json()
+
+    async def conditional_get(self, url, **kwargs):
+        """
+        See GithubSession.conditional_get
+        """
+        if github.HTTP_CACHE is None:
+            return await self.request("get", url, **kwargs)
+
+        full_url, entry, kwargs = get_conditional_request(url, **kwargs)
+
+        response = await self.request("get", url, **kwargs)
+
+        return get_conditional_response(full_url, entry, response)
+
+    async def create_card(self, column_data, issue_data):
+        # board cards say whether they are for a pull request, issue data does not
+        data = {
+            "content_id": issue_data["id"],
+            "content_type": issue_data.get("content_type", "Issue"),
+        }
+
+        response = await self.write("create_card", data, column_id=column_data["id"])
+
+        self.update_card_index(response.json(), column_data)
+
+        return response
+
+    async def create_column(self, project, name):
+        response = await self.write(
+            "create_column", {"name": name}, project_id=project["id"]
+        )
+
+        return response.json()
+
+    async def create_issue(self, title, **kwargs):
+        data = dict([(k, v) for k, v in kwargs.items() if v])
+        data.update({"title": title})
+
+        return (await self.write("create_issue", data)).json()
+
+    async def create_label(self, name: str, color: str):
+        data = {"name": name, "color": color}
+
+        return (await self.write("create_label", data)).json()
+
+    async def create_project(self, name, body):
+        data = {"name": name, "body": body}
+
+        return (await self.write("create_project", data)).json()
+
+    async def delete_card(self, card_data):
+        response = await self.write("delete_card", id=card_data["id"])
+
+        self.remove_from_card_indexes(card_data)
+
+        return response
+
+    async def delete_column(self, column_data):
+        response = await self.write("delete_column", id=column_data["id"])
+
+        # the column's cards went with it, so rebuild the index on next use
+        self.forget_card_index(column_data)
+
+        return response
+
+    async def get_card(self, project, issue_data):
+        issue_url = issue_data["url"]
+
+        try:
+            card, _ = (await self.get_card_index(project)).get(issue_url)
+        except KeyError:
+            raise CardError(f"Unable to find card for issue {issue_url}")
+
+        return card
+
+    async def get_card_index(self, project):
+        """
+        See GithubSession.get_card_index
+        """
+        card_index = self.card_indexes.get(project["url"])
+        if card_index is None:
+            columns = await self.get_columns(project)
+            cards = await asyncio.gather(*[self.get_cards(x) for x in columns])
+
+            card_index = self.set_card_index(project, columns, cards)
+
+        return card_index
+
+    @cached("cards")
+    async def get_cards(self, column_data):
+        cards = self.get_mirrored("cards", column_data)
+        if cards is not None:
+            return cards
+
+        cards = []
+        async for response in self.get_paginated(column_data["cards_url"]):
+            cards.extend(response.json())
+
+        return cards
+
+    @cached("column")
+    async def get_column(self, project, name):
+        for column in await self.get_columns(project):
+            if column["name"].lower() == name:
+                return column
+
+        raise CommandError(f"Unable to find name={name}")
+
+    @cached("columns")
+    async def get_columns(self, project):
+        columns = self.get_mirrored("columns", project)
+        if columns is not None:
+            return columns
+
+        columns = []
+        async for response in self.get_paginated(project["columns_url"]):
+            columns.extend(response.json())
+
+        return columns
+
+    async def get_issue(self, issue_number):
+        issue_data = self.get_mirrored("issue", issue_number)
+        if issue_data is not None:
+            return issue_data
+
+        url = get_repo_url(ISSUE_BACKEND_ENDPOINT, issue=issue_number)
+
+        return (await self.request("get", url)).json()
+
+    async def get_issues(self, **filters):
+        url = get_repo_url(ISSUE_LIST_ENDPOINT)
+
+        async for response in self.get_paginated(url, params=filters):
+            for item in response.json():
+                yield item
+
+    async def get_issues_by_number(self, numbers):
+        """
+        Returns the issues for the given numbers in the same order
+        """
+        return await asyncio.gather(*[self.get_issue(x) for x in numbers])
+
+    async def get_labels(self):
+        labels = self.get_mirrored("labels")
+        if labels is not None:
+            for item in labels:
+                yield item
+
+            return
+
+        async for response in self.get_paginated(get_repo_url(REPO_LABELS_ENDPOINT)):
+            for item in response.json():
+                yield item
+
+    async def get_milestone(self, name):
+        async for milestone in self.get_milestones():
+            if milestone["title"].lower() == name.lower():
+                return milestone
+
+        raise CommandError(f"unable to find milestone name={name}")
+
+    async def get_milestones(self):
+        milestones = self.get_mirrored("milestones")
+        if milestones is not None:
+            for item in milestones:
+                yield item
+
+            return
+
+        async for response in self.get_paginated(get_repo_url(MILESTONES_ENDPOINT)):
+            for item in response.json():
+                yield item
+
+    async def get_paginated(self, url, params=None, **kwargs):
+        """
+        See GithubSession.get_paginated; the remaining pages are gathered
+        concurrently when the last page is known
+        """
+        params = dict(params or {})
+        params.setdefault("per_page", GITHUB_PER_PAGE)
+
+        response = await self.conditional_get(url, params=params, **kwargs)
+
+        while True:
+            yield response
+
+            page_urls = get_next_page_urls(response)
+            if len(page_urls) > 1:
+                responses = await asyncio.gather(
+                    *[self.conditional_get(x, **kwargs) for x in page_urls]
+                )
+                for response in responses:
+                    yield response
+
+                break
+
+            if not page_urls:
+                break
+
+            response = await self.conditional_get(page_urls[0], **kwargs)
+
+    async def get_project(self, name):
+        project = self.get_mirrored("project", name)
+        if project is not None:
+            return project
+
+        for project in await self.projects:
+            if project["name"].lower() == name.lower():
+                return project
+
+        raise CommandError(f"Unable to find project name={name}")
+
+    async def get_project_cards(self, project, issues):
+        """
+        See GithubSession.get_project_cards
+        """
+        issues = list(issues)
+
+        chunks = await asyncio.gather(
+            *[
+                self.graphql(ISSUE_CARDS_QUERY, ids=ids)
+                for ids in get_issue_chunks(issues)
+            ]
+        )
+
+        nodes = []
+        for chunk in chunks:
+            nodes.extend(chunk["nodes"])
+
+        return get_issue_cards(project, issues, nodes)
+
+    async def get_urls(self, urls):
+        """
+        See GithubSession.get_urls
+        """
+        responses = await asyncio.gather(*[self.request("get", x) for x in urls])
+
+        return [x.json() for x in responses]
+
+    async def graphql(self, query, **variables):
+        url = self.get_full_url(GRAPHQL_ENDPOINT)
+        data = {"query": query, "variables": variables}
+
+        response_data = (await self.request("post", url, json=data)).json()
+
+        errors = response_data.get("errors")
+        if errors:
+            raise GraphQLError("; ".join([x["message"] for x in errors]))
+
+        return response_data["data"]
+
+    @cached("board")
+    async def load_board(self, project):
+        """
+        See GithubSession.load_board
+        """
+        columns = []
+
+        after = None
+        while True:
+            data = await self.graphql(
+                BOARD_COLUMNS_QUERY, projectId=project["node_id"], after=after
+            )
+            connection = data["node"]["columns"]
+
+            for node in connection["nodes"]:
+                column = get_board_column(project, node)
+
+                cards = node["cards"]
+                column["cards"].extend(get_board_cards(column, cards))
+
+                while cards["pageInfo"]["hasNextPage"]:
+                    cards_data = await self.graphql(
+                        BOARD_CARDS_QUERY,
+                        columnId=node["id"],
+                        after=cards["pageInfo"]["endCursor"],
+                    )
+                    cards = cards_data["node"]["cards"]
+                    column["cards"].extend(get_board_cards(column, cards))
+
+                columns.append(column)
+
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+
+            after = connection["pageInfo"]["endCursor"]
+
+        return columns
+
+    async def move_card(self, card, column, position=None):
+        data = get_move_data(column, position)
+
+        response = await self.write("move_card", data, id=card["id"])
+
+        self.update_card_index(dict(card, column_url=column["url"]), column)
+
+        return response
+
+    async def move_cards(self, moves):
+        """
+        See GithubSession.move_cards
+        """
+        moves = list(moves)
+
+        async def move_chain(indexes):
+            return [(x, await self.move_card(*moves[x])) for x in indexes]
+
+        chains = await asyncio.gather(*[move_chain(x) for x in get_move_chains(moves)])
+
+        responses = [None] * len(moves)
+        for chain in chains:
+            for index, response in chain:
+                responses[index] = response
+
+        return responses
+
+    async def move_column(self, column_data, position):
+        return await self.write(
+            "move_column", {"position": position}, id=column_data["id"]
+        )
+
+    @property
+    def projects(self):
+        """
+        Awaitable list of the organization's projects
+        """
+        return self._get_projects()
+
+    @cached("projects")
+    async def _get_projects(self):
+        url = self.get_full_url(PROJECTS_ENDPOINT, owner=github.ISSUE_BACKEND_REPO)
+
+        return (await self.request("get", url)).json()
+
+    async def reorder_cards(self, column, cards, current=None):
+        """
+        See GithubSession.reorder_cards
+        """
+        if current is None:
+            current = await self.get_cards(column)
+
+        return await self.move_cards(get_reorder_moves(column, cards, current))
+
+    async def request(self, method, url, params=None, **kwargs):
+        """
+        Makes a request, waiting out the rate limit rather than failing on it
+
+        Returns:
+            requests.Response: the response read into memory
+        """
+        attempt = 0
+        while True:
+            await self.sleep(RATE_LIMITER.get_delay(method))
+
+            start = time.perf_counter()
+
+            async with self.session.request(
+                method, url, params=params, **kwargs
+            ) as client_response:
+                response = Response()
+                response.status_code = client_response.status
+                response.url = str(client_response.url)
+                response.headers = CaseInsensitiveDict(client_response.headers)
+                response.encoding = client_response.get_encoding()
+                response._content = await client_response.read()
+
+            cache = None
+            if method.lower() == "get":
+                cache = "revalidated" if response.status_code == 304 else "miss"
+
+            STATS.record(
+                method,
+                response.url,
+                response.status_code,
+                len(response.content),
+                time.perf_counter() - start,
+                cache=cache,
+            )
+
+            RATE_LIMITER.update(response)
+
+            retry_delay = RATE_LIMITER.get_retry_delay(response, attempt)
+            if retry_delay is None:
+                break
+
+            attempt += 1
+
+            await self.sleep(retry_delay)
+
+        response.raise_for_status()
+
+        return response
+
+    @cached("search")
+    async def search(self, q):
+        url = self.get_full_url(SEARCH_ISSUE_ENDPOINT)
+
+        return (await self.request("get", url, params={"q": q})).json()
+
+    async def search_issues(self, q):
+        """
+        See GithubSession.search_issues
+        """
+        url = self.get_full_url(SEARCH_ISSUE_ENDPOINT)
+
+        items = []
+        async for response in self.get_paginated(url, params={"q": q}):
+            items.extend(response.json()["items"])
+
+        return items
+
+    @property
+    def session(self):
+        """
+        Returns the aiohttp session, created on first use inside the event loop
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=GITHUB_ASYNC_CONNECTIONS),
+                headers={
+                    "Authorization": "token {}".format(github.ISSUE_BACKEND_API_KEY),
+                    "Accept": "application/vnd.github.inertia-preview+json",
+                },
+            )
+
+        return self._session
+
+    async def sleep(self, delay):
+        """
+        Waits for the given number of seconds, recording the time spent waiting
+        """
+        if delay > 0:
+            RATE_LIMITER.add_wait(delay)
+
+            await asyncio.sleep(delay)
+
+    async def update_issue(self, number=None, **kwargs):
+        number = number or self.issue_number
+
+        return (await self.write("update_issue", kwargs, number=number)).json()
+
+    async def write(self, name, data=None, **format_args):
+        """
+        See GithubSession.write
+        """
+        method, url, kinds = get_write(name, **format_args)
+
+        try:
+            return await self.request(method, url, json=data)
+        finally:
+            invalidate(*kinds)
@@ -5,13 +5,13 @@ import os
 from functools import lru_cache
 
 import requests
-import yaml
 
 from requests.auth import HTTPBasicAuth
 
+from .. import transport
 from ..exceptions import PrefixError
-
-ISSUE_BACKEND_API_KEY = os.environ["ISSUE_BACKEND_API_KEY"]
+from ..settings import get_required
+from ..stats import STATS
 
 ISSUE_BACKEND_API_URL = os.environ.get("ISSUE_BACKEND_API_URL")
 ISSUES_ENDPOINT = "{ISSUE_BACKEND_API_URL}/rest/api/2/issue/{issueIdOrKey}"
@@ -22,6 +22,8 @@ ISSUE_BACKEND_PROJECT = os.environ.get("ISSUE_BACKEND_PROJECT")
 
 @lru_cache()
 def get_user_mapping():
+    import yaml
+
     with open(os.path.expanduser(os.environ["YOUTRACK_USER_MAPPING"]), "r") as fh:
         data = yaml.load(fh)
 
@@ -59,7 +61,7 @@ class Session:
     @property
     @lru_cache()
     def session(self):
-        user, token = ISSUE_BACKEND_API_KEY.split(":", 1)
+        user, token = get_required("ISSUE_BACKEND_API_KEY").split(":", 1)
 
         session = requests.Session()
         session.auth = HTTPBasicAuth(user, token)
@@ -70,7 +72,9 @@ class Session:
         #     }
         # )
 
-        return session
+        transport.install(session)
+
+        return STATS.install(session)
 
     def create_issue(
         self,
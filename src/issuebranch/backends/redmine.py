@@ -4,10 +4,11 @@ import requests
 from functools import lru_cache
 
 from . import BaseBackend
+from .. import transport
+from ..settings import get_required
+from ..stats import STATS
 
-ISSUE_BACKEND_URL = os.environ["ISSUE_BACKEND_URL"]
 ISSUE_BACKEND_ENDPOINT = "/issues/{issue}.json"
-ISSUE_BACKEND_API_KEY = os.environ["ISSUE_BACKEND_API_KEY"]
 
 
 class Backend(BaseBackend):
@@ -15,16 +16,18 @@ class Backend(BaseBackend):
     @lru_cache()
     def session(self):
         s = requests.Session()
-        s.headers.update({"X-Redmine-API-Key": ISSUE_BACKEND_API_KEY})
+        s.headers.update({"X-Redmine-API-Key": get_required("ISSUE_BACKEND_API_KEY")})
 
-        return s
+        transport.install(s)
+
+        return STATS.install(s)
 
     @property
     @lru_cache()
     def issue(self):
-        full_url = "{}{}".format(ISSUE_BACKEND_URL, ISSUE_BACKEND_ENDPOINT).format(
-            issue=self.issue_number
-        )
+        full_url = "{}{}".format(
+            get_required("ISSUE_BACKEND_URL"), ISSUE_BACKEND_ENDPOINT
+        ).format(issue=self.issue_number)
 
         response = self.session.get(full_url)
 
@@ -3,9 +3,10 @@ import os
 from functools import lru_cache
 
 import requests
-import yaml
 
+from .. import transport
 from ..exceptions import PrefixError
+from ..stats import STATS
 
 ISSUE_BACKEND_API_KEY = os.environ.get("YOUTRACK_TOKEN")
 
@@ -17,6 +18,8 @@ YOUTRACK_PROJECT = os.environ.get("YOUTRACK_PROJECT")
 
 @lru_cache()
 def get_user_mapping():
+    import yaml
+
     with open(os.path.expanduser(os.environ["YOUTRACK_USER_MAPPING"]), "r") as fh:
         data = yaml.load(fh)
 
@@ -61,7 +64,9 @@ class Session:
             }
         )
 
-        return s
+        transport.install(s)
+
+        return STATS.install(s)
 
     def _get_custom_field(self, name, value, field_type=None):
         field_type = field_type or "SingleEnumIssueCustomField"
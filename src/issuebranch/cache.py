@@ -0,0 +1,211 @@
+"""
+Caching for API responses
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300
+
+
+class TTLCache(object):
+    """
+    A thread-safe, size-bounded cache whose entries expire after `ttl` seconds
+
+    Keys are tuples whose first element is the kind of data cached, e.g.
+    `("columns", project_url)`, so that a whole kind can be invalidated at once.
+    Least recently used entries are evicted once `maxsize` is reached.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        try:
+            self.get(key)
+        except KeyError:
+            return False
+
+        return True
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get(self, key):
+        """
+        Returns the cached value for key
+
+        Raises:
+            KeyError when the key is not cached or has expired
+        """
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+
+                raise
+
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+
+                raise KeyError(key)
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def invalidate(self, *kinds, key=None):
+        """
+        Removes entries from the cache
+
+        Args:
+            kinds: remove all entries of these kinds
+            key: remove only the entry with this exact key
+        """
+        with self._lock:
+            if key is not None:
+                self._data.pop(key, None)
+
+            if kinds:
+                for _key in [x for x in self._data if x[0] in kinds]:
+                    del self._data[_key]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return value
+
+
+def get_cache_key(value):
+    """
+    Returns a cheap, hashable key for the given argument
+
+    API data dicts are keyed by their `url`, falling back to `id`, rather than
+    hashing the entire payload.
+    """
+    if isinstance(value, dict):
+        return value.get("url") or value["id"]
+
+    return value
+
+
+class HTTPCache(object):
+    """
+    An on-disk store of GET responses along with their ETag / Last-Modified validators
+
+    Each url is stored in its own JSON file so that concurrent writers never
+    clobber one another.
+    """
+
+    # response headers that are replayed along with a cached body
+    HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def _get_path(self, url):
+        digest = hashlib.sha1(url.encode("utf8")).hexdigest()
+
+        return os.path.join(self.path, digest[:2], f"{digest}.json")
+
+    def get(self, url):
+        """
+        Returns the cached entry for the given url or None
+        """
+        try:
+            with open(self._get_path(url), "r") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def get_response(self, entry):
+        """
+        Returns a 200 response rebuilt from the cached entry
+        """
+        response = Response()
+        response.status_code = 200
+        response.url = entry["url"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = "utf-8"
+        response._content = entry["body"].encode("utf-8")
+
+        return response
+
+    def get_conditional_headers(self, entry):
+        """
+        Returns the request headers that make a GET conditional on the cached entry
+        """
+        headers = {}
+        if not entry:
+            return headers
+
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def set(self, url, response):
+        """
+        Stores the response if it carries a validator
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": dict(
+                [
+                    (k, response.headers[k])
+                    for k in self.HEADERS
+                    if k in response.headers
+                ]
+            ),
+            "body": response.text,
+        }
+
+        path = self._get_path(url)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as fh:
+            json.dump(entry, fh)
+
+        os.replace(tmp_path, path)
@@ -7,28 +7,32 @@ import importlib
 import json
 import os
 import re
-import requests
-import tempfile
-
-import sh
 import shlex
 import sys
+import time
 
 from decimal import Decimal
+from functools import wraps
 
-from slugify import slugify
-
-from issuebranch import utils
-from issuebranch.backends import youtrack
-from issuebranch.backends.github import GithubSession, HTTPError
+# backends and third party packages are imported where they are used so that
+# commands only pay for the imports they need
 from issuebranch.shell import run_command
 from issuebranch.settings import SCRUM_BOARD_NAME, DEFAULT_COLUMN_NAME
+from issuebranch.stats import STATS
+
+GITHUB_BACKEND_MODULE = "issuebranch.backends.github"
 
 DEFAULT_BASE_BRANCH = "origin/main"
 MAX_SLUG_LENGTH = 128
 
+SORT_KEYS = ("points", "number", "label")
+
 SUBJECT_EXCLUDE_RE = re.compile(r"[/]")
 
+# incremental runs search back this many seconds before their watermark since
+# search results lag behind updates and clocks drift
+WATERMARK_OVERLAP = 300
+
 ISSUE_BRANCH_FORMAT = re.compile(
     r"(?P<changetype>[^/]+)/(?P<issue_prefix>[-a-z]*)(?P<issue_number>\d+)-(?P<slug>.*)"
 )
@@ -91,10 +95,135 @@ class Unbuffered(object):
 sys.stdout = Unbuffered(sys.stdout)
 
 
+def get_rate_limiter():
+    """
+    Returns the GitHub backend's rate limiter or None when the backend was not used
+    """
+    github = sys.modules.get(GITHUB_BACKEND_MODULE)
+
+    return github.RATE_LIMITER if github else None
+
+
+def get_session():
+    """
+    Returns a GithubSession
+    """
+    from issuebranch.backends.github import GithubSession
+
+    return GithubSession()
+
+
+def get_stats_options(argv):
+    """
+    Splits the global --stats options out of the given command line
+
+    Returns:
+        tuple: the remaining command line and the parsed options
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--stats-json")
+
+    options, remaining = parser.parse_known_args(argv[1:])
+
+    return argv[:1] + remaining, options
+
+
+def with_stats(fn):
+    """
+    Adds the global --stats and --stats-json options to a console script
+
+    --stats prints a per-endpoint summary of the requests the command made to
+    stderr and --stats-json appends the summary to the given file as a line of
+    JSON so that runs can be compared over time.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        sys.argv, options = get_stats_options(sys.argv)
+
+        if options.stats or options.stats_json:
+            STATS.enabled = True
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if options.stats:
+                print(STATS.report(), file=sys.stderr)
+
+                # how much of the rate limit budget the command used
+                rate_limiter = get_rate_limiter()
+                if rate_limiter and rate_limiter.requests:
+                    print(rate_limiter.report(), file=sys.stderr)
+
+            if options.stats_json:
+                summary = STATS.get_summary()
+                summary.update(
+                    {
+                        "command": os.path.basename(sys.argv[0]),
+                        "argv": sys.argv[1:],
+                        "timestamp": time.time(),
+                    }
+                )
+
+                rate_limiter = get_rate_limiter()
+                if rate_limiter:
+                    summary["rate_limit"] = {
+                        "requests": rate_limiter.requests,
+                        "used": rate_limiter.used,
+                        "waited": rate_limiter.waited,
+                    }
+
+                with open(options.stats_json, "a") as fh:
+                    fh.write(json.dumps(summary) + "\n")
+
+    return wrapper
+
+
 class CommandError(Exception):
     pass
 
 
+def get_watermark_key(command, project, column):
+    """
+    Returns the state file key of an incremental command's watermark
+    """
+    from issuebranch.backends.github import ISSUE_BACKEND_REPO, ISSUE_BACKEND_USER
+
+    return f"{command} {ISSUE_BACKEND_USER}/{ISSUE_BACKEND_REPO} {project} {column}"
+
+
+def search_since(session, watermark, state):
+    """
+    Returns the issues in the given state updated since the watermark
+
+    Returns None when there is no watermark or the search has too many results to
+    be complete, in which case the caller should look at the whole board.
+
+    Args:
+        session (GithubSession): the session to search with
+        watermark (float): the time the last incremental run started
+        state (str): `open` or `closed`
+    """
+    from issuebranch.backends.github import SEARCH_MAX_RESULTS
+
+    if watermark is None:
+        return None
+
+    since = time.strftime(
+        "%Y-%m-%dT%H:%M:%SZ", time.gmtime(watermark - WATERMARK_OVERLAP)
+    )
+
+    issues = session.search_issues(
+        f"repo:{session.owner}/{session.repo} is:issue is:{state} updated:>={since}"
+    )
+    if len(issues) >= SEARCH_MAX_RESULTS:
+        return None
+
+    return issues
+
+
+@with_stats
 def backlog_milestone():
     """
     Moves issue cards within the given miletone from icebox to the backlog column
@@ -105,7 +234,7 @@ def backlog_milestone():
 
     args = parser.parse_args()
 
-    session = GithubSession()
+    session = get_session()
 
     project_data = session.get_project(args.project)
 
@@ -126,6 +255,7 @@ def backlog_milestone():
         print(".", end="")
 
 
+@with_stats
 def issue_create():
     """
     Create an issue in GitHub and place it as a card in a project.
@@ -173,6 +303,9 @@ def issue_create():
     body = args.body
 
     if args.interactive:
+        import sh
+        import tempfile
+
         with tempfile.NamedTemporaryFile("w") as fh:
             path = fh.name
 
@@ -190,7 +323,7 @@ def issue_create():
                 # grab remaining lines as body
                 body = "".join(rfh.readlines())
 
-    session = GithubSession()
+    session = get_session()
 
     additional_args = {
         "assignees": args.assignees,
@@ -216,8 +349,18 @@ def issue_create():
 def get_issue(issue_number):
     """
     Returns the issue object for the given number
+
+    GitHub issues are looked up through `issuebranch daemon` when it is running.
     """
     backend_name = os.environ["ISSUE_BACKEND"]
+
+    if backend_name == "github":
+        from issuebranch import daemon
+
+        client = daemon.get_client()
+        if client:
+            return daemon.ForwardedBackend(client, issue_number)
+
     backend_module = importlib.import_module(
         "issuebranch.backends.{}".format(backend_name)
     )
@@ -225,6 +368,7 @@ def get_issue(issue_number):
     return getattr(backend_module, "Backend")(issue_number)
 
 
+@with_stats
 def github_to_youtrack():
     parser = argparse.ArgumentParser()
     parser.add_argument("issue", help="the issue number to import into youtrack")
@@ -257,11 +401,15 @@ def github_to_youtrack():
     if not subsystem:
         raise CommandError("subsystem not given")
 
-    session = GithubSession()
+    session = get_session()
     issue = session.get_issue(issue_number)
     body = f'{issue["body"]}\n\n[GitHub issue {issue_number}]({issue["html_url"]})'
     title = f'{issue["title"]} #{issue_number}'
 
+    from requests import HTTPError
+
+    from issuebranch.backends import youtrack
+
     yt_session = youtrack.Session()
 
     extra_fields = []
@@ -300,7 +448,7 @@ def github_to_youtrack():
         response = yt_session.create_issue(
             issue_type, subsystem, title, body, extra_fields=extra_fields
         )
-    except requests.HTTPError as exc:
+    except HTTPError as exc:
         return exc.response.text
 
 
@@ -349,6 +497,7 @@ def make_pull_request(
         move_card_column(issue.issue_number, "feedback")
 
 
+@with_stats
 def issue_branch():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -482,15 +631,17 @@ def make_issue_branch(args, issue, issue_number=None):
     # add the forward slash to the allowed regex
     # default is: r'[^-a-z0-9]+'
     regex_pattern = r"[^/\-a-z0-9_]+"
+
+    from slugify import slugify
+
     slug = slugify(branch_name, max_length=MAX_SLUG_LENGTH, regex_pattern=regex_pattern)
 
     # if the base branch is given as '.', expand that to the current branch
     base = args.base
     if base == ".":
-        command_l = shlex.split("git rev-parse --abbrev-ref HEAD")
-        proc = getattr(sh, command_l[0])
+        result = run_command("git rev-parse --abbrev-ref HEAD")
 
-        base = proc(*command_l[1:]).stdout.decode("utf8").strip()
+        base = result.stdout.decode("utf8").strip()
 
     if args.move_card:
         if hasattr(issue, "move_card"):
@@ -501,6 +652,7 @@ def make_issue_branch(args, issue, issue_number=None):
     make_branch(slug, base)
 
 
+@with_stats
 def issue_close_done():
     """
     Closes any issue that is still open in the done column
@@ -511,19 +663,46 @@ def issue_close_done():
     parser.add_argument(
         "--column", default="done", help="the column to close issues in, default `done`"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only look at open issues updated since the last incremental run",
+    )
 
     args = parser.parse_args()
 
-    session = GithubSession()
+    session = get_session()
 
     project_data = session.get_project(args.project)
 
     column_name = args.column.lower()
-    column_data = session.get_column(project_data, column_name)
 
-    for card in session.get_cards(column_data):
-        issue_data = session.request("get", card["content_url"]).json()
+    watermarks = None
+    issues = None
+    started = time.time()
+    if args.incremental:
+        from issuebranch.statefile import StateFile
 
+        watermarks = StateFile()
+        watermark_key = get_watermark_key("issue-close-done", args.project, column_name)
+
+        issues = search_since(session, watermarks.get(watermark_key), "open")
+
+    if issues is None:
+        column_data = session.get_column(project_data, column_name)
+
+        cards = [x for x in session.get_cards(column_data) if x.get("content_url")]
+        issue_datas = session.get_urls([x["content_url"] for x in cards])
+    else:
+        issue_datas = [
+            issue_data
+            for card, column_data, issue_data in session.get_project_cards(
+                project_data, issues
+            )
+            if column_data["name"].lower() == column_name
+        ]
+
+    for issue_data in issue_datas:
         if issue_data["state"] == "closed":
             print(".", end="")
 
@@ -536,7 +715,11 @@ def issue_close_done():
         session.comment("closing issue in done column", number=issue_number)
         session.update_issue(number=issue_number, state="closed")
 
+    if watermarks:
+        watermarks.set(watermark_key, started)
 
+
+@with_stats
 def issue_closed():
     """
     Finds issues that are closed in all project columns (except `done`) and moves them to `done`
@@ -549,49 +732,92 @@ def issue_closed():
         default="done",
         help="the column closed issues should go to, default `done`",
     )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="print the moves without making them"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only look at issues closed since the last incremental run",
+    )
 
     args = parser.parse_args()
 
     column = args.column.lower()
 
-    session = GithubSession()
+    session = get_session()
 
     project = session.get_project(args.project)
 
-    for column_data in session.get_columns(project):
+    watermarks = None
+    issues = None
+    started = time.time()
+    if args.incremental:
+        from issuebranch.statefile import StateFile
+
+        watermarks = StateFile()
+        watermark_key = get_watermark_key("issue-closed", args.project, column)
+
+        issues = search_since(session, watermarks.get(watermark_key), "closed")
+
+    if issues is None:
+        columns = session.load_board(project)
+        cards = [
+            (card, column_data, card["issue"])
+            for column_data in columns
+            for card in column_data["cards"]
+            if card["issue"]
+        ]
+    else:
+        columns = session.get_columns(project)
+        cards = session.get_project_cards(project, issues)
+
+    for column_data in columns:
+        if column_data["name"].lower() == column:
+            target = column_data
+
+            break
+    else:
+        return f"unable to find column {column} in {args.project}"
+
+    # the cards and where they go are collected first and moved at once
+    moves = []
+    looking_at = None
+    for card, column_data, issue_data in cards:
         column_name = column_data["name"].lower()
         if column_name == column:
             continue
 
-        print(f"\nlooking at column {column_name}")
+        if column_name != looking_at:
+            print(f"\nlooking at column {column_name}")
 
-        # print(json.dumps(column_data, indent=4))
+            looking_at = column_name
 
-        for card in session.get_cards(column_data):
-            # print(json.dumps(card, indent=4))
+        if issue_data["state"] != "closed":
+            print(".", end="")
 
-            issue_data = session.request("get", card["content_url"]).json()
+            continue
 
-            if issue_data["state"] != "closed":
-                print(".", end="")
+        issue_number = issue_data["number"]
 
-                continue
+        if args.dry_run:
+            print(f"\nwould move issue {issue_number} to {column}")
+        else:
+            print(f"\nmoving issue {issue_number} to {column}")
 
-            issue_number = issue_data["number"]
+        moves.append((card, target, "bottom"))
 
-            print(f"\nmoving issue {issue_number} to {column}")
+    if args.dry_run:
+        return
 
-            issue_column(
-                [
-                    "issue_column",
-                    args.project,
-                    issue_number,
-                    column,
-                    "--position=bottom",
-                ]
-            )
+    if moves:
+        session.move_cards(moves)
 
+    if watermarks:
+        watermarks.set(watermark_key, started)
 
+
+@with_stats
 def issue_column(argv=None):
     """
     Moves an issue to the given column
@@ -628,6 +854,7 @@ def issue_column(argv=None):
         issue.move_card(card, column, position=args.position)
 
 
+@with_stats
 def issue_icebox():
     """
     Find issues not in any project and add them to the roadmap icebox
@@ -641,7 +868,7 @@ def issue_icebox():
 
     icebox_column = args.icebox_column
 
-    session = GithubSession()
+    session = get_session()
 
     results = session.search("repo:openslate/openslate is:issue is:open no:project")
 
@@ -660,6 +887,145 @@ def issue_icebox():
             print(f"Error: unable to process issue exc={exc}")
 
 
+@with_stats
+def issuebranch():
+    """
+    Manages issuebranch's local state
+    """
+    parser = argparse.ArgumentParser(description=issuebranch.__doc__)
+
+    subcommands = parser.add_subparsers(dest="subcommand")
+    subcommands.required = True
+
+    sync_parser = subcommands.add_parser(
+        "sync", help="mirror project boards into the local database"
+    )
+    sync_parser.add_argument(
+        "projects", nargs="*", help="names of the projects to mirror, default all"
+    )
+    sync_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="fetch all issues instead of those updated since the last sync",
+    )
+
+    daemon_parser = subcommands.add_parser(
+        "daemon", help="keep GitHub sessions warm for issue commands"
+    )
+    daemon_parser.add_argument(
+        "projects", nargs="*", help="names of the projects to index at startup"
+    )
+    daemon_parser.add_argument(
+        "--socket", help="path to listen on, default ISSUEBRANCH_DAEMON_SOCKET"
+    )
+    daemon_parser.add_argument(
+        "--stop", action="store_true", help="stop the running daemon"
+    )
+
+    standin_parser = subcommands.add_parser(
+        "standin", help="serve a local stand-in for the GitHub API"
+    )
+    standin_parser.add_argument("--host", default="127.0.0.1")
+    standin_parser.add_argument("--port", type=int, default=8765)
+    standin_parser.add_argument(
+        "--fixture", help="JSON file of the boards to serve, default a synthetic board"
+    )
+    standin_parser.add_argument("--projects", type=int, default=1)
+    standin_parser.add_argument("--columns", type=int, default=6)
+    standin_parser.add_argument("--cards", type=int, default=100)
+    standin_parser.add_argument("--seed", type=int, default=0)
+    standin_parser.add_argument(
+        "--latency", type=float, default=0, help="seconds to delay each response"
+    )
+    standin_parser.add_argument(
+        "--verbose", "-v", action="store_true", help="log requests"
+    )
+
+    args = parser.parse_args()
+
+    command_fn_name = f"issuebranch_{args.subcommand}"
+    command_fn = globals()[command_fn_name]
+
+    return command_fn(args)
+
+
+def issuebranch_daemon(args):
+    """
+    Serves forwarded backend calls until interrupted or stopped
+    """
+    from issuebranch import daemon
+
+    if args.stop:
+        if not daemon.stop(args.socket):
+            return "the daemon is not running"
+
+        return
+
+    server = daemon.Daemon(args.socket)
+    server.warm(args.projects)
+
+    print(f"listening on {server.path}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def issuebranch_sync(args):
+    """
+    Mirrors projects, columns, cards, issues, labels and milestones into SQLite
+
+    Set GITHUB_MIRROR_MAX_AGE for the other commands to read from the mirror.
+    """
+    from issuebranch.backends.github import MIRROR
+
+    session = get_session()
+
+    counts = MIRROR.sync(session, project_names=args.projects, full=args.full)
+
+    print(json.dumps(counts, indent=4))
+
+
+def issuebranch_standin(args):
+    """
+    Serves a local stand-in for the GitHub API until interrupted
+    """
+    from issuebranch import standin
+
+    if args.fixture:
+        with open(args.fixture, "r") as fh:
+            fixture = json.load(fh)
+    else:
+        fixture = standin.get_fixture(
+            projects=args.projects,
+            columns=args.columns,
+            cards=args.cards,
+            seed=args.seed,
+        )
+
+    server = standin.StandinServer(
+        (args.host, args.port),
+        fixture=fixture,
+        latency=args.latency,
+        verbose=args.verbose,
+    )
+
+    print(f"export GITHUB_API_URL={server.base_url}")
+    print(f"export ISSUE_BACKEND_USER={server.state.owner}")
+    print(f"export ISSUE_BACKEND_REPO={server.state.repo}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@with_stats
 def issue_show():
     parser = argparse.ArgumentParser()
 
@@ -690,6 +1056,7 @@ def move_card_column(issue_number: int, column: str):
         print("Unable to move card to the {} column, is it in triage?".format(column))
 
 
+@with_stats
 def projects():
     parser = argparse.ArgumentParser()
 
@@ -715,6 +1082,43 @@ def projects():
         "--no-cards", action="store_false", dest="cards", help="do not clone cards"
     )
 
+    sort_parser = subcommands.add_parser(
+        "sort", help="sort a column's cards with as few moves as possible"
+    )
+    sort_parser.add_argument("column", help="the column to sort")
+    sort_parser.add_argument(
+        "--by", choices=SORT_KEYS, default="points", help="default `points`"
+    )
+    sort_parser.add_argument(
+        "--prefix",
+        default="team:",
+        help="the prefix of the labels to sort by with `--by label`, default `team:`",
+    )
+    sort_parser.add_argument("--reverse", action="store_true")
+    sort_parser.add_argument(
+        "--dry-run", action="store_true", help="print the moves without making them"
+    )
+
+    snapshot_parser = subcommands.add_parser(
+        "snapshot", help="archive the board to a local file"
+    )
+    snapshot_parser.add_argument(
+        "--output",
+        "-o",
+        help="the file to write, default `<name> <date>.ndjson.gz`",
+    )
+    snapshot_parser.add_argument(
+        "--report", metavar="SNAPSHOT", help="count the cards and points in a snapshot"
+    )
+    snapshot_parser.add_argument(
+        "--diff", metavar="SNAPSHOT", help="print the changes since a snapshot"
+    )
+    snapshot_parser.add_argument(
+        "--against",
+        metavar="SNAPSHOT",
+        help="the snapshot to compare --diff to, default the board on GitHub",
+    )
+
     columns_parser = subcommands.add_parser("columns")
     columns_parser.add_argument(
         "--action",
@@ -740,7 +1144,7 @@ def projects():
     command_fn_name = f"projects_{args.subcommand}"
     command_fn = globals()[command_fn_name]
 
-    command_fn(args)
+    return command_fn(args)
 
 
 def projects_copy_column(args):
@@ -753,7 +1157,9 @@ def projects_copy_column(args):
 
     projects 'TEAM - DE' backlog 'kanban board'
     """
-    session = GithubSession()
+    from issuebranch import utils
+
+    session = get_session()
 
     column = args.column
 
@@ -768,14 +1174,14 @@ def projects_copy_column(args):
     kanban_board_backlog_grooming = session.get_column(kanban_board, column)
 
     cards = list(session.get_cards(core_engineering_backlog_grooming))
+    issue_numbers = [utils.get_issue_number_from_card_data(x) for x in cards]
 
-    for card_data in cards:
-        issue_number = utils.get_issue_number_from_card_data(card_data)
+    issue_datas = session.map(session.get_issue, issue_numbers)
 
+    for issue_number, issue_data in zip(issue_numbers, issue_datas):
         try:
             print(issue_number)
 
-            issue_data = session.get_issue(issue_number)
             session.create_card(kanban_board_backlog_grooming, issue_data)
         except Exception as exc:
             print(f"unable to move {issue_number}")
@@ -785,19 +1191,28 @@ def projects_count(args):
     """
     Counts cards and points
     """
-    session = GithubSession()
+    session = get_session()
 
     print(f"counting {args.name}")
 
     board = session.get_project(args.name)
 
+    columns = session.load_board(board)
+
+    print(json.dumps(get_tally(columns), indent=4))
+
+
+def get_tally(columns):
+    """
+    Returns the number of cards and points in each column of a loaded board
+    """
     tally = []
 
-    columns = session.get_columns(board)
     for column in columns:
         print(column["name"], file=sys.stderr)
 
-        cards = list(session.get_cards(column))
+        # notes do not have an issue
+        issue_datas = [x["issue"] for x in column["cards"] if x["issue"]]
 
         total = Decimal(0)
         unpointed = 0
@@ -807,12 +1222,8 @@ def projects_count(args):
         walk_ins = []
         walk_in_points = 0
 
-        for card_data in cards:
-            issue_number = utils.get_issue_number_from_card_data(card_data)
-            if not issue_number:  # must be a note
-                continue
-
-            issue_data = session.get_issue(issue_number)
+        for issue_data in issue_datas:
+            issue_number = issue_data["number"]
             labels = issue_data["labels"]
 
             num_cards += 1
@@ -854,7 +1265,7 @@ def projects_count(args):
             }
         )
 
-    print(json.dumps(tally, indent=4))
+    return tally
 
 
 def projects_label(args):
@@ -865,40 +1276,59 @@ def projects_label(args):
 
     optionally, a team label is added if a team is given
     """
-    session = GithubSession()
+    from issuebranch import utils
+
+    session = get_session()
+
+    label_names = set([x["name"] for x in session.get_labels()])
 
-    label_datas = list(session.get_labels())
+    names = [utils.get_label(args.name, prefix="project")]
 
     team = args.team
-    team_label_data = None
     if team:
-        team_label = utils.get_label(team, prefix="team")
-        team_label_data = [x for x in label_datas if x["name"] == team_label][0]
+        names.append(utils.get_label(team, prefix="team"))
 
-    # get the project label
-    project_label = utils.get_label(args.name, prefix="project")
-    project_label_data = [x for x in label_datas if x["name"] == project_label][0]
+    for name in names:
+        if name not in label_names:
+            return f"label {name} not found"
 
     print(f"label cards in project {args.name} column {args.column}")
 
     project_board = session.get_project(args.name)
-    project_backlog_grooming = session.get_column(project_board, "backlog grooming")
+    project_backlog_grooming = next(
+        (
+            x
+            for x in session.load_board(project_board)
+            if x["name"].lower() == "backlog grooming"
+        ),
+        None,
+    )
+    if project_backlog_grooming is None:
+        return f"unable to find column backlog grooming in {args.name}"
+
+    issue_datas = [x["issue"] for x in project_backlog_grooming["cards"] if x["issue"]]
 
-    cards = list(session.get_cards(project_backlog_grooming))
-    for card_data in cards:
-        issue_number = utils.get_issue_number_from_card_data(card_data)
+    responses = session.add_labels(
+        dict([(x["number"], names) for x in issue_datas]),
+        current=dict(
+            [(x["number"], [y["name"] for y in x["labels"]]) for x in issue_datas]
+        ),
+    )
 
+    for issue_number in responses:
         print(issue_number)
 
-        # add the project label
-        session.add_label(project_label_data, number=issue_number)
 
-        if team_label_data:
-            session.add_label(team_label_data, number=issue_number)
+def projects_clone(args):
+    """
+    Clones a project's columns and cards into a new project and closes it
 
+    Progress is recorded in a journal so that running an interrupted clone again
+    picks up where it stopped.
+    """
+    from issuebranch.journal import Journal, get_journal_path
 
-def projects_clone(args):
-    session = GithubSession()
+    session = get_session()
 
     project = None
     new_project = None
@@ -920,20 +1350,37 @@ def projects_clone(args):
     # print(json.dumps(project, indent=4))
     # print(json.dumps(new_project, indent=4))
 
+    journal = Journal(get_journal_path("clone", project["id"], args.new_name))
+
+    done = set([x["column_done"] for x in journal.load() if "column_done" in x])
+    if done:
+        print(f"resuming, {len(done)} columns already cloned")
+
     # create the new project if it doesn't exist
     if not new_project:
         print(f"creating {args.new_name}")
 
         new_project = session.create_project(args.new_name, project["body"])
 
+        journal.append(new_project=new_project["id"])
+
     # get the new project's columns and index them by name
     new_columns = {}
     for column in session.get_columns(new_project):
         new_columns[column["name"]] = column
 
+    # the board's cards carry their issues, so no issue is fetched per card
+    if args.cards:
+        columns = session.load_board(project)
+    else:
+        columns = session.get_columns(project)
+
     # go through all the columns in the old project and create them in the
     # new one if they don't already exist
-    for column_data in session.get_columns(project):
+    for column_data in columns:
+        if column_data["id"] in done:
+            continue
+
         column_name = column_data["name"]
         new_column_data = new_columns.get(column_name)
         if not new_column_data:
@@ -941,48 +1388,182 @@ def projects_clone(args):
 
             new_column_data = session.create_column(new_project, column_name)
 
-        # print(new_column_data)
+            journal.append(column=column_data["id"], new_column=new_column_data["id"])
+
+        if args.cards:
+            print(f"filling {column_name}")
+
+            projects_clone_cards(session, journal, column_data, new_column_data)
+
+        journal.append(column_done=column_data["id"])
+
+    # close the new project
+    session.close_project(new_project)
+
+    journal.remove()
+
+
+def projects_clone_cards(session, journal, column_data, new_column_data):
+    """
+    Fills the new column with the old column's cards in the same order
+
+    The cards are created concurrently and then moved into place.
+    """
+    old_cards = []
+    for old_card_data in column_data["cards"]:
+        if not old_card_data["issue"]:
+            print(f"skipping {old_card_data}")
 
-        # when cloning cards is not desired, loop here
-        if not args.cards:
             continue
 
-        # get the new column's cards
-        new_cards = dict(
-            [(x["content_url"], x) for x in session.get_cards(new_column_data)]
+        old_cards.append(old_card_data)
+
+    # the new column has cards already when resuming
+    new_cards = dict(
+        [
+            (x["content_url"], x)
+            for x in session.get_cards(new_column_data)
+            if x.get("content_url")
+        ]
+    )
+
+    def create_card(old_card_data):
+        try:
+            response = session.create_card(new_column_data, old_card_data["issue"])
+        except session.HTTPError:
+            print(
+                f"Warning: unable to create card {old_card_data['content_url']} "
+                f"in {column_data['name']}"
+            )
+
+            return None
+
+        new_card = response.json()
+
+        journal.append(card=old_card_data["id"], new_card=new_card["id"])
+
+        return new_card
+
+    # new cards go to the top, so creating them bottom up keeps most in order
+    missing = [x for x in reversed(old_cards) if x["content_url"] not in new_cards]
+    for old_card_data, new_card in zip(missing, session.map(create_card, missing)):
+        if new_card:
+            new_cards[old_card_data["content_url"]] = new_card
+
+    ordered = [
+        new_cards[x["content_url"]] for x in old_cards if x["content_url"] in new_cards
+    ]
+
+    session.reorder_cards(new_column_data, ordered)
+
+
+def projects_sort(args):
+    """
+    Sorts a column's cards with as few moves as possible
+
+    Cards that sort the same keep their order, cards without a value to sort by,
+    e.g. unpointed ones, go after the rest and notes stay where they are.
+    """
+    from issuebranch.backends.github import plan_moves
+
+    session = get_session()
+
+    project = session.get_project(args.name)
+
+    column_name = args.column.lower()
+    for column in session.load_board(project):
+        if column["name"].lower() == column_name:
+            break
+    else:
+        return f"unable to find column {args.column} in {args.name}"
+
+    def get_key(card):
+        issue_data = card["issue"]
+        if args.by == "number":
+            return issue_data["number"]
+        elif args.by == "points":
+            return get_points(issue_data["labels"])
+
+        names = [x["name"] for x in issue_data["labels"]]
+
+        return min([x for x in names if x.startswith(args.prefix)], default=None)
+
+    cards = [(get_key(x), x) for x in column["cards"] if x["issue"]]
+
+    ordered = [
+        x[1]
+        for x in sorted(
+            [x for x in cards if x[0] is not None],
+            key=lambda x: x[0],
+            reverse=args.reverse,
         )
+    ]
+    ordered.extend([x[1] for x in cards if x[0] is None])
 
-        # get the old column's cards
-        old_cards = reversed(list(session.get_cards(column_data)))
+    moves = plan_moves([x["id"] for x in column["cards"]], [x["id"] for x in ordered])
 
-        print(f"filling {column_name}")
+    print(
+        f"sorting {len(ordered)} cards in {column['name']} by {args.by} "
+        f"with {len(moves)} moves"
+    )
 
-        for old_card_data in old_cards:
-            try:
-                old_content_url = old_card_data["content_url"]
-            except KeyError:
-                print(f"skipping {old_card_data}")
+    if args.dry_run:
+        for card_id, position in moves:
+            print(f"would move card {card_id} to {position}")
 
-                continue
+        return
 
-            if old_content_url not in new_cards:
-                try:
-                    issue_data = session.request("get", old_content_url).json()
-                except HTTPError as exc:
-                    print(
-                        f"Warning: unable to create card {old_content_url} in {column_name}"
-                    )
+    session.reorder_cards(column, ordered, current=column["cards"])
 
-                    continue
-                else:
-                    new_card = session.create_card(new_column_data, issue_data)
 
-    # close the new project
-    session.close_project(new_project)
+def projects_snapshot(args):
+    """
+    Archives a board to a local snapshot, or reports on and compares snapshots
+    """
+    from issuebranch import snapshot
+
+    if args.report:
+        project, columns = snapshot.read(args.report)
+
+        print(f"{project['name']} as of {project['taken_at']}", file=sys.stderr)
+        print(json.dumps(get_tally(columns), indent=4))
+
+        return
+
+    if args.diff and args.against:
+        _, columns = snapshot.read(args.against)
+    else:
+        session = get_session()
+
+        project = session.get_project(args.name)
+        columns = session.load_board(project)
+
+    if args.diff:
+        _, old_columns = snapshot.read(args.diff)
+
+        for change in snapshot.diff(old_columns, columns):
+            issue = change["issue"] or {}
+            summary = f"#{issue['number']} {issue['title']}" if issue else change["key"]
+
+            moves = ""
+            if change["from"] or change["to"]:
+                moves = f" {change['from'] or ''} -> {change['to'] or ''}"
+
+            print(f"{change['change']:8} {summary}{moves}")
+
+        return
+
+    path = args.output
+    if not path:
+        path = f"{project['name']} {time.strftime('%Y-%m-%d')}.ndjson.gz"
+
+    counts = snapshot.write(path, project, columns)
+
+    print(f"wrote {counts['cards']} cards in {counts['columns']} columns to {path}")
 
 
 def projects_columns(args):
-    session = GithubSession()
+    session = get_session()
 
     project_name = args.name.lower()
 
@@ -1049,9 +1630,10 @@ def projects_columns_print(args, session, column_name, project):
             print(_column["name"])
 
 
+@with_stats
 def milestones():
 
-    session = GithubSession()
+    session = get_session()
 
     display_pairs = sorted(
         [(m.get("number"), m.get("title")) for m in session.get_milestones()],
@@ -0,0 +1,437 @@
+"""
+A warm background process that console scripts forward backend calls to
+
+`issuebranch daemon` keeps a GitHub session with its connection pool, the
+response cache and the project card indexes in memory between commands.  While
+it is running, commands that look up an issue (issue-branch, issue-column,
+issue-show) send their backend calls to it over a Unix socket instead of
+starting cold; when it is not running they make the calls themselves.
+
+Each call and each reply is a single line of JSON.  This module is imported by
+every forwarding command, so it only imports the backend inside the daemon.
+"""
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import types
+
+from issuebranch.backends import BaseBackend
+from issuebranch.exceptions import (
+    CardError,
+    CommandError,
+    GraphQLError,
+    PrefixError,
+)
+from issuebranch.stats import STATS
+
+# set to an empty string to never forward to a daemon
+ISSUEBRANCH_DAEMON_SOCKET = os.environ.get(
+    "ISSUEBRANCH_DAEMON_SOCKET", "~/.cache/issuebranch/daemon.sock"
+)
+
+# the settings a command and the daemon have to agree on for calls to be forwarded
+CONFIG_SETTINGS = (
+    "GITHUB_API_URL",
+    "ISSUE_BACKEND",
+    "ISSUE_BACKEND_API_KEY",
+    "ISSUE_BACKEND_REPO",
+    "ISSUE_BACKEND_USER",
+)
+
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon goes away mid-command or a forwarded call fails with
+    an exception that has no local equivalent
+    """
+
+    pass
+
+
+# exceptions raised in the daemon that are raised again in the command
+EXCEPTIONS = dict(
+    [
+        (x.__name__, x)
+        for x in (AttributeError, CardError, CommandError, GraphQLError, PrefixError)
+    ]
+)
+
+
+def get_config():
+    """
+    Returns a fingerprint of the backend settings in the environment
+    """
+    values = [os.environ.get(x) or "" for x in CONFIG_SETTINGS]
+
+    return hashlib.sha256("\0".join(values).encode("utf8")).hexdigest()
+
+
+def get_socket_path(path=None):
+    path = path if path is not None else ISSUEBRANCH_DAEMON_SOCKET
+
+    return os.path.expanduser(path) if path else None
+
+
+def decode(data):
+    """
+    Returns the given line of JSON with forwarded responses rebuilt
+    """
+
+    def object_hook(value):
+        if "__response__" in value:
+            return ForwardedResponse(**value["__response__"])
+
+        return value
+
+    return json.loads(data, object_hook=object_hook)
+
+
+def encode(data):
+    """
+    Returns a line of JSON for the given data
+
+    Generators are sent as lists and requests responses as their status and body.
+    """
+
+    def default(value):
+        if isinstance(value, types.GeneratorType):
+            return list(value)
+
+        if hasattr(value, "status_code") and hasattr(value, "json"):
+            return {
+                "__response__": {
+                    "status_code": value.status_code,
+                    "data": value.json() if value.content else None,
+                }
+            }
+
+        raise TypeError(f"{value.__class__.__name__} cannot be forwarded")
+
+    return json.dumps(data, default=default).encode("utf8") + b"\n"
+
+
+class ForwardedResponse(object):
+    """
+    The parts of a requests response that are sent back from the daemon
+    """
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+
+        self._data = data
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return self._data
+
+
+class Client(object):
+    """
+    A connection to the daemon
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self._file = None
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def connect(self):
+        """
+        Connects to the daemon
+
+        Returns:
+            bool: whether the daemon is running with the same backend settings
+        """
+        if not self.open():
+            return False
+
+        try:
+            return self.request("hello", config=get_config())["value"]
+        except DaemonError:
+            self.close()
+
+            return False
+
+    def open(self):
+        """
+        Opens the socket
+
+        Returns:
+            bool: whether anything is listening on it
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+
+            return False
+
+        self._file = sock.makefile("rwb")
+
+        # the socket is owned by the file from here on
+        sock.close()
+
+        return True
+
+    def request(self, op, **message):
+        """
+        Sends a message to the daemon and returns its reply
+
+        Raises:
+            DaemonError when the daemon cannot be reached
+        """
+        message["op"] = op
+
+        try:
+            self._file.write(encode(message))
+            self._file.flush()
+
+            line = self._file.readline()
+        except OSError as exc:
+            raise DaemonError(f"unable to reach the daemon: {exc}")
+
+        if not line:
+            raise DaemonError("the daemon closed the connection")
+
+        reply = decode(line)
+
+        STATS.add_requests(reply.get("requests", []))
+
+        error = reply.get("error")
+        if error:
+            exc_class = EXCEPTIONS.get(error["type"])
+            if exc_class is None:
+                raise DaemonError(f"{error['type']}: {error['message']}")
+
+            raise exc_class(error["message"])
+
+        return reply
+
+
+CLIENTS = {}
+
+
+def get_client(path=None):
+    """
+    Returns a connection to the running daemon or None when there is none
+    """
+    path = get_socket_path(path)
+    if not path:
+        return None
+
+    if path not in CLIENTS:
+        client = None
+        if os.path.exists(path):
+            client = Client(path)
+            if not client.connect():
+                client = None
+
+        CLIENTS[path] = client
+
+    return CLIENTS[path]
+
+
+class ForwardedBackend(BaseBackend):
+    """
+    An issue backend whose attributes and methods are looked up in the daemon
+    """
+
+    CardError = CardError
+    GraphQLError = GraphQLError
+    HTTPError = DaemonError
+    PrefixError = PrefixError
+
+    def __init__(self, client, issue_number):
+        super().__init__(issue_number)
+
+        self.client = client
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        reply = self.client.request("get", issue_number=self.issue_number, name=name)
+        if not reply.get("callable"):
+            return reply["value"]
+
+        def method(*args, **kwargs):
+            return self.client.request(
+                "call",
+                issue_number=self.issue_number,
+                name=name,
+                args=args,
+                kwargs=kwargs,
+            )["value"]
+
+        method.__name__ = name
+
+        # methods stay methods, so only look them up once
+        setattr(self, name, method)
+
+        return method
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the calls of a single command
+    """
+
+    def handle(self):
+        # the backend for each issue lives as long as the command's connection
+        backends = {}
+
+        for line in self.rfile:
+            try:
+                reply = self.server.dispatch(decode(line), backends)
+            except Exception as exc:
+                reply = {"error": {"type": exc.__class__.__name__, "message": str(exc)}}
+
+            try:
+                data = encode(reply)
+            except TypeError as exc:
+                data = encode({"error": {"type": "TypeError", "message": str(exc)}})
+
+            self.wfile.write(data)
+
+
+class Daemon(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves forwarded backend calls on a Unix socket
+
+    Args:
+        path (str): the socket path, ISSUEBRANCH_DAEMON_SOCKET by default
+        config (str): the settings fingerprint clients must match, see `get_config`
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=None, config=None):
+        from issuebranch.backends import github
+
+        self.path = get_socket_path(path)
+        if not self.path:
+            raise CommandError("ISSUEBRANCH_DAEMON_SOCKET is not set")
+
+        self.config = config or get_config()
+
+        # the requests made for each call are sent back to the client
+        STATS.enabled = True
+
+        self.github = github
+        self.lock = threading.Lock()
+
+        # every backend shares this session's connection pool and card indexes
+        self.session = github.GithubSession()
+        self.indexed_at = time.time()
+
+        if os.path.exists(self.path):
+            client = Client(self.path)
+            if client.open():
+                client.close()
+
+                raise CommandError(f"a daemon is already listening on {self.path}")
+
+            # left behind by a daemon that did not shut down cleanly
+            os.remove(self.path)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        super().__init__(self.path, RequestHandler)
+
+        os.chmod(self.path, 0o600)
+
+    def dispatch(self, message, backends):
+        """
+        Returns the reply to a message from a command
+        """
+        op = message["op"]
+
+        if op == "hello":
+            return {"value": message["config"] == self.config}
+
+        if op == "stop":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+            return {"value": True}
+
+        issue_number = message["issue_number"]
+
+        with self.lock:
+            # the boards change outside of this process, so rebuild card indexes
+            # as often as the response cache expires
+            if time.time() - self.indexed_at > self.github.GITHUB_CACHE_TTL:
+                self.session.card_indexes.clear()
+                self.indexed_at = time.time()
+
+            backend = backends.get(issue_number)
+            if backend is None:
+                backend = self.github.Backend(issue_number).share(self.session)
+                backends[issue_number] = backend
+
+            STATS.clear()
+            try:
+                value = getattr(backend, message["name"])
+                if op == "get":
+                    if callable(value):
+                        return {"callable": True}
+
+                    return {"value": value, "requests": STATS.requests}
+
+                value = value(*message["args"], **message["kwargs"])
+                if isinstance(value, types.GeneratorType):
+                    value = list(value)
+
+                return {"value": value, "requests": STATS.requests}
+            finally:
+                STATS.clear()
+
+    def server_close(self):
+        super().server_close()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def warm(self, project_names):
+        """
+        Loads the card indexes of the given projects
+        """
+        with self.lock:
+            for name in project_names:
+                project = self.session.get_project(name)
+                self.session.get_card_index(project)
+
+            self.indexed_at = time.time()
+
+
+def stop(path=None):
+    """
+    Asks the daemon listening on the given socket to shut down
+
+    Returns:
+        bool: whether a daemon was running
+    """
+    client = Client(get_socket_path(path))
+    if not client.open():
+        return False
+
+    try:
+        client.request("stop")
+    finally:
+        client.close()
+
+    return True
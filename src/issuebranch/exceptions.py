@@ -1,6 +1,14 @@
+class CardError(Exception):
+    pass
+
+
 class CommandError(Exception):
     pass
 
 
+class GraphQLError(Exception):
+    pass
+
+
 class PrefixError(Exception):
     pass
@@ -0,0 +1,78 @@
+"""
+Checkpoint journals that let long running commands resume where they stopped
+"""
+import json
+import os
+import re
+import threading
+
+ISSUEBRANCH_JOURNAL_DIR = os.environ.get(
+    "ISSUEBRANCH_JOURNAL_DIR", "~/.cache/issuebranch/journals"
+)
+
+NAME_RE = re.compile(r"[^a-z0-9]+")
+
+
+def get_journal_path(*parts):
+    """
+    Returns the path of the journal for the given parts, e.g. a command and its args
+    """
+    name = "-".join([NAME_RE.sub("-", str(x).lower()).strip("-") for x in parts])
+
+    return os.path.join(os.path.expanduser(ISSUEBRANCH_JOURNAL_DIR), f"{name}.jsonl")
+
+
+class Journal(object):
+    """
+    An append-only file of JSON records
+
+    Each record is flushed to disk before `append()` returns, so a record that
+    is in the journal describes work that was done.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+        self._lock = threading.Lock()
+
+    def append(self, **record):
+        line = json.dumps(record) + "\n"
+
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(self.path, "a") as fh:
+                fh.write(line)
+                fh.flush()
+
+                os.fsync(fh.fileno())
+
+    def load(self):
+        """
+        Returns the records in the journal
+
+        A partly written last line, left by a crash mid-append, is ignored.
+        """
+        records = []
+
+        try:
+            with open(self.path, "r") as fh:
+                for line in fh:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            pass
+
+        return records
+
+    def remove(self):
+        """
+        Removes the journal once the work it records is complete
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,389 @@
+"""
+A local SQLite mirror of project boards
+"""
+import json
+import os
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS columns (
+    id INTEGER PRIMARY KEY,
+    project_url TEXT,
+    position INTEGER,
+    data TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    column_url TEXT,
+    position INTEGER,
+    content_url TEXT,
+    data TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    number INTEGER PRIMARY KEY,
+    updated_at TEXT,
+    data TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS labels (
+    name TEXT PRIMARY KEY,
+    data TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS milestones (
+    number INTEGER PRIMARY KEY,
+    data TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS columns_project_url ON columns (project_url);
+CREATE INDEX IF NOT EXISTS cards_column_url ON cards (column_url);
+"""
+
+# the sync_state key holding the updated_at watermark for issues
+ISSUES_SINCE_KEY = "issues_since"
+
+# sync_state keys recording when labels and milestones were last synced
+LABELS_SYNCED_KEY = "labels_synced_at"
+MILESTONES_SYNCED_KEY = "milestones_synced_at"
+
+# the sync_state key recording when cards were last expired
+CARDS_EXPIRED_KEY = "cards_expired_at"
+
+
+class Mirror(object):
+    """
+    Mirrors projects, columns, cards, issues, labels and milestones into SQLite
+
+    Rows are stored as the JSON returned by the API along with the time they were
+    synced; reads return None when the data is missing or older than `max_age`
+    so that callers fall back to the API.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+        self._connection = None
+        self._lock = threading.RLock()
+
+        # table -> time it was last expired, so a sync that was reading from the
+        # API at the time does not mark what it read fresh
+        self._expired_at = {}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            # most commands never touch the mirror, so defer the import
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+
+        return self._connection
+
+    def _fetch(self, query, params, max_age):
+        """
+        Returns the decoded data of the matching rows or None if any are stale
+        """
+        with self._lock:
+            rows = self.connection.execute(query, params).fetchall()
+
+        oldest = time.time() - max_age
+        if any(x[1] < oldest for x in rows):
+            return None
+
+        return [json.loads(x[0]) for x in rows]
+
+    def _is_fresh(self, table, id, max_age):
+        """
+        Returns whether the row with the given id was synced within max_age
+        """
+        return bool(
+            self._fetch(
+                f"SELECT data, synced_at FROM {table} WHERE id = ?", (id,), max_age
+            )
+        )
+
+    def _get_state(self, key):
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def expire(self, *tables):
+        """
+        Marks the given tables stale so reads fall back to the API until the next sync
+        """
+        with self._lock, self.connection:
+            for table in tables:
+                self._expired_at[table] = time.time()
+
+                self.connection.execute(f"UPDATE {table} SET synced_at = 0")
+
+                if table == "cards":
+                    self._set_state(CARDS_EXPIRED_KEY, str(time.time()))
+                elif table == "labels":
+                    self._set_state(LABELS_SYNCED_KEY, "0")
+                elif table == "milestones":
+                    self._set_state(MILESTONES_SYNCED_KEY, "0")
+
+    def get(self, kind, *args, max_age):
+        """
+        Returns mirrored data for one of the GithubSession read paths or None
+
+        Args:
+            kind (str): one of project, columns, cards, issue, labels or milestones
+            args: the arguments to the session method
+            max_age (float): the maximum number of seconds since the data was synced
+        """
+        return getattr(self, f"get_{kind}")(*args, max_age=max_age)
+
+    def get_cards(self, column, max_age):
+        # an empty column has no card rows, so check the column itself is fresh
+        # and was synced after cards were last written
+        expired_at = float(self._get_state(CARDS_EXPIRED_KEY) or 0)
+        if not self._fetch(
+            "SELECT data, synced_at FROM columns WHERE id = ? AND synced_at > ?",
+            (column["id"], expired_at),
+            max_age,
+        ):
+            return None
+
+        return self._fetch(
+            "SELECT data, synced_at FROM cards WHERE column_url = ? ORDER BY position",
+            (column["url"],),
+            max_age,
+        )
+
+    def get_columns(self, project, max_age):
+        if not self._is_fresh("projects", project["id"], max_age):
+            return None
+
+        return self._fetch(
+            "SELECT data, synced_at FROM columns WHERE project_url = ? "
+            "ORDER BY position",
+            (project["url"],),
+            max_age,
+        )
+
+    def get_issue(self, number, max_age):
+        issues = self._fetch(
+            "SELECT data, synced_at FROM issues WHERE number = ?",
+            (int(number),),
+            max_age,
+        )
+
+        return issues[0] if issues else None
+
+    def get_labels(self, max_age):
+        return self._get_collection("labels", LABELS_SYNCED_KEY, max_age)
+
+    def get_milestones(self, max_age):
+        return self._get_collection("milestones", MILESTONES_SYNCED_KEY, max_age)
+
+    def _get_collection(self, table, state_key, max_age):
+        synced_at = float(self._get_state(state_key) or 0)
+        if synced_at < time.time() - max_age:
+            return None
+
+        with self._lock:
+            rows = self.connection.execute(f"SELECT data FROM {table}").fetchall()
+
+        return [json.loads(x[0]) for x in rows]
+
+    def get_project(self, name, max_age):
+        projects = self._fetch(
+            "SELECT data, synced_at FROM projects WHERE lower(name) = ?",
+            (name.lower(),),
+            max_age,
+        )
+
+        return projects[0] if projects else None
+
+    def _read(self, session, project_names, since):
+        """
+        Returns the boards, labels, milestones and issues to mirror from the API
+        """
+        # read from the API rather than from this mirror
+        use_mirror = session.use_mirror
+        session.use_mirror = False
+
+        try:
+            projects = session.projects
+            if project_names:
+                names = [x.lower() for x in project_names]
+                projects = [x for x in projects if x["name"].lower() in names]
+
+            boards = []
+            for project in projects:
+                columns = [
+                    (x, session.get_cards(x)) for x in session.get_columns(project)
+                ]
+
+                boards.append((project, columns))
+
+            filters = {"state": "all"}
+            if since:
+                filters["since"] = since
+
+            return (
+                boards,
+                session.get_labels(),
+                session.get_milestones(),
+                session.get_issues(**filters),
+            )
+        finally:
+            session.use_mirror = use_mirror
+
+    def _synced_at(self, table, now):
+        """
+        Returns the synced_at for rows read at `now`, or 0 when the table was
+        expired while they were being read
+        """
+        return 0 if self._expired_at.get(table, 0) >= now else now
+
+    def sync(self, session, project_names=None, full=False):
+        """
+        Refreshes the mirror from the API
+
+        Column and card pages that have not changed come back as 304s through the
+        session's ETag cache, and only issues updated since the last sync are
+        fetched.  Everything is read before the mirror is locked, so reads from
+        other threads are only blocked while the rows are written.
+
+        Args:
+            session: a GithubSession
+            project_names (list): names of the projects whose boards are mirrored;
+                all open projects by default
+            full (bool): fetch all issues rather than those updated since the last sync
+
+        Returns:
+            dict: the number of rows synced per table
+        """
+        counts = dict([(x, 0) for x in ("projects", "columns", "cards", "issues")])
+
+        now = time.time()
+
+        since = None if full else self._get_state(ISSUES_SINCE_KEY)
+
+        boards, labels, milestones, issues = self._read(session, project_names, since)
+
+        with self._lock, self.connection as connection:
+            projects_synced_at = self._synced_at("projects", now)
+            columns_synced_at = self._synced_at("columns", now)
+            cards_synced_at = self._synced_at("cards", now)
+
+            for project, columns in boards:
+                connection.execute(
+                    "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?)",
+                    (
+                        project["id"],
+                        project["name"],
+                        json.dumps(project),
+                        projects_synced_at,
+                    ),
+                )
+                counts["projects"] += 1
+
+                connection.execute(
+                    "DELETE FROM columns WHERE project_url = ?", (project["url"],)
+                )
+                for position, (column, cards) in enumerate(columns):
+                    connection.execute(
+                        "INSERT OR REPLACE INTO columns VALUES (?, ?, ?, ?, ?)",
+                        (
+                            column["id"],
+                            project["url"],
+                            position,
+                            json.dumps(column),
+                            columns_synced_at,
+                        ),
+                    )
+                    counts["columns"] += 1
+
+                    connection.execute(
+                        "DELETE FROM cards WHERE column_url = ?", (column["url"],)
+                    )
+                    for card_position, card in enumerate(cards):
+                        connection.execute(
+                            "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?)",
+                            (
+                                card["id"],
+                                column["url"],
+                                card_position,
+                                card.get("content_url"),
+                                json.dumps(card),
+                                cards_synced_at,
+                            ),
+                        )
+                        counts["cards"] += 1
+
+            connection.execute("DELETE FROM labels")
+            for label in labels:
+                connection.execute(
+                    "INSERT OR REPLACE INTO labels VALUES (?, ?, ?)",
+                    (label["name"], json.dumps(label), now),
+                )
+            self._set_state(LABELS_SYNCED_KEY, str(self._synced_at("labels", now)))
+
+            connection.execute("DELETE FROM milestones")
+            for milestone in milestones:
+                connection.execute(
+                    "INSERT OR REPLACE INTO milestones VALUES (?, ?, ?)",
+                    (milestone["number"], json.dumps(milestone), now),
+                )
+            self._set_state(
+                MILESTONES_SYNCED_KEY, str(self._synced_at("milestones", now))
+            )
+
+            if not since:
+                connection.execute("DELETE FROM issues")
+
+            issues_synced_at = self._synced_at("issues", now)
+
+            # issues that have not changed since the watermark are still current
+            connection.execute("UPDATE issues SET synced_at = ?", (issues_synced_at,))
+
+            for issue in issues:
+                connection.execute(
+                    "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?)",
+                    (
+                        issue["number"],
+                        issue["updated_at"],
+                        json.dumps(issue),
+                        issues_synced_at,
+                    ),
+                )
+                counts["issues"] += 1
+
+                if not since or issue["updated_at"] > since:
+                    since = issue["updated_at"]
+
+            if since:
+                self._set_state(ISSUES_SINCE_KEY, since)
+
+        return counts
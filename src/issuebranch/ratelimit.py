@@ -0,0 +1,180 @@
+"""
+Rate limit accounting for the GitHub API
+"""
+import random
+import threading
+import time
+
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RESERVE = 100
+
+SECONDARY_LIMIT_TEXT = "secondary rate limit"
+
+
+class RateLimiter(object):
+    """
+    Tracks the rate limit budget reported by the API and schedules requests around it
+
+    Requests are paced evenly across the rest of the window once fewer than
+    `reserve` requests remain, and responses that indicate the primary or
+    secondary limit was hit are retried after waiting with jitter.
+    """
+
+    def __init__(
+        self,
+        reserve=DEFAULT_RESERVE,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        write_interval=0,
+    ):
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.write_interval = write_interval
+
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+        # the number of requests made and the budget they consumed
+        self.requests = 0
+        self.used = 0
+        self.waited = 0
+
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    def add_wait(self, delay):
+        """
+        Records time spent waiting on the rate limit
+        """
+        with self._lock:
+            self.waited += delay
+
+    def get_delay(self, method="get"):
+        """
+        Reserves the next request slot and returns the number of seconds to wait for it
+
+        Slots are handed out under a lock so that requests made from several
+        threads share the pacing rather than each pacing independently.
+        """
+        now = time.time()
+        interval = 0
+
+        with self._lock:
+            if self.remaining is not None and self.reset and self.reset > now:
+                if self.remaining <= 0:
+                    return self.reset - now
+
+                if self.remaining < self.reserve:
+                    interval = (self.reset - now) / self.remaining
+
+            if method != "get":
+                interval = max(interval, self.write_interval)
+
+            if not interval:
+                return 0
+
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+
+        return slot - now
+
+    def get_retry_delay(self, response, attempt):
+        """
+        Returns how long to wait before retrying the request or None when the
+        response was not rate limited or the request was retried max_retries times
+
+        Args:
+            response: the response from the API
+            attempt (int): the number of times the request has been retried
+        """
+        if response.status_code not in (403, 429) or attempt >= self.max_retries:
+            return
+
+        headers = response.headers
+
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            delay = float(retry_after)
+        elif headers.get("X-RateLimit-Remaining") == "0" and headers.get(
+            "X-RateLimit-Reset"
+        ):
+            delay = max(0, int(headers["X-RateLimit-Reset"]) - time.time())
+        elif response.status_code == 429 or SECONDARY_LIMIT_TEXT in response.text:
+            delay = min(self.max_backoff, self.backoff * 2**attempt)
+        else:
+            # a plain permission error
+            return
+
+        return delay + random.uniform(0, self.backoff)
+
+    def report(self):
+        """
+        Returns a summary of the budget consumed
+        """
+        summary = f"rate limit: {self.requests} requests, {self.used} counted"
+
+        if self.remaining is not None:
+            summary += f", {self.remaining}/{self.limit} remaining"
+
+        if self.reset:
+            reset_s = time.strftime("%H:%M:%S", time.localtime(self.reset))
+            summary += f", resets at {reset_s}"
+
+        if self.waited:
+            summary += f", waited {self.waited:.1f}s"
+
+        return summary
+
+    def sleep(self, delay):
+        """
+        Sleeps for the given number of seconds, recording the time spent waiting
+        """
+        self.add_wait(delay)
+
+        time.sleep(delay)
+
+    def update(self, response):
+        """
+        Updates the budget from the response's rate limit headers
+        """
+        headers = response.headers
+
+        with self._lock:
+            self.requests += 1
+
+            # search and graphql have budgets of their own; only the core budget
+            # is paced, although all rate limited responses are retried
+            resource = headers.get("X-RateLimit-Resource", "core")
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is None or resource != "core":
+                return
+
+            remaining = int(remaining)
+            reset = int(headers.get("X-RateLimit-Reset", 0))
+
+            if self.remaining is not None and reset == self.reset:
+                self.used += max(0, self.remaining - remaining)
+
+                # concurrent responses can arrive out of order, and the budget
+                # only goes down within a window
+                remaining = min(self.remaining, remaining)
+            elif response.status_code != 304:
+                self.used += 1
+
+            self.limit = int(headers.get("X-RateLimit-Limit", 0)) or self.limit
+            self.remaining = remaining
+            self.reset = reset
+
+    def wait(self, method="get"):
+        """
+        Sleeps until it is time to make the next request
+        """
+        delay = self.get_delay(method)
+        if delay > 0:
+            self.sleep(delay)
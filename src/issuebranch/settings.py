@@ -1,5 +1,7 @@
 import os
 
+from issuebranch.exceptions import CommandError
+
 ON_DECK_COLUMN_NAME = "on deck"
 PARKING_LOT_NAME = "parking lot"
 
@@ -11,3 +13,19 @@ OTHER_PROJECT = {
     PRODUCT_BACKLOG_NAME: SCRUM_BOARD_NAME,
     SCRUM_BOARD_NAME: PRODUCT_BACKLOG_NAME,
 }
+
+
+def get_required(name):
+    """
+    Returns the value of a required environment variable
+
+    Backends read their required settings on first use rather than at import so
+    that importing a backend is cheap and never fails.
+
+    Raises:
+        CommandError when the variable is not set
+    """
+    try:
+        return os.environ[name]
+    except KeyError:
+        raise CommandError(f"{name} must be set in the environment")
@@ -1,7 +1,5 @@
 import shlex
 
-import sh
-
 
 def run_command(command, **kwargs):
     """
@@ -13,6 +11,9 @@ def run_command(command, **kwargs):
     Returns:
         the executed sh process
     """
+    # sh is slow to import, so only commands that shell out pay for it
+    import sh
+
     command_l = shlex.split(command)
 
     return getattr(sh, command_l[0])(*command_l[1:], **kwargs)
@@ -0,0 +1,150 @@
+"""
+Local archives of project boards
+
+A snapshot is a gzipped file of newline delimited JSON: a project record followed
+by each column and the cards in it, in board order.  Snapshots are written from
+a single load of the board and read back in the shape `GithubSession.load_board`
+returns, so they can be reported on and compared to each other or to the live
+board without touching the API.
+"""
+import gzip
+import json
+import time
+
+VERSION = 1
+
+
+def get_card_key(card):
+    """
+    Returns the key a card is compared by across snapshots
+
+    Issues are compared by their url since a card for the same issue on another
+    board has a different id; notes only have their id.
+    """
+    return card.get("content_url") or f"note:{card['id']}"
+
+
+def write(path, project, columns):
+    """
+    Writes a snapshot of the board
+
+    Args:
+        path (str): the file to write
+        project (dict): the project data from the github api
+        columns (list): the board as returned by `GithubSession.load_board`
+
+    Returns:
+        dict: the number of columns and cards written
+    """
+    counts = {"columns": 0, "cards": 0}
+
+    with gzip.open(path, "wt", encoding="utf8") as fh:
+
+        def write_record(kind, data):
+            fh.write(json.dumps(dict(data, type=kind)) + "\n")
+
+        write_record(
+            "project",
+            {
+                "version": VERSION,
+                "taken_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "id": project["id"],
+                "name": project["name"],
+                "url": project["url"],
+            },
+        )
+
+        for column in columns:
+            write_record(
+                "column", dict([(k, v) for k, v in column.items() if k != "cards"])
+            )
+            counts["columns"] += 1
+
+            for card in column["cards"]:
+                write_record("card", dict(card, column_id=column["id"]))
+                counts["cards"] += 1
+
+    return counts
+
+
+def read(path):
+    """
+    Reads a snapshot
+
+    Returns:
+        tuple: the project record and the columns, each with its `cards`
+    """
+    project = None
+    columns = []
+
+    with gzip.open(path, "rt", encoding="utf8") as fh:
+        for line in fh:
+            record = json.loads(line)
+            kind = record.pop("type")
+
+            if kind == "project":
+                project = record
+            elif kind == "column":
+                record["cards"] = []
+                columns.append(record)
+            elif kind == "card":
+                record.pop("column_id")
+                columns[-1]["cards"].append(record)
+
+    return project, columns
+
+
+def diff(old_columns, new_columns):
+    """
+    Returns the changes between two boards
+
+    Returns:
+        list: dicts with the `change` (added, removed, moved, closed or reopened),
+            the card's `key`, its `issue` and the `from` and `to` column names
+    """
+
+    def get_cards(columns):
+        return dict(
+            [
+                (get_card_key(card), (card, column["name"]))
+                for column in columns
+                for card in column["cards"]
+            ]
+        )
+
+    old_cards = get_cards(old_columns)
+    new_cards = get_cards(new_columns)
+
+    changes = []
+
+    def add(change, key, card, from_column=None, to_column=None):
+        changes.append(
+            {
+                "change": change,
+                "key": key,
+                "issue": card.get("issue"),
+                "from": from_column,
+                "to": to_column,
+            }
+        )
+
+    for key, (card, column_name) in new_cards.items():
+        if key not in old_cards:
+            add("added", key, card, to_column=column_name)
+
+            continue
+
+        old_card, old_column_name = old_cards[key]
+        if old_column_name != column_name:
+            add("moved", key, card, old_column_name, column_name)
+
+        old_state = (old_card.get("issue") or {}).get("state")
+        state = (card.get("issue") or {}).get("state")
+        if old_state != state and state in ("closed", "open"):
+            add("closed" if state == "closed" else "reopened", key, card)
+
+    for key, (card, column_name) in old_cards.items():
+        if key not in new_cards:
+            add("removed", key, card, from_column=column_name)
+
+    return changes
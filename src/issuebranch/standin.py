@@ -0,0 +1,1258 @@
+"""
+A local stand-in for the parts of the GitHub API that issuebranch uses
+
+The server keeps projects, columns, cards, issues, labels and milestones in
+memory and serves the REST endpoints with Link header pagination, ETags and
+rate limit headers, along with the GraphQL queries made by `load_board`.  Point
+the GitHub backend at it with GITHUB_API_URL to run commands offline.
+"""
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+from .utils import get_label
+
+DEFAULT_OWNER = "openslate"
+DEFAULT_REPO = "openslate"
+
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+RATE_LIMIT = 5000
+
+COLUMN_NAMES = ["icebox", "backlog", "sprint", "in progress", "in review", "done"]
+
+LABEL_NAMES = [
+    "changetype:feature",
+    "changetype:fix",
+    "changetype:chore",
+    "points:1",
+    "points:2",
+    "points:3",
+    "points:5",
+    "points:8",
+    "team:platform",
+    "team:data",
+    "topic:walk-in",
+]
+
+
+class NotFound(Exception):
+    pass
+
+
+class Invalid(Exception):
+    pass
+
+
+def get_fixture(
+    projects=1, columns=6, cards=100, labels=0, milestones=4, closed=0.05, seed=0
+):
+    """
+    Returns a synthetic fixture of project boards
+
+    Every card is an issue; issues are shared out across the columns of each
+    project and given a random selection of labels and a milestone.  Most issues
+    in the last column are closed, as are a fraction of the others.
+
+    Args:
+        projects: the number of projects or a list of their names
+        columns: the number of columns per project or a list of their names
+        cards (int): the number of cards per project
+        labels (int): the number of labels in addition to the standard ones and
+            a `project:` label per project
+        milestones (int): the number of milestones
+        closed (float): the fraction of issues outside the last column that are closed
+        seed (int): the random seed, so the same arguments give the same fixture
+    """
+    rng = random.Random(seed)
+
+    if isinstance(projects, int):
+        projects = [f"board {x}" for x in range(1, projects + 1)]
+
+    if isinstance(columns, int):
+        columns = [
+            COLUMN_NAMES[x % len(COLUMN_NAMES)]
+            + (f" {x}" if x >= len(COLUMN_NAMES) else "")
+            for x in range(columns)
+        ]
+
+    label_names = list(LABEL_NAMES)
+    label_names.extend([get_label(x, prefix="project") for x in projects])
+    label_names.extend([f"label:{x}" for x in range(1, labels + 1)])
+
+    milestone_numbers = list(range(1, milestones + 1))
+
+    fixture = {
+        "labels": [{"name": x, "color": "ededed"} for x in label_names],
+        "milestones": [
+            {"number": x, "title": f"sprint {x}"} for x in milestone_numbers
+        ],
+        "issues": [],
+        "projects": [],
+    }
+
+    number = 0
+    for name in projects:
+        project_columns = [{"name": x, "cards": []} for x in columns]
+
+        for _ in range(cards):
+            number += 1
+
+            column = rng.choice(project_columns)
+            if column is project_columns[-1]:
+                state = "closed" if rng.random() < 0.9 else "open"
+            else:
+                state = "closed" if rng.random() < closed else "open"
+
+            fixture["issues"].append(
+                {
+                    "number": number,
+                    "title": f"issue {number}",
+                    "state": state,
+                    "labels": rng.sample(LABEL_NAMES, rng.randint(0, 3)),
+                    "assignees": [],
+                    "milestone": rng.choice([None] + milestone_numbers),
+                }
+            )
+
+            column["cards"].append({"issue": number})
+
+        fixture["projects"].append({"name": name, "columns": project_columns})
+
+    return fixture
+
+
+class State(object):
+    """
+    The in-memory data served by the stand-in
+    """
+
+    def __init__(self, base_url, owner=DEFAULT_OWNER, repo=DEFAULT_REPO):
+        self.base_url = base_url
+        self.owner = owner
+        self.repo = repo
+
+        self.projects = OrderedDict()
+        self.columns = OrderedDict()
+        self.cards = {}
+        self.issues = OrderedDict()
+        self.labels = OrderedDict()
+        self.milestones = OrderedDict()
+        self.comments = []
+
+        # issue numbers by issue id
+        self.issue_numbers = {}
+        # issue numbers by pull request id, for the issues that are pull requests
+        self.pull_request_numbers = {}
+
+        # card ids in board order per column id and column ids per project id
+        self.column_cards = {}
+        self.project_columns = {}
+
+        self.lock = threading.RLock()
+
+        self._next_id = 1000
+        self._time = int(time.time()) - 10**6
+
+    def get_id(self):
+        self._next_id += 1
+
+        return self._next_id
+
+    def get_timestamp(self):
+        # strictly increasing so that `since` filters are deterministic, and never
+        # behind the clock so that clients can use their own time as a watermark
+        self._time = max(self._time + 1, int(time.time()))
+
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._time))
+
+    def load(self, fixture):
+        """
+        Adds the projects, issues, labels and milestones in the given fixture
+        """
+        with self.lock:
+            for label in fixture.get("labels", []):
+                self.add_label(label["name"], label.get("color", "ededed"))
+
+            for milestone in fixture.get("milestones", []):
+                self.milestones[milestone["number"]] = {
+                    "id": self.get_id(),
+                    "number": milestone["number"],
+                    "title": milestone["title"],
+                    "state": milestone.get("state", "open"),
+                }
+
+            for issue in fixture.get("issues", []):
+                self.add_issue(**issue)
+
+            for project in fixture.get("projects", []):
+                project_id = self.add_project(project["name"], project.get("body", ""))
+
+                for column in project.get("columns", []):
+                    column_id = self.add_column(project_id, column["name"])
+
+                    for card in column.get("cards", []):
+                        issue_id = None
+                        if card.get("issue"):
+                            issue_id = self.issues[card["issue"]]["id"]
+
+                        self.add_card(
+                            column_id,
+                            issue_id=issue_id,
+                            note=card.get("note"),
+                            position="bottom",
+                        )
+
+    # writes
+
+    def add_card(self, column_id, issue_id=None, note=None, position="top"):
+        if column_id not in self.columns:
+            raise NotFound()
+
+        card_id = self.get_id()
+        self.cards[card_id] = {
+            "id": card_id,
+            "column_id": column_id,
+            "issue_id": issue_id,
+            "note": note,
+        }
+
+        cards = self.column_cards[column_id]
+        if position == "top":
+            cards.insert(0, card_id)
+        else:
+            cards.append(card_id)
+
+        return card_id
+
+    def add_column(self, project_id, name):
+        if project_id not in self.projects:
+            raise NotFound()
+
+        column_id = self.get_id()
+        self.columns[column_id] = {
+            "id": column_id,
+            "project_id": project_id,
+            "name": name,
+        }
+
+        self.column_cards[column_id] = []
+        self.project_columns[project_id].append(column_id)
+
+        return column_id
+
+    def add_issue(
+        self,
+        title,
+        number=None,
+        state="open",
+        body="",
+        labels=None,
+        assignees=None,
+        milestone=None,
+        pull_request=False,
+    ):
+        number = number or max(list(self.issues) + [0]) + 1
+
+        for name in labels or []:
+            if name not in self.labels:
+                self.add_label(name)
+
+        self.issues[number] = {
+            "id": self.get_id(),
+            "number": number,
+            "title": title,
+            "state": state,
+            "body": body,
+            "labels": list(labels or []),
+            "assignees": list(assignees or []),
+            "milestone": milestone,
+            "updated_at": self.get_timestamp(),
+            "pull_request_id": self.get_id() if pull_request else None,
+        }
+        self.issue_numbers[self.issues[number]["id"]] = number
+
+        if pull_request:
+            self.pull_request_numbers[self.issues[number]["pull_request_id"]] = number
+
+        return number
+
+    def add_label(self, name, color="ededed"):
+        if name in self.labels:
+            raise Invalid(f"label {name} already exists")
+
+        self.labels[name] = {"id": self.get_id(), "name": name, "color": color}
+
+    def add_project(self, name, body=""):
+        project_id = self.get_id()
+        self.projects[project_id] = {
+            "id": project_id,
+            "number": len(self.projects) + 1,
+            "name": name,
+            "body": body,
+            "state": "open",
+        }
+
+        self.project_columns[project_id] = []
+
+        return project_id
+
+    def delete_card(self, card_id):
+        card = self.cards.pop(card_id, None)
+        if card is None:
+            raise NotFound()
+
+        self.column_cards[card["column_id"]].remove(card_id)
+
+    def delete_column(self, column_id):
+        column = self.columns.pop(column_id, None)
+        if column is None:
+            raise NotFound()
+
+        for card_id in self.column_cards.pop(column_id):
+            del self.cards[card_id]
+
+        self.project_columns[column["project_id"]].remove(column_id)
+
+    def move(self, items, item_id, position, first="top", last="bottom"):
+        """
+        Moves item_id within the list of ids per the API's position values
+        """
+        if position not in (first, last) and not position.startswith("after:"):
+            raise Invalid(f"invalid position {position}")
+
+        if item_id in items:
+            items.remove(item_id)
+
+        if position == first:
+            items.insert(0, item_id)
+        elif position == last:
+            items.append(item_id)
+        else:
+            after_id = int(position.split(":", 1)[1])
+            if after_id not in items:
+                raise Invalid(f"unable to find {after_id}")
+
+            items.insert(items.index(after_id) + 1, item_id)
+
+    def move_card(self, card_id, position, column_id=None):
+        card = self.cards.get(card_id)
+        if card is None:
+            raise NotFound()
+
+        column_id = column_id or card["column_id"]
+        if column_id not in self.columns:
+            raise Invalid(f"unable to find column {column_id}")
+
+        self.column_cards[card["column_id"]].remove(card_id)
+
+        try:
+            self.move(self.column_cards[column_id], card_id, position)
+        except Invalid:
+            self.column_cards[card["column_id"]].insert(0, card_id)
+
+            raise
+
+        card["column_id"] = column_id
+
+    def move_column(self, column_id, position):
+        column = self.columns.get(column_id)
+        if column is None:
+            raise NotFound()
+
+        self.move(
+            self.project_columns[column["project_id"]],
+            column_id,
+            position,
+            first="first",
+            last="last",
+        )
+
+    def update_issue(self, number, **data):
+        issue = self.issues.get(number)
+        if issue is None:
+            raise NotFound()
+
+        for name in data.get("labels") or []:
+            if name not in self.labels:
+                self.add_label(name)
+
+        for key in ("title", "body", "state", "labels", "assignees", "milestone"):
+            if key in data:
+                issue[key] = data[key]
+
+        issue["updated_at"] = self.get_timestamp()
+
+    # rendering in the shape of the API
+
+    def get_url(self, path):
+        return f"{self.base_url}{path}"
+
+    def render_card(self, card_id):
+        card = self.cards[card_id]
+        column = self.columns[card["column_id"]]
+
+        content_url = None
+        if card["issue_id"] is not None:
+            issue = self.get_issue_by_id(card["issue_id"])
+            content_url = self.get_url(
+                f"/repos/{self.owner}/{self.repo}/issues/{issue['number']}"
+            )
+
+        return {
+            "id": card_id,
+            "node_id": f"CARD_{card_id}",
+            "note": card["note"],
+            "archived": False,
+            "url": self.get_url(f"/projects/columns/cards/{card_id}"),
+            "column_url": self.get_url(f"/projects/columns/{column['id']}"),
+            "content_url": content_url,
+            "project_url": self.get_url(f"/projects/{column['project_id']}"),
+        }
+
+    def render_column(self, column_id):
+        column = self.columns[column_id]
+        url = self.get_url(f"/projects/columns/{column_id}")
+
+        return {
+            "id": column_id,
+            "node_id": f"COL_{column_id}",
+            "name": column["name"],
+            "url": url,
+            "cards_url": f"{url}/cards",
+            "project_url": self.get_url(f"/projects/{column['project_id']}"),
+        }
+
+    def render_issue(self, number):
+        issue = self.issues[number]
+        url = self.get_url(f"/repos/{self.owner}/{self.repo}/issues/{number}")
+
+        milestone = None
+        if issue["milestone"] in self.milestones:
+            milestone = self.render_milestone(issue["milestone"])
+
+        return {
+            "id": issue["id"],
+            "node_id": f"I_{issue['id']}",
+            "number": number,
+            "title": issue["title"],
+            "body": issue["body"],
+            "state": issue["state"],
+            "url": url,
+            "html_url": f"https://github.com/{self.owner}/{self.repo}/issues/{number}",
+            "repository_url": self.get_url(f"/repos/{self.owner}/{self.repo}"),
+            "labels_url": f"{url}/labels{{/name}}",
+            "comments_url": f"{url}/comments",
+            "labels": [self.render_label(x) for x in issue["labels"]],
+            "assignees": [{"login": x} for x in issue["assignees"]],
+            "milestone": milestone,
+            "updated_at": issue["updated_at"],
+        }
+
+    def render_label(self, name):
+        label = self.labels[name]
+
+        return {
+            "id": label["id"],
+            "node_id": f"LA_{label['id']}",
+            "name": name,
+            "color": label["color"],
+            "default": False,
+            "url": self.get_url(f"/repos/{self.owner}/{self.repo}/labels/{name}"),
+        }
+
+    def render_milestone(self, number):
+        milestone = self.milestones[number]
+
+        return dict(
+            milestone,
+            url=self.get_url(f"/repos/{self.owner}/{self.repo}/milestones/{number}"),
+        )
+
+    def render_project(self, project_id):
+        project = self.projects[project_id]
+        url = self.get_url(f"/projects/{project_id}")
+
+        return {
+            "id": project_id,
+            "node_id": f"PRO_{project_id}",
+            "number": project["number"],
+            "name": project["name"],
+            "body": project["body"],
+            "state": project["state"],
+            "url": url,
+            "columns_url": f"{url}/columns",
+            "owner_url": self.get_url(f"/orgs/{self.owner}"),
+        }
+
+    def get_issue_by_id(self, issue_id, content_type="Issue"):
+        numbers = self.issue_numbers
+        if content_type == "PullRequest":
+            numbers = self.pull_request_numbers
+
+        try:
+            return self.issues[numbers[issue_id]]
+        except KeyError:
+            raise NotFound()
+
+    # search
+
+    def search(self, q):
+        """
+        Returns the numbers of the issues matching a search query
+
+        Supports `is:open`, `is:closed`, `label:`, `milestone:`, `no:project` and
+        `updated:>=` (and `>`) qualifiers and words in the title; others are ignored.
+        """
+        tokens = re.findall(r'(\S+:"[^"]*"|"[^"]*"|\S+)', q)
+
+        on_board = set(
+            [x["issue_id"] for x in self.cards.values() if x["issue_id"] is not None]
+        )
+
+        numbers = []
+        for number, issue in self.issues.items():
+            matches = True
+
+            for token in tokens:
+                qualifier, _, value = token.partition(":")
+                value = value.strip('"')
+
+                if not value:
+                    matches = token.strip('"').lower() in issue["title"].lower()
+                elif qualifier == "is" and value in ("open", "closed"):
+                    matches = issue["state"] == value
+                elif qualifier == "label":
+                    matches = value in issue["labels"]
+                elif qualifier == "milestone":
+                    milestone = self.milestones.get(issue["milestone"])
+                    matches = bool(milestone) and milestone["title"] == value
+                elif qualifier == "no" and value == "project":
+                    matches = issue["id"] not in on_board
+                elif qualifier == "updated":
+                    since = value.lstrip(">=")
+                    if value.startswith(">="):
+                        matches = issue["updated_at"] >= since
+                    else:
+                        matches = issue["updated_at"] > since
+
+                if not matches:
+                    break
+
+            if matches:
+                numbers.append(number)
+
+        return numbers
+
+
+class GraphQL(object):
+    """
+    Answers the project board and issue card queries made by GithubSession
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def execute(self, query, variables):
+        if "projectId" in variables:
+            project_id = self.get_database_id(variables["projectId"])
+            if project_id not in self.state.projects:
+                return self.get_error(variables["projectId"])
+
+            first = self.get_first(query, "columns")
+            columns = self.state.project_columns[project_id]
+            nodes, page_info = self.get_page(columns, first, variables.get("after"))
+
+            card_first = self.get_first(query, "cards")
+
+            return {
+                "data": {
+                    "node": {
+                        "columns": {
+                            "pageInfo": page_info,
+                            "nodes": [self.render_column(x, card_first) for x in nodes],
+                        }
+                    }
+                }
+            }
+
+        if "columnId" in variables:
+            column_id = self.get_database_id(variables["columnId"])
+            if column_id not in self.state.columns:
+                return self.get_error(variables["columnId"])
+
+            first = self.get_first(query, "cards")
+
+            return {
+                "data": {
+                    "node": {
+                        "cards": self.render_cards(
+                            column_id, first, variables.get("after")
+                        )
+                    }
+                }
+            }
+
+        if "ids" in variables:
+            return {"data": {"nodes": self.render_issue_nodes(variables["ids"])}}
+
+        return {"errors": [{"message": "unsupported query"}]}
+
+    def get_database_id(self, node_id):
+        try:
+            return int(node_id.rsplit("_", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def get_error(self, node_id):
+        return {
+            "data": {"node": None},
+            "errors": [
+                {
+                    "message": f"Could not resolve to a node with the global id of '{node_id}'"
+                }
+            ],
+        }
+
+    def get_first(self, query, field):
+        matches = re.search(field + r"\(first: (\d+)", query)
+
+        return int(matches.group(1)) if matches else MAX_PER_PAGE
+
+    def get_page(self, items, first, after):
+        start = 0
+        if after:
+            start = int(base64.b64decode(after).decode("ascii")) + 1
+
+        nodes = items[start : start + first]
+        end = start + len(nodes) - 1
+
+        page_info = {
+            "hasNextPage": start + first < len(items),
+            "endCursor": base64.b64encode(str(end).encode("ascii")).decode("ascii")
+            if nodes
+            else None,
+        }
+
+        return nodes, page_info
+
+    def render_cards(self, column_id, first, after=None):
+        card_ids = self.state.column_cards[column_id]
+        nodes, page_info = self.get_page(card_ids, first, after)
+
+        return {
+            "pageInfo": page_info,
+            "nodes": [self.render_card(x) for x in nodes],
+        }
+
+    def render_card(self, card_id):
+        card = self.state.cards[card_id]
+
+        content = None
+        if card["issue_id"] is not None:
+            issue = self.state.get_issue_by_id(card["issue_id"])
+
+            milestone = None
+            if issue["milestone"] in self.state.milestones:
+                milestone = self.state.milestones[issue["milestone"]]
+                milestone = {"number": milestone["number"], "title": milestone["title"]}
+
+            content = {
+                "__typename": "PullRequest" if issue["pull_request_id"] else "Issue",
+                "databaseId": issue["pull_request_id"] or issue["id"],
+                "number": issue["number"],
+                "state": issue["state"].upper(),
+                "title": issue["title"],
+                "repository": {
+                    "nameWithOwner": f"{self.state.owner}/{self.state.repo}"
+                },
+                "labels": {"nodes": [{"name": x} for x in issue["labels"]]},
+                "assignees": {"nodes": [{"login": x} for x in issue["assignees"]]},
+                "milestone": milestone,
+            }
+
+        return {"databaseId": card_id, "note": card["note"], "content": content}
+
+    def render_issue_nodes(self, node_ids):
+        issue_cards = {}
+        for card in self.state.cards.values():
+            if card["issue_id"] is not None:
+                issue_cards.setdefault(card["issue_id"], []).append(card)
+
+        nodes = []
+        for node_id in node_ids:
+            issue_id = self.get_database_id(node_id)
+            if issue_id not in self.state.issue_numbers:
+                nodes.append(None)
+
+                continue
+
+            card_nodes = []
+            for card in issue_cards.get(issue_id, []):
+                column = self.state.columns[card["column_id"]]
+                card_nodes.append(
+                    {
+                        "databaseId": card["id"],
+                        "note": card["note"],
+                        "project": {"databaseId": column["project_id"]},
+                        "column": {
+                            "id": f"COL_{column['id']}",
+                            "databaseId": column["id"],
+                            "name": column["name"],
+                        },
+                    }
+                )
+
+            nodes.append(
+                {"databaseId": issue_id, "projectCards": {"nodes": card_nodes}}
+            )
+
+        return nodes
+
+    def render_column(self, column_id, card_first):
+        column = self.state.columns[column_id]
+
+        return {
+            "id": f"COL_{column_id}",
+            "databaseId": column_id,
+            "name": column["name"],
+            "cards": self.render_cards(column_id, card_first),
+        }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes API requests to the stand-in's state
+    """
+
+    # (method, path pattern, handler method name)
+    ROUTES = [
+        ("GET", r"/orgs/[^/]+/projects", "get_projects"),
+        ("POST", r"/orgs/[^/]+/projects", "create_project"),
+        ("GET", r"/projects/(?P<id>\d+)", "get_project"),
+        ("PATCH", r"/projects/(?P<id>\d+)", "update_project"),
+        ("GET", r"/projects/(?P<id>\d+)/columns", "get_columns"),
+        ("POST", r"/projects/(?P<id>\d+)/columns", "create_column"),
+        ("GET", r"/projects/columns/cards/(?P<id>\d+)", "get_card"),
+        ("PATCH", r"/projects/columns/cards/(?P<id>\d+)", "update_card"),
+        ("DELETE", r"/projects/columns/cards/(?P<id>\d+)", "delete_card"),
+        ("POST", r"/projects/columns/cards/(?P<id>\d+)/moves", "move_card"),
+        ("GET", r"/projects/columns/(?P<id>\d+)", "get_column"),
+        ("PATCH", r"/projects/columns/(?P<id>\d+)", "update_column"),
+        ("DELETE", r"/projects/columns/(?P<id>\d+)", "delete_column"),
+        ("POST", r"/projects/columns/(?P<id>\d+)/moves", "move_column"),
+        ("GET", r"/projects/columns/(?P<id>\d+)/cards", "get_cards"),
+        ("POST", r"/projects/columns/(?P<id>\d+)/cards", "create_card"),
+        ("GET", r"/repos/[^/]+/[^/]+/issues", "get_issues"),
+        ("POST", r"/repos/[^/]+/[^/]+/issues", "create_issue"),
+        ("GET", r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)", "get_issue"),
+        ("PATCH", r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)", "update_issue"),
+        ("POST", r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)/comments", "comment"),
+        (
+            "GET",
+            r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)/labels",
+            "get_issue_labels",
+        ),
+        (
+            "POST",
+            r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)/labels",
+            "add_issue_labels",
+        ),
+        (
+            "PUT",
+            r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)/labels",
+            "set_issue_labels",
+        ),
+        (
+            "DELETE",
+            r"/repos/[^/]+/[^/]+/issues/(?P<number>\d+)/labels/(?P<name>.+)",
+            "remove_issue_label",
+        ),
+        ("GET", r"/repos/[^/]+/[^/]+/labels", "get_labels"),
+        ("POST", r"/repos/[^/]+/[^/]+/labels", "create_label"),
+        ("GET", r"/repos/[^/]+/[^/]+/milestones", "get_milestones"),
+        ("GET", r"/search/issues", "search"),
+        ("POST", r"/graphql", "graphql"),
+    ]
+
+    protocol_version = "HTTP/1.1"
+
+    # send headers and body together rather than waiting on delayed ACKs
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def dispatch(self, method):
+        if self.server.first_request_at is None:
+            self.server.first_request_at = time.time()
+
+        parts = urlsplit(self.path)
+        self.query = dict([(k, v[-1]) for k, v in parse_qs(parts.query).items()])
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.data = json.loads(body) if body else {}
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        for route_method, pattern, name in self.ROUTES:
+            matches = re.fullmatch(pattern, parts.path)
+            if route_method == method and matches:
+                kwargs = dict(
+                    [
+                        (k, unquote(v) if k == "name" else int(v))
+                        for k, v in matches.groupdict().items()
+                    ]
+                )
+
+                try:
+                    with self.state.lock:
+                        result = getattr(self, name)(**kwargs)
+                except NotFound:
+                    self.respond(404, {"message": "Not Found"})
+                except Invalid as exc:
+                    self.respond(
+                        422, {"message": "Validation Failed", "errors": [str(exc)]}
+                    )
+                else:
+                    if isinstance(result, tuple):
+                        self.respond(*result)
+                    else:
+                        self.respond(200, result)
+
+                return
+
+        self.respond(404, {"message": "Not Found"})
+
+    def log_message(self, *args):
+        if self.server.verbose:
+            super().log_message(*args)
+
+    def paginate(self, items):
+        """
+        Returns a page of items along with the Link header for the other pages
+        """
+        per_page = min(int(self.query.get("per_page", DEFAULT_PER_PAGE)), MAX_PER_PAGE)
+        page = int(self.query.get("page", 1))
+        last = max(1, math.ceil(len(items) / per_page))
+
+        def get_link(number, rel):
+            query = dict(self.query, page=number)
+            url = self.state.get_url(f"{urlsplit(self.path).path}?{urlencode(query)}")
+
+            return f'<{url}>; rel="{rel}"'
+
+        links = []
+        if page < last:
+            links.extend([get_link(page + 1, "next"), get_link(last, "last")])
+        if page > 1:
+            links.extend([get_link(1, "first"), get_link(page - 1, "prev")])
+
+        headers = {"Link": ", ".join(links)} if links else {}
+        start = (page - 1) * per_page
+
+        return 200, items[start : start + per_page], headers
+
+    def respond(self, status, data=None, headers=None):
+        content = b"" if data is None else json.dumps(data).encode("utf8")
+
+        etag = None
+        if status == 200 and self.command == "GET":
+            etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+            if self.headers.get("If-None-Match") == etag:
+                status = 304
+                content = b""
+
+        resource = "core"
+        if self.path.startswith("/search"):
+            resource = "search"
+        elif self.path.startswith("/graphql"):
+            resource = "graphql"
+
+        with self.state.lock:
+            remaining = self.server.rate_limit_remaining
+            if status != 304 and resource == "core":
+                remaining = max(0, remaining - 1)
+                self.server.rate_limit_remaining = remaining
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(self.server.rate_limit_reset))
+        self.send_header("X-RateLimit-Resource", resource)
+
+        if etag:
+            self.send_header("ETag", etag)
+
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+
+        self.end_headers()
+        self.wfile.write(content)
+
+    # projects
+
+    def create_project(self):
+        project_id = self.state.add_project(
+            self.data["name"], self.data.get("body", "")
+        )
+
+        return 201, self.state.render_project(project_id)
+
+    def get_project(self, id):
+        if id not in self.state.projects:
+            raise NotFound()
+
+        return self.state.render_project(id)
+
+    def get_projects(self):
+        state = self.query.get("state", "open")
+
+        projects = [
+            self.state.render_project(x)
+            for x, project in self.state.projects.items()
+            if state == "all" or project["state"] == state
+        ]
+
+        return self.paginate(projects)
+
+    def update_project(self, id):
+        if id not in self.state.projects:
+            raise NotFound()
+
+        for key in ("name", "body", "state"):
+            if key in self.data:
+                self.state.projects[id][key] = self.data[key]
+
+        return self.state.render_project(id)
+
+    # columns
+
+    def create_column(self, id):
+        column_id = self.state.add_column(id, self.data["name"])
+
+        return 201, self.state.render_column(column_id)
+
+    def delete_column(self, id):
+        self.state.delete_column(id)
+
+        return 204, None
+
+    def get_column(self, id):
+        if id not in self.state.columns:
+            raise NotFound()
+
+        return self.state.render_column(id)
+
+    def get_columns(self, id):
+        if id not in self.state.projects:
+            raise NotFound()
+
+        return self.paginate(
+            [self.state.render_column(x) for x in self.state.project_columns[id]]
+        )
+
+    def move_column(self, id):
+        self.state.move_column(id, self.data.get("position", ""))
+
+        return 201, {}
+
+    def update_column(self, id):
+        if id not in self.state.columns:
+            raise NotFound()
+
+        self.state.columns[id]["name"] = self.data.get(
+            "name", self.state.columns[id]["name"]
+        )
+
+        return self.state.render_column(id)
+
+    # cards
+
+    def create_card(self, id):
+        issue_id = None
+        if self.data.get("content_id"):
+            content_type = self.data.get("content_type", "Issue")
+
+            try:
+                issue = self.state.get_issue_by_id(
+                    self.data["content_id"], content_type
+                )
+            except NotFound:
+                raise Invalid(
+                    f"unable to find {content_type} content_id {self.data['content_id']}"
+                )
+
+            issue_id = issue["id"]
+
+            for card in self.state.cards.values():
+                if (
+                    card["issue_id"] == issue_id
+                    and self.state.columns[card["column_id"]]["project_id"]
+                    == self.state.columns[id]["project_id"]
+                ):
+                    raise Invalid("Project already has the associated issue")
+
+        card_id = self.state.add_card(id, issue_id=issue_id, note=self.data.get("note"))
+
+        return 201, self.state.render_card(card_id)
+
+    def delete_card(self, id):
+        self.state.delete_card(id)
+
+        return 204, None
+
+    def get_card(self, id):
+        if id not in self.state.cards:
+            raise NotFound()
+
+        return self.state.render_card(id)
+
+    def get_cards(self, id):
+        if id not in self.state.columns:
+            raise NotFound()
+
+        return self.paginate(
+            [self.state.render_card(x) for x in self.state.column_cards[id]]
+        )
+
+    def move_card(self, id):
+        self.state.move_card(
+            id, self.data.get("position", ""), column_id=self.data.get("column_id")
+        )
+
+        return 201, {}
+
+    def update_card(self, id):
+        if id not in self.state.cards:
+            raise NotFound()
+
+        if "note" in self.data:
+            self.state.cards[id]["note"] = self.data["note"]
+
+        return self.state.render_card(id)
+
+    # issues
+
+    def add_issue_labels(self, number):
+        labels = (
+            self.data.get("labels", []) if isinstance(self.data, dict) else self.data
+        )
+
+        issue = self.state.issues.get(number)
+        if issue is None:
+            raise NotFound()
+
+        names = issue["labels"] + [x for x in labels if x not in issue["labels"]]
+        self.state.update_issue(number, labels=names)
+
+        return self.get_issue_labels(number)
+
+    def comment(self, number):
+        if number not in self.state.issues:
+            raise NotFound()
+
+        comment = {"id": self.state.get_id(), "body": self.data.get("body", "")}
+        self.state.comments.append(dict(comment, number=number))
+
+        return 201, comment
+
+    def create_issue(self):
+        if not self.data.get("title"):
+            raise Invalid("title is required")
+
+        number = self.state.add_issue(
+            self.data["title"],
+            body=self.data.get("body") or "",
+            labels=self.data.get("labels"),
+            assignees=self.data.get("assignees"),
+            milestone=self.data.get("milestone"),
+        )
+
+        return 201, self.state.render_issue(number)
+
+    def get_issue(self, number):
+        if number not in self.state.issues:
+            raise NotFound()
+
+        return self.state.render_issue(number)
+
+    def get_issue_labels(self, number):
+        issue = self.state.issues.get(number)
+        if issue is None:
+            raise NotFound()
+
+        return [self.state.render_label(x) for x in issue["labels"]]
+
+    def get_issues(self):
+        state = self.query.get("state", "open")
+        since = self.query.get("since")
+        labels = [x for x in self.query.get("labels", "").split(",") if x]
+        milestone = self.query.get("milestone")
+
+        numbers = []
+        for number, issue in self.state.issues.items():
+            if state != "all" and issue["state"] != state:
+                continue
+
+            if since and issue["updated_at"] < since:
+                continue
+
+            if any(x not in issue["labels"] for x in labels):
+                continue
+
+            if milestone and str(issue["milestone"]) != milestone:
+                continue
+
+            numbers.append(number)
+
+        # newest first, as the API does by default
+        numbers.reverse()
+
+        return self.paginate([self.state.render_issue(x) for x in numbers])
+
+    def remove_issue_label(self, number, name):
+        issue = self.state.issues.get(number)
+        if issue is None or name not in issue["labels"]:
+            raise NotFound()
+
+        self.state.update_issue(
+            number, labels=[x for x in issue["labels"] if x != name]
+        )
+
+        return self.get_issue_labels(number)
+
+    def set_issue_labels(self, number):
+        labels = (
+            self.data.get("labels", []) if isinstance(self.data, dict) else self.data
+        )
+
+        self.state.update_issue(number, labels=list(labels))
+
+        return self.get_issue_labels(number)
+
+    def update_issue(self, number):
+        self.state.update_issue(number, **self.data)
+
+        return self.state.render_issue(number)
+
+    # labels and milestones
+
+    def create_label(self):
+        self.state.add_label(self.data["name"], self.data.get("color", "ededed"))
+
+        return 201, self.state.render_label(self.data["name"])
+
+    def get_labels(self):
+        return self.paginate([self.state.render_label(x) for x in self.state.labels])
+
+    def get_milestones(self):
+        state = self.query.get("state", "open")
+
+        return self.paginate(
+            [
+                self.state.render_milestone(x)
+                for x, milestone in self.state.milestones.items()
+                if state == "all" or milestone["state"] == state
+            ]
+        )
+
+    # search and graphql
+
+    def graphql(self):
+        return GraphQL(self.state).execute(
+            self.data.get("query", ""), self.data.get("variables") or {}
+        )
+
+    def search(self):
+        numbers = self.state.search(self.query.get("q", ""))
+        items = [self.state.render_issue(x) for x in numbers]
+
+        status, page, headers = self.paginate(items)
+
+        return (
+            status,
+            {"total_count": len(items), "incomplete_results": False, "items": page},
+            headers,
+        )
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    Serves the stand-in API on the given address
+
+    Args:
+        address (tuple): the host and port to listen on; port 0 picks a free port
+        fixture (dict): the data to serve, see `get_fixture`
+        latency (float): seconds to wait before answering each request
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, address=("127.0.0.1", 0), fixture=None, latency=0, verbose=False
+    ):
+        super().__init__(address, RequestHandler)
+
+        self.latency = latency
+        self.verbose = verbose
+
+        # wall clock time of the first request, used to measure client startup
+        self.first_request_at = None
+
+        self.rate_limit_remaining = RATE_LIMIT
+        self.rate_limit_reset = int(time.time()) + 3600
+
+        self.state = State(self.base_url)
+        if fixture:
+            self.state.load(fixture)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serves requests from a background thread
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,50 @@
+"""
+A small JSON file of values kept between runs, such as incremental watermarks
+"""
+import json
+import os
+import threading
+
+ISSUEBRANCH_STATE_PATH = os.environ.get(
+    "ISSUEBRANCH_STATE_PATH", "~/.cache/issuebranch/state.json"
+)
+
+
+class StateFile(object):
+    """
+    Keys and JSON values stored in a file
+
+    Every `set()` rewrites the file atomically so that an interrupted command
+    never leaves it half written.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.expanduser(path or ISSUEBRANCH_STATE_PATH)
+
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self.load().get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            data = self.load()
+            data[key] = value
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as fh:
+                json.dump(data, fh, indent=4, sort_keys=True)
+
+            os.replace(temp_path, self.path)
@@ -0,0 +1,254 @@
+"""
+Instrumentation for the requests made to the issue backends
+"""
+import json
+import math
+import re
+import threading
+import time
+
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# path segments that identify a single object rather than an endpoint
+ID_RE = re.compile(r"^\d+(?P<ext>\.\w+)?$")
+KEY_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_]*-\d+$")
+
+# path prefixes whose next segments name an owner and repo rather than an endpoint
+OWNER_PREFIXES = {
+    "orgs": ("{owner}",),
+    "repos": ("{owner}", "{repo}"),
+    "users": ("{owner}",),
+}
+
+
+def get_endpoint(url):
+    """
+    Returns the endpoint template for the given url
+
+    For example, `https://api.github.com/repos/rca/issuebranch/issues/12` becomes
+    `/repos/{owner}/{repo}/issues/{id}`.
+    """
+    segments = urlparse(url).path.split("/")
+
+    endpoint = []
+    placeholders = ()
+    for segment in segments:
+        if placeholders and segment:
+            endpoint.append(placeholders[0])
+            placeholders = placeholders[1:]
+
+            continue
+
+        matches = ID_RE.match(segment)
+        if matches:
+            segment = "{id}" + (matches.group("ext") or "")
+        elif KEY_RE.match(segment):
+            segment = "{key}"
+        elif len(endpoint) == 1:
+            placeholders = OWNER_PREFIXES.get(segment, ())
+
+        endpoint.append(segment)
+
+    return "/".join(endpoint) or "/"
+
+
+def get_percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of the given values
+    """
+    if not values:
+        return None
+
+    values = sorted(values)
+    rank = math.ceil(percent / 100.0 * len(values))
+
+    return values[max(0, rank - 1)]
+
+
+class RequestStats(object):
+    """
+    Records the requests made by a command along with response cache hits and misses
+
+    Sessions are instrumented with `install()`; each response is recorded with
+    its method, endpoint template, status, size, latency and whether it was
+    revalidated from the ETag cache.
+
+    Args:
+        enabled (bool): whether requests are recorded; long running processes
+            leave this off so the recorded requests do not grow without bound
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+
+        self.requests = []
+        self.cache = OrderedDict()
+
+        self.started = time.time()
+
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.requests = []
+            self.cache = OrderedDict()
+
+            self.started = time.time()
+
+    def install(self, session):
+        """
+        Records the responses received by the given requests session
+        """
+        session.hooks["response"].append(self.on_response)
+
+        return session
+
+    def on_response(self, response, *args, **kwargs):
+        """
+        requests response hook
+        """
+        if not self.enabled:
+            return
+
+        # the hook runs before the body is read, so time reading it as well
+        start = time.perf_counter()
+        size = len(response.content or b"")
+        elapsed = response.elapsed.total_seconds() + time.perf_counter() - start
+
+        cache = None
+        if response.request.method == "GET":
+            cache = "revalidated" if response.status_code == 304 else "miss"
+
+        self.record(
+            response.request.method,
+            response.request.url,
+            response.status_code,
+            size,
+            elapsed,
+            cache=cache,
+        )
+
+    def record(self, method, url, status, size, elapsed, cache=None):
+        """
+        Records a single request
+
+        Args:
+            method (str): the HTTP method
+            url (str): the full url requested
+            status (int): the response status code
+            size (int): the number of bytes in the response body
+            elapsed (float): the number of seconds the request took
+            cache (str): miss or revalidated for GET requests
+        """
+        if not self.enabled:
+            return
+
+        entry = {
+            "method": method.upper(),
+            "endpoint": get_endpoint(url),
+            "status": status,
+            "bytes": size,
+            "elapsed": elapsed,
+            "cache": cache,
+        }
+
+        with self._lock:
+            self.requests.append(entry)
+
+    def add_requests(self, entries):
+        """
+        Records requests made on this process' behalf, e.g. by the daemon
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.requests.extend(entries)
+
+    def record_cache(self, kind, hit):
+        """
+        Records a lookup in the in-memory response cache
+        """
+        with self._lock:
+            counts = self.cache.setdefault(kind, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def get_summary(self):
+        """
+        Returns the recorded requests summarized per endpoint
+        """
+        with self._lock:
+            requests = list(self.requests)
+            cache = json.loads(json.dumps(self.cache))
+
+        endpoints = OrderedDict()
+        for entry in requests:
+            key = f"{entry['method']} {entry['endpoint']}"
+            endpoints.setdefault(key, []).append(entry)
+
+        summary = {
+            "elapsed": time.time() - self.started,
+            "requests": len(requests),
+            "bytes": sum([x["bytes"] for x in requests]),
+            "cache": cache,
+            "endpoints": [],
+        }
+
+        for key, entries in endpoints.items():
+            latencies = [x["elapsed"] for x in entries]
+
+            summary["endpoints"].append(
+                {
+                    "endpoint": key,
+                    "requests": len(entries),
+                    "errors": len([x for x in entries if x["status"] >= 400]),
+                    "revalidated": len(
+                        [x for x in entries if x["cache"] == "revalidated"]
+                    ),
+                    "bytes": sum([x["bytes"] for x in entries]),
+                    "p50": get_percentile(latencies, 50),
+                    "p95": get_percentile(latencies, 95),
+                    "total": sum(latencies),
+                }
+            )
+
+        # the endpoints that took the most time first
+        summary["endpoints"].sort(key=lambda x: x["total"], reverse=True)
+
+        return summary
+
+    def report(self):
+        """
+        Returns a printable table of the summary
+        """
+        summary = self.get_summary()
+
+        lines = [
+            f"{'requests':>8} {'errors':>6} {'304s':>5} {'bytes':>10} "
+            f"{'p50 ms':>8} {'p95 ms':>8}  endpoint"
+        ]
+
+        for endpoint in summary["endpoints"]:
+            lines.append(
+                f"{endpoint['requests']:>8} {endpoint['errors']:>6} "
+                f"{endpoint['revalidated']:>5} {endpoint['bytes']:>10} "
+                f"{endpoint['p50'] * 1000:>8.1f} {endpoint['p95'] * 1000:>8.1f}  "
+                f"{endpoint['endpoint']}"
+            )
+
+        lines.append(
+            f"{summary['requests']} requests, {summary['bytes']} bytes "
+            f"in {summary['elapsed']:.2f}s"
+        )
+
+        for kind, counts in summary["cache"].items():
+            lines.append(
+                f"cache {kind}: {counts['hits']} hits, {counts['misses']} misses"
+            )
+
+        return "\n".join(lines)
+
+
+# turned on by --stats, --stats-json and the daemon
+STATS = RequestStats(enabled=False)
@@ -0,0 +1,249 @@
+"""
+Record and replay HTTP traffic to cassette files
+
+Set ISSUEBRANCH_CASSETTE to the path of a cassette file and
+ISSUEBRANCH_CASSETTE_MODE to `record` to save the traffic of a command, or to
+`replay` (the default) to serve the same requests from the file without touching
+the network.
+"""
+import atexit
+import base64
+import json
+import os
+import threading
+
+from collections import OrderedDict, deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+ISSUEBRANCH_CASSETTE = os.environ.get("ISSUEBRANCH_CASSETTE")
+ISSUEBRANCH_CASSETTE_MODE = os.environ.get("ISSUEBRANCH_CASSETTE_MODE", "replay")
+
+MODES = ("record", "replay")
+
+# request headers that make a GET conditional; recordings are made without them
+# so that a replay does not depend on the state of the on-disk ETag cache
+CONDITIONAL_HEADERS = ("If-Modified-Since", "If-None-Match")
+
+# response headers that are not worth keeping in a cassette
+SKIP_HEADERS = ("Connection", "Content-Encoding", "Content-Length", "Date", "Server")
+
+
+class CassetteError(ConnectionError):
+    """
+    Raised when a request being replayed is not in the cassette
+    """
+
+    pass
+
+
+def get_request_key(request):
+    """
+    Returns the key a request is recorded and replayed under
+
+    Query parameters are sorted and JSON bodies are normalized so that the same
+    request always has the same key.
+    """
+    parts = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit(parts._replace(query=query))
+
+    body = request.body or ""
+    if isinstance(body, bytes):
+        body = body.decode("utf8", "replace")
+
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            pass
+
+    return f"{request.method.upper()} {url} {body}".rstrip()
+
+
+class Cassette(object):
+    """
+    A file of recorded requests and responses
+
+    Each request is keyed by its method, url and body.  Responses to the same
+    request are replayed in the order they were recorded; once they run out the
+    last one is repeated.
+    """
+
+    def __init__(self, path, mode="replay"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode}")
+
+        self.path = os.path.expanduser(path)
+        self.mode = mode
+
+        self.interactions = OrderedDict()
+
+        self._lock = threading.Lock()
+        self._played = {}
+
+        if mode == "replay":
+            self.load()
+
+    def load(self):
+        with open(self.path, "r") as fh:
+            data = json.load(fh)
+
+        for interaction in data["interactions"]:
+            self.interactions.setdefault(interaction["request"], []).append(
+                interaction["response"]
+            )
+
+    def play(self, request):
+        """
+        Returns the recorded response for the request
+
+        Raises:
+            CassetteError when the request was not recorded
+        """
+        key = get_request_key(request)
+
+        with self._lock:
+            responses = self.interactions.get(key)
+            if not responses:
+                raise CassetteError(f"{key} is not in the cassette {self.path}")
+
+            queue = self._played.setdefault(key, deque(responses))
+
+            data = queue.popleft() if len(queue) > 1 else queue[0]
+
+        return data
+
+    def record(self, request, response):
+        headers = dict(
+            [(k, v) for k, v in response.headers.items() if k not in SKIP_HEADERS]
+        )
+
+        content = response.content or b""
+        try:
+            body = content.decode("utf8")
+            encoding = "utf8"
+        except UnicodeDecodeError:
+            body = base64.b64encode(content).decode("ascii")
+            encoding = "base64"
+
+        data = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": headers,
+            "body": body,
+            "encoding": encoding,
+        }
+
+        with self._lock:
+            self.interactions.setdefault(get_request_key(request), []).append(data)
+
+    def save(self):
+        """
+        Writes the recorded interactions to the cassette file
+        """
+        with self._lock:
+            interactions = [
+                {"request": key, "response": response}
+                for key, responses in self.interactions.items()
+                for response in responses
+            ]
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.path, "w") as fh:
+            json.dump({"interactions": interactions}, fh, indent=1)
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    A requests transport adapter that records to or replays from a cassette
+    """
+
+    def __init__(self, cassette):
+        super().__init__()
+
+        self.cassette = cassette
+
+        self._adapter = HTTPAdapter() if cassette.mode == "record" else None
+
+    def build_response(self, request, data, status=None):
+        response = Response()
+        response.status_code = status or data["status"]
+        response.reason = data["reason"]
+        response.headers = CaseInsensitiveDict(data["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+
+        if status == 304:
+            response._content = b""
+        elif data["encoding"] == "base64":
+            response._content = base64.b64decode(data["body"])
+        else:
+            response._content = data["body"].encode("utf8")
+
+        return response
+
+    def close(self):
+        if self._adapter:
+            self._adapter.close()
+
+    def send(self, request, **kwargs):
+        # recordings hold full responses; conditional requests are answered here
+        conditional = dict(
+            [
+                (x, request.headers.pop(x))
+                for x in CONDITIONAL_HEADERS
+                if x in request.headers
+            ]
+        )
+
+        if self._adapter:
+            response = self._adapter.send(request, **kwargs)
+            self.cassette.record(request, response)
+
+            data = self.cassette.interactions[get_request_key(request)][-1]
+        else:
+            data = self.cassette.play(request)
+
+        status = None
+        etag = data["headers"].get("ETag")
+        if etag and conditional.get("If-None-Match") == etag:
+            status = 304
+
+        return self.build_response(request, data, status=status)
+
+
+CASSETTE = None
+if ISSUEBRANCH_CASSETTE:
+    CASSETTE = Cassette(ISSUEBRANCH_CASSETTE, mode=ISSUEBRANCH_CASSETTE_MODE)
+
+    if CASSETTE.mode == "record":
+        atexit.register(CASSETTE.save)
+
+
+def install(session, cassette=None):
+    """
+    Routes the session's requests through the cassette, when one is configured
+
+    Args:
+        session (requests.Session): the session to install the transport on
+        cassette (Cassette): the cassette to use; CASSETTE by default
+    """
+    cassette = cassette or CASSETTE
+    if cassette is not None:
+        adapter = CassetteAdapter(cassette)
+
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    return session
@@ -1,6 +1,6 @@
+import argparse
 import re
-
-from issuebranch.backends.github import GithubSession
+import sys
 
 
 LABEL_RE = re.compile(r"[^0-9a-z ]", flags=re.IGNORECASE)
@@ -61,6 +61,8 @@ def label_milestone_issues():
     """
     Labels all issues in a milestone with that milestone's respective label
     """
+    from issuebranch.backends.github import GithubSession
+
     session = GithubSession()
 
     labels = list(session.get_labels())
@@ -68,11 +70,16 @@ def label_milestone_issues():
 
     milestones = list(session.get_milestones())
 
+    labels_by_issue = {}
+    current = {}
     for milestone in milestones:
         label_data = labels_by_name[f'epic:{milestone["title"].strip()}']
 
         for issue in session.get_issues(milestone=milestone["number"], state="all"):
-            session.add_label(label_data, number=issue["number"])
+            labels_by_issue.setdefault(issue["number"], []).append(label_data["name"])
+            current[issue["number"]] = [x["name"] for x in issue["labels"]]
+
+    session.add_labels(labels_by_issue, current=current)
 
 
 def milestone_labels(argv=None):
@@ -87,6 +94,8 @@ def milestone_labels(argv=None):
 
     args = parser.parse_args(argv)
 
+    from issuebranch.backends.github import GithubSession
+
     session = GithubSession()
 
     labels = session.get_labels()
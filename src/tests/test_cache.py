@@ -0,0 +1,62 @@
+from unittest import TestCase, mock
+
+from issuebranch.cache import TTLCache, get_cache_key
+
+
+class TTLCacheTestCase(TestCase):
+    def test_evicts_least_recently_used(self, *mocks):
+        """
+        Ensures the cache does not grow past maxsize
+        """
+        cache = TTLCache(maxsize=2)
+
+        cache.set(("a", 1), "one")
+        cache.set(("a", 2), "two")
+        cache.get(("a", 1))
+        cache.set(("a", 3), "three")
+
+        self.assertIn(("a", 1), cache)
+        self.assertNotIn(("a", 2), cache)
+        self.assertIn(("a", 3), cache)
+
+    @mock.patch("issuebranch.cache.time")
+    def test_expires(self, *mocks):
+        """
+        Ensures entries are dropped once their ttl passes
+        """
+        time_mock = mocks[0]
+        time_mock.monotonic.return_value = 100
+
+        cache = TTLCache(ttl=10)
+        cache.set(("a", 1), "one")
+
+        time_mock.monotonic.return_value = 111
+
+        with self.assertRaises(KeyError):
+            cache.get(("a", 1))
+
+    def test_invalidate_kind(self, *mocks):
+        """
+        Ensures all entries of a kind are removed
+        """
+        cache = TTLCache()
+
+        cache.set(("cards", 1), [])
+        cache.set(("cards", 2), [])
+        cache.set(("columns", 1), [])
+
+        cache.invalidate("cards")
+
+        self.assertEqual(1, len(cache))
+        self.assertIn(("columns", 1), cache)
+
+    def test_get_cache_key(self, *mocks):
+        """
+        Ensures API data is keyed by url
+        """
+        self.assertEqual(
+            "https://api.github.com/projects/1",
+            get_cache_key({"url": "https://api.github.com/projects/1", "id": 1}),
+        )
+        self.assertEqual(1, get_cache_key({"id": 1}))
+        self.assertEqual("backlog", get_cache_key("backlog"))
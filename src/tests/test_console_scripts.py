@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+from unittest import TestCase
+
+from issuebranch.console_scripts import get_stats_options
+
+
+class GetStatsOptionsTestCase(TestCase):
+    def test_strips_options(self, *mocks):
+        """
+        Ensures the global options are removed wherever they appear
+        """
+        argv, options = get_stats_options(
+            ["projects", "--stats", "board", "count", "--stats-json", "stats.jsonl"]
+        )
+
+        self.assertEqual(["projects", "board", "count"], argv)
+        self.assertEqual(True, options.stats)
+        self.assertEqual("stats.jsonl", options.stats_json)
+
+    def test_no_options(self, *mocks):
+        argv, options = get_stats_options(["issue-closed", "--search", "board"])
+
+        self.assertEqual(["issue-closed", "--search", "board"], argv)
+        self.assertEqual(False, options.stats)
+        self.assertEqual(None, options.stats_json)
+
+
+class StartupTestCase(TestCase):
+    def run_python(self, code, **env):
+        environ = dict(os.environ)
+        for key in ("ISSUE_BACKEND_API_KEY", "ISSUE_BACKEND_URL"):
+            environ.pop(key, None)
+        environ.update(env)
+
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            env=environ,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+    def test_lazy_imports(self, *mocks):
+        """
+        Ensures importing the console scripts does not import heavy dependencies
+        """
+        process = self.run_python(
+            "import json, sys; import issuebranch.console_scripts; "
+            "print(json.dumps(sorted(sys.modules)))"
+        )
+
+        self.assertEqual("", process.stderr)
+
+        modules = json.loads(process.stdout)
+        for name in ("requests", "sh", "slugify", "sqlite3", "yaml"):
+            self.assertNotIn(name, modules)
+
+    def test_backends_import_without_settings(self, *mocks):
+        """
+        Ensures backends only require their settings when they are used
+        """
+        process = self.run_python(
+            "import issuebranch.backends.jira, issuebranch.backends.redmine"
+        )
+
+        self.assertEqual("", process.stderr)
+        self.assertEqual(0, process.returncode)
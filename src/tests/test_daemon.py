@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+
+from unittest import TestCase, mock
+
+from issuebranch import daemon, standin
+from issuebranch.backends import github
+from issuebranch.backends.github import RESPONSE_CACHE, GithubSession
+from issuebranch.stats import STATS
+
+
+class DaemonTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        fixture = standin.get_fixture(columns=3, cards=20)
+        self.server = standin.StandinServer(fixture=fixture).start()
+        self.addCleanup(self.server.stop)
+
+        for name, value in (
+            ("ISSUE_BACKEND_URL", self.server.base_url),
+            ("ISSUE_BACKEND_USER", self.server.state.owner),
+            ("ISSUE_BACKEND_REPO", self.server.state.repo),
+            ("HTTP_CACHE", None),
+        ):
+            patcher = mock.patch.object(github, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.dict(daemon.CLIENTS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        self.path = os.path.join(tempdir.name, "daemon.sock")
+
+    def start(self, **kwargs):
+        server = daemon.Daemon(self.path, **kwargs)
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+
+        self.addCleanup(stop)
+
+        return server
+
+    def test_forwards_calls(self, *mocks):
+        self.start()
+
+        client = daemon.get_client(self.path)
+        issue = daemon.ForwardedBackend(client, 1)
+
+        self.assertEqual(self.server.state.issues[1]["title"], issue.subject)
+        self.assertTrue(hasattr(issue, "move_card"))
+        self.assertFalse(hasattr(issue, "not_a_method"))
+
+        project = issue.get_project("board 1")
+        columns = issue.get_columns(project)
+        card = issue.get_card(project, issue.issue)
+
+        issue.move_card(card, columns[-1], position="bottom")
+
+        card, column = GithubSession().get_card_index(project).get(issue.issue["url"])
+        self.assertEqual(columns[-1]["id"], column["id"])
+
+    def test_forwards_stats(self, *mocks):
+        """
+        Ensures the requests the daemon makes are counted for the command
+        """
+        self.start()
+
+        issue = daemon.ForwardedBackend(daemon.get_client(self.path), 1)
+
+        with mock.patch.object(STATS, "add_requests") as add_requests:
+            issue.issue
+
+        endpoints = [x["endpoint"] for x in add_requests.call_args[0][0]]
+        self.assertEqual(["/repos/{owner}/{repo}/issues/{id}"], endpoints)
+
+    def test_forwards_errors(self, *mocks):
+        self.start()
+
+        issue = daemon.ForwardedBackend(daemon.get_client(self.path), 1)
+        project = issue.get_project("board 1")
+
+        with self.assertRaises(issue.CardError):
+            issue.get_card(project, {"url": "issues/0"})
+
+    def test_settings_mismatch(self, *mocks):
+        """
+        Ensures commands configured for another repo do not use the daemon
+        """
+        self.start(config="another repo")
+
+        self.assertEqual(None, daemon.get_client(self.path))
+
+    def test_not_running(self, *mocks):
+        self.assertEqual(None, daemon.get_client(self.path))
+        self.assertEqual(False, daemon.stop(self.path))
+
+    def test_stale_socket(self, *mocks):
+        """
+        Ensures a socket left behind by a daemon that died is replaced
+        """
+        with open(self.path, "w"):
+            pass
+
+        self.start()
+
+        self.assertNotEqual(None, daemon.get_client(self.path))
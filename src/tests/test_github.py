@@ -1,7 +1,22 @@
-from unittest import TestCase
+import json
+import tempfile
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import TestCase, mock
 from unittest.mock import Mock
 
-from issuebranch.backends.github import GithubLinkHeader
+import requests
+
+from issuebranch.cache import HTTPCache
+from issuebranch.backends.github import (
+    RESPONSE_CACHE,
+    GithubLinkHeader,
+    GithubSession,
+    get_longest_increasing,
+    get_page_urls,
+    plan_moves,
+)
 
 LINK_HEADER = (
     '<https://api.github.com/projects/columns/1255924/cards?page=2>; rel="next", '
@@ -23,3 +38,499 @@ class GithubLinkHeaderTestCase(TestCase):
             "https://api.github.com/projects/columns/1255924/cards?page=2", link.url
         )
         self.assertEqual("next", link.rel)
+
+
+class GithubSessionCacheTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+    def tearDown(self):
+        RESPONSE_CACHE.clear()
+
+    @mock.patch("issuebranch.backends.github.GithubSession.get_paginated")
+    def test_columns_shared_between_sessions(self, *mocks):
+        """
+        Ensures columns fetched by one session are reused by another
+        """
+        get_paginated_mock = mocks[0]
+        get_paginated_mock.return_value = [Mock(**{"json.return_value": [{"id": 1}]})]
+
+        project = {"url": "https://api.github.com/projects/1", "columns_url": "x"}
+
+        GithubSession().get_columns(project)
+        columns = GithubSession().get_columns(project)
+
+        self.assertEqual([{"id": 1}], columns)
+        self.assertEqual(1, get_paginated_mock.call_count)
+
+    @mock.patch("issuebranch.backends.github.GithubSession.request")
+    @mock.patch("issuebranch.backends.github.GithubSession.get_paginated")
+    def test_card_write_invalidates_cards(self, *mocks):
+        """
+        Ensures cards are fetched again after a card is created
+        """
+        get_paginated_mock = mocks[0]
+        get_paginated_mock.return_value = [Mock(**{"json.return_value": []})]
+
+        column = {"id": 1, "url": "https://api.github.com/projects/columns/1"}
+        column["cards_url"] = column["url"] + "/cards"
+
+        session = GithubSession()
+        session.get_cards(column)
+        session.create_card(column, {"id": 2})
+        session.get_cards(column)
+
+        self.assertEqual(2, get_paginated_mock.call_count)
+
+
+class GithubSessionConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+        patcher = mock.patch(
+            "issuebranch.backends.github.HTTP_CACHE", HTTPCache(self.tmpdir.name)
+        )
+        patcher.start()
+
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    @mock.patch("issuebranch.backends.github.GithubSession.request")
+    def test_not_modified_returns_cached_page(self, *mocks):
+        """
+        Ensures a 304 response is replaced by the stored page
+        """
+        request_mock = mocks[0]
+
+        url = "https://api.github.com/projects/columns/1/cards"
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["ETag"] = 'W/"abc"'
+        response.headers["Link"] = LINK_HEADER
+        response._content = b'[{"id": 1}]'
+
+        not_modified = requests.Response()
+        not_modified.status_code = 304
+
+        request_mock.side_effect = [response, not_modified]
+
+        session = GithubSession()
+        session.conditional_get(url)
+        cached_response = session.conditional_get(url)
+
+        request_mock.assert_called_with(
+            "get", url, headers={"If-None-Match": 'W/"abc"'}
+        )
+
+        self.assertEqual(200, cached_response.status_code)
+        self.assertEqual([{"id": 1}], cached_response.json())
+        self.assertEqual(LINK_HEADER, cached_response.headers["link"])
+
+
+class GithubSessionRequestTestCase(TestCase):
+    @mock.patch("issuebranch.backends.github.RATE_LIMITER")
+    @mock.patch(
+        "issuebranch.backends.github.GithubSession.session",
+        new_callable=mock.PropertyMock,
+    )
+    def test_rate_limited_request_is_retried(self, *mocks):
+        """
+        Ensures a rate limited request is retried instead of failing
+        """
+        session_mock, rate_limiter_mock = mocks
+
+        rate_limiter_mock.max_retries = 5
+        rate_limiter_mock.get_retry_delay.side_effect = [3, None]
+
+        response = GithubSession().request("get", "https://api.github.com/x")
+
+        self.assertEqual(2, session_mock.return_value.get.call_count)
+        rate_limiter_mock.sleep.assert_called_with(3)
+        self.assertEqual(session_mock.return_value.get.return_value, response)
+
+
+class GithubSessionMapTestCase(TestCase):
+    @mock.patch("issuebranch.backends.github.GithubSession.get_issue")
+    def test_get_issues_by_number_keeps_order(self, *mocks):
+        """
+        Ensures concurrently fetched issues are returned in the order requested
+        """
+        get_issue_mock = mocks[0]
+        get_issue_mock.side_effect = lambda number: {"number": number}
+
+        numbers = list(range(50))
+        issues = GithubSession().get_issues_by_number(numbers)
+
+        self.assertEqual(numbers, [x["number"] for x in issues])
+
+
+def get_graphql_card(card_id, number=None, state="OPEN", typename="Issue"):
+    content = None
+    if number:
+        content = {
+            "__typename": typename,
+            "databaseId": number * 10,
+            "number": number,
+            "state": state,
+            "title": f"issue {number}",
+            "repository": {"nameWithOwner": "org/repo"},
+            "labels": {"nodes": [{"name": "points:1"}]},
+            "assignees": {"nodes": []},
+            "milestone": None,
+        }
+
+    return {
+        "databaseId": card_id,
+        "note": None if number else "a note",
+        "content": content,
+    }
+
+
+def get_graphql_page(nodes, cursor=None):
+    return {
+        "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+        "nodes": nodes,
+    }
+
+
+class GraphQLRequestHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for GitHub's GraphQL endpoint, serving a two column board whose
+    columns and second column's cards span two pages
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        variables = body["variables"]
+
+        if "projectId" in variables:
+            if variables["after"] is None:
+                column = {
+                    "id": "col1",
+                    "databaseId": 1,
+                    "name": "To Do",
+                    "cards": get_graphql_page(
+                        [get_graphql_card(11, 1), get_graphql_card(12)]
+                    ),
+                }
+                node = {"columns": get_graphql_page([column], "columns-1")}
+            else:
+                column = {
+                    "id": "col2",
+                    "databaseId": 2,
+                    "name": "Done",
+                    "cards": get_graphql_page(
+                        [get_graphql_card(21, 2, "CLOSED")], "cards-1"
+                    ),
+                }
+                node = {"columns": get_graphql_page([column])}
+        else:
+            card = get_graphql_card(22, 3, "MERGED", "PullRequest")
+            node = {"cards": get_graphql_page([card])}
+
+        content = json.dumps({"data": {"node": node}}).encode("utf8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadBoardTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        server = HTTPServer(("127.0.0.1", 0), GraphQLRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        patcher = mock.patch(
+            "issuebranch.backends.github.ISSUE_BACKEND_URL",
+            f"http://127.0.0.1:{server.server_port}",
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_board(self, *mocks):
+        """
+        Ensures every page of columns and cards is loaded
+        """
+        project = {"node_id": "project1", "url": "https://api.github.com/projects/1"}
+
+        columns = GithubSession().load_board(project)
+
+        self.assertEqual(["To Do", "Done"], [x["name"] for x in columns])
+        self.assertEqual(
+            [[11, 12], [21, 22]], [[y["id"] for y in x["cards"]] for x in columns]
+        )
+
+        card = columns[0]["cards"][0]
+        self.assertEqual(1, card["issue"]["number"])
+        self.assertEqual("open", card["issue"]["state"])
+        self.assertTrue(card["content_url"].endswith("/repos/org/repo/issues/1"))
+        self.assertEqual(columns[0]["url"], card["column_url"])
+
+        # notes do not have an issue
+        self.assertIsNone(columns[0]["cards"][1]["issue"])
+
+        self.assertEqual("closed", columns[1]["cards"][0]["issue"]["state"])
+
+        # merged pull requests are closed as far as the REST API is concerned
+        self.assertEqual("closed", columns[1]["cards"][1]["issue"]["state"])
+
+
+class GetProjectCardsTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+    @mock.patch("issuebranch.backends.github.GithubSession.graphql")
+    def test_skips_cards_without_column(self, *mocks):
+        """
+        Ensures cards awaiting triage, which are not in a column, are skipped
+        """
+        graphql_mock = mocks[0]
+
+        project = {"id": 1, "url": "https://api.github.com/projects/1"}
+        issues = [
+            {"node_id": "issue1", "url": "https://api.github.com/issues/1"},
+            {"node_id": "issue2", "url": "https://api.github.com/issues/2"},
+        ]
+
+        def get_card_node(card_id, column):
+            return {
+                "databaseId": card_id,
+                "note": None,
+                "project": {"databaseId": 1},
+                "column": column,
+            }
+
+        column = {"id": "col1", "databaseId": 1, "name": "To Do"}
+        graphql_mock.return_value = {
+            "nodes": [
+                {"projectCards": {"nodes": [get_card_node(11, column)]}},
+                {"projectCards": {"nodes": [get_card_node(21, None)]}},
+            ]
+        }
+
+        cards = GithubSession().get_project_cards(project, issues)
+
+        self.assertEqual([11], [card["id"] for card, _, _ in cards])
+        self.assertEqual("To Do", cards[0][1]["name"])
+
+
+class CardIndexTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        self.project = {"url": "https://api.github.com/projects/1"}
+        self.columns = [
+            {
+                "id": column_id,
+                "url": f"https://api.github.com/projects/columns/{column_id}",
+                "project_url": self.project["url"],
+            }
+            for column_id in (1, 2)
+        ]
+        self.cards = {
+            1: [{"id": 11, "content_url": "issues/1"}, {"id": 12, "note": "a note"}],
+            2: [{"id": 21, "content_url": "issues/2"}],
+        }
+
+        patcher = mock.patch.multiple(
+            "issuebranch.backends.github.GithubSession",
+            get_columns=mock.Mock(return_value=self.columns),
+            get_cards=mock.Mock(side_effect=lambda x: self.cards[x["id"]]),
+            request=mock.Mock(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_card_loads_board_once(self, *mocks):
+        """
+        Ensures looking up many issues loads the board a single time
+        """
+        session = GithubSession()
+
+        card = session.get_card(self.project, {"url": "issues/1"})
+        self.assertEqual(11, card["id"])
+
+        card = session.get_card(self.project, {"url": "issues/2"})
+        self.assertEqual(21, card["id"])
+
+        with self.assertRaises(GithubSession.CardError):
+            session.get_card(self.project, {"url": "issues/3"})
+
+        self.assertEqual(1, GithubSession.get_columns.call_count)
+        self.assertEqual(2, GithubSession.get_cards.call_count)
+
+    def test_move_card_updates_index(self, *mocks):
+        """
+        Ensures a moved card is found in its new column without reloading the board
+        """
+        session = GithubSession()
+
+        card = session.get_card(self.project, {"url": "issues/1"})
+        session.move_card(card, self.columns[1])
+
+        card, column = session.get_card_index(self.project).get("issues/1")
+
+        self.assertEqual(self.columns[1], column)
+        self.assertEqual(self.columns[1]["url"], card["column_url"])
+        self.assertEqual(1, GithubSession.get_columns.call_count)
+
+    def test_move_cards(self, *mocks):
+        """
+        Ensures batched moves into a column are made in order and indexed
+        """
+        session = GithubSession()
+
+        cards = self.cards[1]
+        session.get_card_index(self.project)
+
+        moves = [
+            (cards[0], self.columns[1], "bottom"),
+            (self.cards[2][0], self.columns[0], "top"),
+            (cards[1], self.columns[1], "bottom"),
+        ]
+
+        responses = session.move_cards(moves)
+
+        self.assertEqual(3, len(responses))
+
+        moved = [
+            x[0][1].rsplit("/", 2)[-2]
+            for x in GithubSession.request.call_args_list
+            if x[1]["json"]["column_id"] == 2
+        ]
+        self.assertEqual(["11", "12"], moved)
+
+        card, column = session.get_card_index(self.project).get("issues/1")
+        self.assertEqual(self.columns[1], column)
+
+    def test_delete_card_updates_index(self, *mocks):
+        """
+        Ensures a deleted card is removed from the index
+        """
+        session = GithubSession()
+
+        card = session.get_card(self.project, {"url": "issues/1"})
+        session.delete_card(card)
+
+        with self.assertRaises(GithubSession.CardError):
+            session.get_card(self.project, {"url": "issues/1"})
+
+
+class GetPaginatedTestCase(TestCase):
+    def _get_response(self, page, link_header=None):
+        response = Mock(**{"json.return_value": [page]})
+        response.headers = {"Link": link_header} if link_header else {}
+
+        return response
+
+    @mock.patch("issuebranch.backends.github.GithubSession.conditional_get")
+    def test_prefetches_to_last_page(self, *mocks):
+        """
+        Ensures every page up to the last link is fetched and yielded in order
+        """
+        conditional_get_mock = mocks[0]
+
+        url = "https://api.github.com/projects/columns/1255924/cards"
+
+        def get_page(page_url, **kwargs):
+            if page_url == url:
+                return self._get_response(1, LINK_HEADER)
+
+            return self._get_response(int(page_url.rsplit("=", 1)[-1]))
+
+        conditional_get_mock.side_effect = get_page
+
+        pages = [x.json()[0] for x in GithubSession().get_paginated(url)]
+
+        self.assertEqual([1, 2, 3, 4], pages)
+
+        conditional_get_mock.assert_any_call(url, params={"per_page": 100})
+        conditional_get_mock.assert_any_call(f"{url}?page=3")
+
+    @mock.patch("issuebranch.backends.github.GithubSession.conditional_get")
+    def test_follows_next_without_last(self, *mocks):
+        """
+        Ensures next links are followed when the last page is unknown
+        """
+        conditional_get_mock = mocks[0]
+        conditional_get_mock.side_effect = [
+            self._get_response(1, '<https://api.github.com/x?after=a>; rel="next"'),
+            self._get_response(2),
+        ]
+
+        pages = [x.json()[0] for x in GithubSession().get_paginated("x")]
+
+        self.assertEqual([1, 2], pages)
+
+    def test_get_page_urls(self, *mocks):
+        """
+        Ensures the urls between the next and last links are generated
+        """
+        urls = get_page_urls(
+            "https://api.github.com/x?per_page=100&page=2",
+            "https://api.github.com/x?per_page=100&page=4",
+        )
+
+        self.assertEqual(
+            [
+                "https://api.github.com/x?per_page=100&page=2",
+                "https://api.github.com/x?per_page=100&page=3",
+                "https://api.github.com/x?per_page=100&page=4",
+            ],
+            urls,
+        )
+
+
+class PlanMovesTestCase(TestCase):
+    def apply(self, order, moves):
+        order = list(order)
+
+        for item, position in moves:
+            order.remove(item)
+            if position == "top":
+                order.insert(0, item)
+            else:
+                order.insert(order.index(int(position.split(":")[1])) + 1, item)
+
+        return order
+
+    def test_get_longest_increasing(self, *mocks):
+        values = [3, 1, 4, 1, 5, 9, 2, 6]
+
+        self.assertEqual([1, 2, 4, 7], get_longest_increasing(values))
+        self.assertEqual([], get_longest_increasing([]))
+
+    def test_minimal_moves(self, *mocks):
+        """
+        Ensures only the cards outside the longest run in order are moved
+        """
+        current = [5, 1, 2, 9, 3, 4]
+        desired = [1, 2, 3, 4, 5]
+
+        moves = plan_moves(current, desired)
+
+        self.assertEqual([(5, "after:4")], moves)
+        self.assertEqual([1, 2, 9, 3, 4, 5], self.apply(current, moves))
+
+    def test_reversed(self, *mocks):
+        current = list(range(10))
+        desired = current[::-1]
+
+        moves = plan_moves(current, desired)
+
+        self.assertEqual(9, len(moves))
+        self.assertEqual(desired, self.apply(current, moves))
+
+    def test_in_order(self, *mocks):
+        self.assertEqual([], plan_moves([1, 2, 3], [1, 2, 3]))
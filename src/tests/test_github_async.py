@@ -0,0 +1,236 @@
+import asyncio
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock, skipIf
+from urllib.parse import parse_qs, urlparse
+
+from issuebranch import standin
+from issuebranch.backends import github
+from issuebranch.backends.github import RESPONSE_CACHE, GithubSession
+from issuebranch.ratelimit import RateLimiter
+
+from .test_github import GraphQLRequestHandler
+
+try:
+    from issuebranch.backends.github_async import AsyncGithubSession
+except ImportError:  # the async extra is not installed
+    AsyncGithubSession = None
+
+
+class CardsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves three pages of cards for column 1
+    """
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+
+        content = json.dumps([{"id": page}]).encode("utf8")
+
+        base_url = (
+            f"http://127.0.0.1:{self.server.server_port}/projects/columns/1/cards"
+        )
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-RateLimit-Remaining", str(5000 - page))
+        self.send_header("X-RateLimit-Reset", "9999999999")
+        if page == 1:
+            self.send_header(
+                "Link",
+                f'<{base_url}?per_page=100&page=2>; rel="next", '
+                f'<{base_url}?per_page=100&page=3>; rel="last"',
+            )
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@skipIf(AsyncGithubSession is None, "aiohttp is not installed")
+class AsyncGithubSessionTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CardsRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.base_url = f"http://127.0.0.1:{server.server_port}"
+        self.rate_limiter = RateLimiter()
+
+        for target, value in (
+            ("issuebranch.backends.github.ISSUE_BACKEND_URL", self.base_url),
+            ("issuebranch.backends.github.HTTP_CACHE", None),
+            ("issuebranch.backends.github_async.RATE_LIMITER", self.rate_limiter),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_get_cards(self, *mocks):
+        """
+        Ensures all the pages are fetched in order and counted by the rate limiter
+        """
+        column = {
+            "url": f"{self.base_url}/projects/columns/1",
+            "cards_url": f"{self.base_url}/projects/columns/1/cards",
+        }
+
+        async def get_cards():
+            async with AsyncGithubSession() as session:
+                return await session.get_cards(column)
+
+        cards = asyncio.run(get_cards())
+
+        self.assertEqual([{"id": 1}, {"id": 2}, {"id": 3}], cards)
+        self.assertEqual(3, self.rate_limiter.requests)
+        self.assertEqual(4997, self.rate_limiter.remaining)
+
+
+@skipIf(AsyncGithubSession is None, "aiohttp is not installed")
+class AsyncLoadBoardTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), GraphQLRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        patcher = mock.patch(
+            "issuebranch.backends.github.ISSUE_BACKEND_URL",
+            f"http://127.0.0.1:{server.server_port}",
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_board(self, *mocks):
+        """
+        Ensures the board is shaped the same way GithubSession.load_board does
+        """
+        project = {"node_id": "project1", "url": "https://api.github.com/projects/1"}
+
+        async def load_board():
+            async with AsyncGithubSession() as session:
+                return await session.load_board(project)
+
+        columns = asyncio.run(load_board())
+
+        self.assertEqual(["To Do", "Done"], [x["name"] for x in columns])
+        self.assertEqual(
+            [[11, 12], [21, 22]], [[y["id"] for y in x["cards"]] for x in columns]
+        )
+        self.assertEqual(columns[0]["url"], columns[0]["cards"][0]["column_url"])
+        self.assertEqual("closed", columns[1]["cards"][1]["issue"]["state"])
+
+
+@skipIf(AsyncGithubSession is None, "aiohttp is not installed")
+class AsyncStandinTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        fixture = standin.get_fixture(columns=3, cards=30)
+        self.server = standin.StandinServer(fixture=fixture).start()
+        self.addCleanup(self.server.stop)
+
+        for name, value in (
+            ("ISSUE_BACKEND_URL", self.server.base_url),
+            ("ISSUE_BACKEND_USER", self.server.state.owner),
+            ("ISSUE_BACKEND_REPO", self.server.state.repo),
+            ("HTTP_CACHE", None),
+        ):
+            patcher = mock.patch.object(github, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.project = GithubSession().get_project("board 1")
+
+    def run_session(self, fn):
+        async def run():
+            async with AsyncGithubSession() as session:
+                return await fn(session)
+
+        return asyncio.run(run())
+
+    def test_get_card_uses_index(self, *mocks):
+        """
+        Ensures cards are looked up from one read of the board and kept up to date
+        """
+        columns = GithubSession().get_columns(self.project)
+        card = GithubSession().get_cards(columns[0])[0]
+        issue = {"url": card["content_url"]}
+
+        async def move(session):
+            found = await session.get_card(self.project, issue)
+            await session.move_card(found, columns[-1])
+
+            card_index = await session.get_card_index(self.project)
+
+            return found, card_index.get(issue["url"])[1]
+
+        found, column = self.run_session(move)
+
+        self.assertEqual(card["id"], found["id"])
+        self.assertEqual(columns[-1]["id"], column["id"])
+
+    def test_reorder_cards(self, *mocks):
+        """
+        Ensures a column is put in the given order with the same moves as sync
+        """
+        column = GithubSession().get_columns(self.project)[0]
+        cards = GithubSession().get_cards(column)[::-1]
+
+        self.run_session(lambda session: session.reorder_cards(column, cards))
+
+        RESPONSE_CACHE.clear()
+
+        self.assertEqual(
+            [x["id"] for x in cards],
+            [x["id"] for x in GithubSession().get_cards(column)],
+        )
+
+    def test_add_labels(self, *mocks):
+        """
+        Ensures only the missing labels are added
+        """
+        self.server.state.add_label("reviewed")
+
+        responses = self.run_session(
+            lambda session: session.add_labels(
+                {1: ["reviewed"], 2: ["reviewed"]}, current={2: ["reviewed"]}
+            )
+        )
+
+        self.assertEqual([1], list(responses))
+        self.assertIn("reviewed", self.server.state.issues[1]["labels"])
+        self.assertNotIn("reviewed", self.server.state.issues[2]["labels"])
+
+    def test_get_project_cards(self, *mocks):
+        """
+        Ensures searched issues are matched to their cards like GithubSession does
+        """
+
+        async def get_project_cards(session):
+            issues = await session.search_issues("is:open")
+
+            return await session.get_project_cards(self.project, issues)
+
+        cards = self.run_session(get_project_cards)
+
+        issues = GithubSession().search_issues("is:open")
+        expected = GithubSession().get_project_cards(self.project, issues)
+
+        self.assertTrue(cards)
+        self.assertEqual(
+            [(x[0]["id"], x[1]["id"]) for x in expected],
+            [(x[0]["id"], x[1]["id"]) for x in cards],
+        )
@@ -0,0 +1,186 @@
+import os
+import tempfile
+import threading
+
+from unittest import TestCase, mock
+
+from issuebranch.mirror import Mirror
+
+PROJECT = {
+    "id": 1,
+    "name": "Kanban Board",
+    "url": "https://api.github.com/projects/1",
+}
+
+COLUMN = {
+    "id": 2,
+    "name": "To Do",
+    "url": "https://api.github.com/projects/columns/2",
+    "project_url": PROJECT["url"],
+}
+
+CARDS = [
+    {"id": 3, "content_url": "https://api.github.com/repos/org/repo/issues/5"},
+    {"id": 4, "note": "a note"},
+]
+
+ISSUE = {"number": 5, "updated_at": "2019-02-27T21:42:04Z", "labels": []}
+
+
+def get_session():
+    session = mock.Mock()
+    session.projects = [PROJECT]
+    session.get_columns.return_value = [COLUMN]
+    session.get_cards.return_value = CARDS
+    session.get_labels.return_value = [{"name": "points:1"}]
+    session.get_milestones.return_value = [{"number": 1, "title": "sprint 1"}]
+    session.get_issues.return_value = [ISSUE]
+
+    return session
+
+
+class MirrorTestCase(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+
+        self.mirror = Mirror(os.path.join(tmpdir.name, "mirror.sqlite3"))
+
+    def test_sync(self, *mocks):
+        """
+        Ensures synced data is served from the mirror
+        """
+        counts = self.mirror.sync(get_session())
+
+        self.assertEqual({"projects": 1, "columns": 1, "cards": 2, "issues": 1}, counts)
+
+        self.assertEqual(
+            PROJECT, self.mirror.get("project", "kanban board", max_age=60)
+        )
+        self.assertEqual([COLUMN], self.mirror.get("columns", PROJECT, max_age=60))
+        self.assertEqual(CARDS, self.mirror.get("cards", COLUMN, max_age=60))
+        self.assertEqual(ISSUE, self.mirror.get("issue", "5", max_age=60))
+        self.assertEqual([{"name": "points:1"}], self.mirror.get("labels", max_age=60))
+
+    def test_sync_is_incremental(self, *mocks):
+        """
+        Ensures only issues updated since the last sync are requested
+        """
+        self.mirror.sync(get_session())
+
+        session = get_session()
+        session.get_issues.return_value = []
+
+        self.mirror.sync(session)
+
+        session.get_issues.assert_called_with(state="all", since=ISSUE["updated_at"])
+
+        # issues that did not change are still served
+        self.assertEqual(ISSUE, self.mirror.get("issue", 5, max_age=60))
+
+    @mock.patch("issuebranch.mirror.time")
+    def test_stale(self, *mocks):
+        """
+        Ensures stale data is not served
+        """
+        time_mock = mocks[0]
+        time_mock.time.return_value = 1000
+
+        self.mirror.sync(get_session())
+
+        time_mock.time.return_value = 1100
+
+        self.assertIsNone(self.mirror.get("columns", PROJECT, max_age=60))
+        self.assertIsNone(self.mirror.get("labels", max_age=60))
+
+    def test_expire(self, *mocks):
+        """
+        Ensures expired tables are not served
+        """
+        self.mirror.sync(get_session())
+
+        self.mirror.expire("cards")
+
+        self.assertIsNone(self.mirror.get("cards", COLUMN, max_age=60))
+        self.assertIsNotNone(self.mirror.get("columns", PROJECT, max_age=60))
+
+    def test_expire_empty_column(self, *mocks):
+        """
+        Ensures an empty column is not served once cards are expired
+        """
+        session = get_session()
+        session.get_cards.return_value = []
+
+        self.mirror.sync(session)
+        self.assertEqual([], self.mirror.get("cards", COLUMN, max_age=60))
+
+        # e.g. a card was created in the column
+        self.mirror.expire("cards")
+
+        self.assertIsNone(self.mirror.get("cards", COLUMN, max_age=60))
+        self.assertIsNotNone(self.mirror.get("columns", PROJECT, max_age=60))
+
+        self.mirror.sync(get_session())
+
+        self.assertEqual(CARDS, self.mirror.get("cards", COLUMN, max_age=60))
+
+    def test_sync_restores_use_mirror(self, *mocks):
+        """
+        Ensures the session reads from the mirror again after a sync, even a failed one
+        """
+        session = get_session()
+        session.use_mirror = True
+
+        self.mirror.sync(session)
+        self.assertTrue(session.use_mirror)
+
+        session.get_issues.side_effect = RuntimeError("github is down")
+
+        with self.assertRaises(RuntimeError):
+            self.mirror.sync(session)
+
+        self.assertTrue(session.use_mirror)
+
+    def test_sync_reads_unlocked(self, *mocks):
+        """
+        Ensures other threads can read the mirror while a sync reads from the API
+        """
+        self.mirror.sync(get_session())
+
+        def get_cards(column):
+            reader = threading.Thread(
+                target=lambda: results.append(
+                    self.mirror.get("columns", PROJECT, max_age=60)
+                )
+            )
+            reader.start()
+            reader.join(5)
+
+            return CARDS
+
+        results = []
+
+        session = get_session()
+        session.get_cards.side_effect = get_cards
+
+        self.mirror.sync(session)
+
+        self.assertEqual([[COLUMN]], results)
+
+    def test_expire_during_sync(self, *mocks):
+        """
+        Ensures cards expired while a sync reads them are not served
+        """
+
+        def get_cards(column):
+            self.mirror.expire("cards")
+
+            return CARDS
+
+        session = get_session()
+        session.get_cards.side_effect = get_cards
+
+        self.mirror.sync(session)
+
+        self.assertIsNone(self.mirror.get("cards", COLUMN, max_age=60))
+        self.assertIsNotNone(self.mirror.get("columns", PROJECT, max_age=60))
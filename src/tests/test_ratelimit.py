@@ -0,0 +1,129 @@
+from unittest import TestCase, mock
+
+from issuebranch.ratelimit import RateLimiter
+
+
+def get_response(status_code=200, text="", **headers):
+    return mock.Mock(status_code=status_code, text=text, headers=headers, request=None)
+
+
+@mock.patch("issuebranch.ratelimit.random.uniform", return_value=0)
+@mock.patch("issuebranch.ratelimit.time.time", return_value=1000)
+class RateLimiterTestCase(TestCase):
+    def test_no_delay_with_budget(self, *mocks):
+        """
+        Ensures requests are not delayed while plenty of budget remains
+        """
+        limiter = RateLimiter(reserve=100)
+        limiter.update(
+            get_response(
+                **{"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "2000"}
+            )
+        )
+
+        self.assertEqual(0, limiter.get_delay())
+
+    def test_paces_within_reserve(self, *mocks):
+        """
+        Ensures the remaining requests are spread over the rest of the window
+        """
+        limiter = RateLimiter(reserve=100)
+        limiter.update(
+            get_response(**{"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "2000"})
+        )
+
+        self.assertEqual(0, limiter.get_delay())
+        self.assertEqual(100, limiter.get_delay())
+        self.assertEqual(200, limiter.get_delay())
+
+    def test_waits_for_reset(self, *mocks):
+        """
+        Ensures an exhausted budget waits for the window to reset
+        """
+        limiter = RateLimiter()
+        response = get_response(
+            403, **{"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1030"}
+        )
+        limiter.update(response)
+
+        self.assertEqual(30, limiter.get_delay())
+        self.assertEqual(30, limiter.get_retry_delay(response, 0))
+
+    def test_write_interval(self, *mocks):
+        """
+        Ensures writes are spaced out
+        """
+        limiter = RateLimiter(write_interval=1)
+
+        self.assertEqual(0, limiter.get_delay("post"))
+        self.assertEqual(1, limiter.get_delay("post"))
+        self.assertEqual(0, limiter.get_delay("get"))
+
+    def test_retry_after(self, *mocks):
+        """
+        Ensures the Retry-After header is honored
+        """
+        limiter = RateLimiter()
+
+        self.assertEqual(
+            60, limiter.get_retry_delay(get_response(403, **{"Retry-After": "60"}), 0)
+        )
+
+    def test_secondary_limit_backs_off(self, *mocks):
+        """
+        Ensures secondary limit responses back off exponentially
+        """
+        limiter = RateLimiter(backoff=1)
+        response = get_response(403, text="You have exceeded a secondary rate limit")
+
+        self.assertEqual(4, limiter.get_retry_delay(response, 2))
+
+    def test_max_retries(self, *mocks):
+        """
+        Ensures a request is not retried more than max_retries times
+        """
+        limiter = RateLimiter(max_retries=2)
+        response = get_response(429)
+
+        self.assertIsNotNone(limiter.get_retry_delay(response, 1))
+        self.assertIsNone(limiter.get_retry_delay(response, 2))
+
+    def test_forbidden_is_not_retried(self, *mocks):
+        """
+        Ensures permission errors are not mistaken for rate limiting
+        """
+        limiter = RateLimiter()
+
+        self.assertIsNone(limiter.get_retry_delay(get_response(403), 0))
+
+    def test_used(self, *mocks):
+        """
+        Ensures the budget used is tallied across responses
+        """
+        limiter = RateLimiter()
+
+        for remaining in ("4999", "4998", "4990"):
+            limiter.update(
+                get_response(
+                    **{"X-RateLimit-Remaining": remaining, "X-RateLimit-Reset": "2000"}
+                )
+            )
+
+        self.assertEqual(3, limiter.requests)
+        self.assertEqual(10, limiter.used)
+
+    def test_out_of_order(self, *mocks):
+        """
+        Ensures a response that arrives late does not raise the remaining budget
+        """
+        limiter = RateLimiter()
+
+        for remaining in ("4999", "4997", "4998"):
+            limiter.update(
+                get_response(
+                    **{"X-RateLimit-Remaining": remaining, "X-RateLimit-Reset": "2000"}
+                )
+            )
+
+        self.assertEqual(4997, limiter.remaining)
+        self.assertEqual(3, limiter.used)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+from issuebranch import snapshot
+
+
+def get_card(number, state="open"):
+    url = f"https://api.github.com/repos/owner/repo/issues/{number}"
+
+    return {
+        "id": 100 + number,
+        "content_url": url,
+        "note": None,
+        "issue": {"number": number, "state": state, "title": f"issue {number}"},
+    }
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self):
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        self.path = os.path.join(tempdir.name, "board.ndjson.gz")
+
+        self.project = {"id": 1, "name": "board", "url": "projects/1"}
+        self.columns = [
+            {"id": 10, "name": "backlog", "cards": [get_card(1), get_card(2)]},
+            {
+                "id": 11,
+                "name": "done",
+                "cards": [get_card(3), {"id": 200, "note": "a note", "issue": None}],
+            },
+        ]
+
+    def test_read_write(self, *mocks):
+        counts = snapshot.write(self.path, self.project, self.columns)
+
+        self.assertEqual({"columns": 2, "cards": 4}, counts)
+
+        project, columns = snapshot.read(self.path)
+
+        self.assertEqual("board", project["name"])
+        self.assertEqual(self.columns, columns)
+
+    def test_diff(self, *mocks):
+        new_columns = [
+            {"id": 10, "name": "backlog", "cards": [get_card(4)]},
+            {
+                "id": 11,
+                "name": "done",
+                "cards": [get_card(1, state="closed"), get_card(3)],
+            },
+        ]
+
+        changes = [
+            (x["change"], x["key"].rsplit("/", 1)[-1], x["from"], x["to"])
+            for x in snapshot.diff(self.columns, new_columns)
+        ]
+
+        self.assertEqual(
+            [
+                ("added", "4", None, "backlog"),
+                ("moved", "1", "backlog", "done"),
+                ("closed", "1", None, None),
+                ("removed", "2", "backlog", None),
+                ("removed", "note:200", "done", None),
+            ],
+            changes,
+        )
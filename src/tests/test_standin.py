@@ -0,0 +1,325 @@
+import io
+import os
+import sys
+import tempfile
+
+from unittest import TestCase, mock
+
+from issuebranch import console_scripts, journal, standin, statefile
+from issuebranch.backends import github
+from issuebranch.backends.github import RESPONSE_CACHE, GithubSession
+
+
+class StandinTestCase(TestCase):
+    def setUp(self):
+        RESPONSE_CACHE.clear()
+
+        fixture = standin.get_fixture(columns=3, cards=150)
+        self.server = standin.StandinServer(fixture=fixture).start()
+        self.addCleanup(self.server.stop)
+
+        for name, value in (
+            ("ISSUE_BACKEND_URL", self.server.base_url),
+            ("ISSUE_BACKEND_USER", self.server.state.owner),
+            ("ISSUE_BACKEND_REPO", self.server.state.repo),
+            ("HTTP_CACHE", None),
+        ):
+            patcher = mock.patch.object(github, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.session = GithubSession()
+        self.project = self.session.get_project("board 1")
+
+    def test_load_board_matches_rest(self, *mocks):
+        """
+        Ensures the GraphQL and REST views of the board agree
+        """
+        columns = self.session.get_columns(self.project)
+        board = self.session.load_board(self.project)
+
+        self.assertEqual([x["id"] for x in columns], [x["id"] for x in board])
+
+        for column, board_column in zip(columns, board):
+            cards = self.session.get_cards(column)
+
+            self.assertEqual(
+                [x["id"] for x in cards], [x["id"] for x in board_column["cards"]]
+            )
+            self.assertEqual(
+                [x["content_url"] for x in cards],
+                [x["issue"]["url"] for x in board_column["cards"]],
+            )
+
+    def test_move_card(self, *mocks):
+        columns = self.session.get_columns(self.project)
+        card = self.session.get_cards(columns[0])[-1]
+
+        self.session.move_card(card, columns[1])
+
+        self.assertEqual(card["id"], self.session.get_cards(columns[1])[0]["id"])
+        self.assertNotIn(
+            card["id"], [x["id"] for x in self.session.get_cards(columns[0])]
+        )
+
+    def test_move_card_error(self, *mocks):
+        """
+        Ensures a move the API rejects raises rather than passing for success
+        """
+        columns = self.session.get_columns(self.project)
+        card = self.session.get_cards(columns[0])[-1]
+
+        with self.assertRaises(self.session.HTTPError):
+            self.session.move_card(card, dict(columns[1], id=999999))
+
+        with self.assertRaises(self.session.HTTPError):
+            self.session.move_cards([(card, dict(columns[1], id=999999), "top")])
+
+    def test_search(self, *mocks):
+        issue = self.session.get_issue(3)
+        self.session.update_issue(number=3, state="closed")
+
+        results = self.session.search(f"is:closed {issue['title']}")
+
+        self.assertIn(3, [x["number"] for x in results["items"]])
+
+    def test_not_modified(self, *mocks):
+        """
+        Ensures a page that has not changed is answered with a 304
+        """
+        response = self.session.request("get", self.project["columns_url"])
+
+        not_modified = self.session.request(
+            "get",
+            self.project["columns_url"],
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+
+        self.assertEqual(304, not_modified.status_code)
+
+    def test_add_labels(self, *mocks):
+        """
+        Ensures each issue missing labels gets one request with only those labels
+        """
+        issues = self.session.get_issues_by_number(range(1, 21))
+        names = ["team:data", "topic:walk-in"]
+
+        current = dict(
+            [(x["number"], [y["name"] for y in x["labels"]]) for x in issues]
+        )
+        missing = [x for x in issues if not set(names) <= set(current[x["number"]])]
+
+        with mock.patch.object(
+            GithubSession, "request", wraps=self.session.request
+        ) as request:
+            responses = self.session.add_labels(
+                dict([(x["number"], names) for x in issues]), current=current
+            )
+
+        self.assertEqual(sorted([x["number"] for x in missing]), sorted(responses))
+        self.assertEqual(len(missing), request.call_count)
+
+        for call in request.call_args_list:
+            number = int(call[0][1].rsplit("/", 2)[-2])
+            self.assertEqual(
+                [x for x in names if x not in current[number]], call[1]["json"]
+            )
+
+        for issue in self.session.get_issues_by_number(range(1, 21)):
+            self.assertTrue(set(names) <= set([x["name"] for x in issue["labels"]]))
+
+    def run_issue_closed(self, *argv):
+        with mock.patch.object(sys, "argv", ["issue-closed", "board 1"] + list(argv)):
+            with mock.patch.object(sys, "stdout", io.StringIO()):
+                return console_scripts.issue_closed()
+
+    def get_closed_cards(self, column_ids):
+        state = self.server.state
+
+        return [
+            card_id
+            for column_id in column_ids
+            for card_id in state.column_cards[column_id]
+            if state.get_issue_by_id(state.cards[card_id]["issue_id"])["state"]
+            == "closed"
+        ]
+
+    def test_issue_closed(self, *mocks):
+        """
+        Ensures closed issues are moved to the bottom of the column in board order
+        """
+        column_ids = self.server.state.project_columns[self.project["id"]]
+        closed = self.get_closed_cards(column_ids[:2])
+        self.assertTrue(closed)
+
+        self.run_issue_closed("--column", "sprint")
+
+        self.assertEqual([], self.get_closed_cards(column_ids[:2]))
+        self.assertEqual(
+            closed, self.server.state.column_cards[column_ids[2]][-len(closed) :]
+        )
+
+    def test_issue_closed_dry_run(self, *mocks):
+        column_ids = self.server.state.project_columns[self.project["id"]]
+        closed = self.get_closed_cards(column_ids[:2])
+
+        self.run_issue_closed("--column", "sprint", "--dry-run")
+
+        self.assertEqual(closed, self.get_closed_cards(column_ids[:2]))
+
+    def test_issue_closed_incremental(self, *mocks):
+        """
+        Ensures an incremental run only looks at issues closed since the last one
+        """
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        path = os.path.join(tempdir.name, "state.json")
+        with mock.patch.object(statefile, "ISSUEBRANCH_STATE_PATH", path):
+            # without a watermark the whole board is looked at
+            self.run_issue_closed("--column", "sprint", "--incremental")
+
+            column_ids = self.server.state.project_columns[self.project["id"]]
+            self.assertEqual([], self.get_closed_cards(column_ids[:2]))
+
+            card_id = self.server.state.column_cards[column_ids[0]][0]
+            number = self.server.state.issue_numbers[
+                self.server.state.cards[card_id]["issue_id"]
+            ]
+            self.session.update_issue(number=number, state="closed")
+
+            with mock.patch.object(GithubSession, "load_board") as load_board:
+                self.run_issue_closed("--column", "sprint", "--incremental")
+
+        load_board.assert_not_called()
+
+        self.assertEqual(card_id, self.server.state.column_cards[column_ids[2]][-1])
+
+    def run_projects(self, *argv):
+        with mock.patch.object(sys, "argv", ["projects", "board 1"] + list(argv)):
+            with mock.patch.object(sys, "stdout", io.StringIO()):
+                return console_scripts.projects()
+
+    def get_board(self, name):
+        state = self.server.state
+
+        for project_id, project in state.projects.items():
+            if project["name"] == name:
+                return project, [
+                    [state.cards[x]["issue_id"] for x in state.column_cards[column_id]]
+                    for column_id in state.project_columns[project_id]
+                ]
+
+    def test_projects_clone(self, *mocks):
+        """
+        Ensures a clone has the same cards in the same order and can be resumed
+        """
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        with mock.patch.object(journal, "ISSUEBRANCH_JOURNAL_DIR", tempdir.name):
+            # interrupted after every card was created
+            with mock.patch.object(
+                GithubSession, "close_project", side_effect=RuntimeError
+            ):
+                with self.assertRaises(RuntimeError):
+                    self.run_projects("clone", "board 1 copy")
+
+            self.assertEqual(1, len(os.listdir(tempdir.name)))
+
+            with mock.patch.object(
+                GithubSession, "create_card", wraps=GithubSession.create_card
+            ) as create_card:
+                self.run_projects("clone", "board 1 copy")
+
+            create_card.assert_not_called()
+            self.assertEqual([], os.listdir(tempdir.name))
+
+        project, columns = self.get_board("board 1")
+        new_project, new_columns = self.get_board("board 1 copy")
+
+        self.assertEqual(columns, new_columns)
+        self.assertEqual("closed", new_project["state"])
+
+    def test_projects_clone_pull_request(self, *mocks):
+        """
+        Ensures cards for pull requests are cloned as pull request cards
+        """
+        state = self.server.state
+
+        column_id = state.project_columns[self.project["id"]][0]
+
+        number = state.add_issue("a pull request", pull_request=True)
+        state.add_card(column_id, issue_id=state.issues[number]["id"])
+
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        with mock.patch.object(journal, "ISSUEBRANCH_JOURNAL_DIR", tempdir.name):
+            self.run_projects("clone", "board 1 copy")
+
+        project, columns = self.get_board("board 1")
+        new_project, new_columns = self.get_board("board 1 copy")
+
+        self.assertEqual(columns, new_columns)
+        self.assertIn(state.issues[number]["id"], new_columns[0])
+
+    def test_projects_sort(self, *mocks):
+        """
+        Ensures a column is sorted with fewer moves than it has cards
+        """
+        state = self.server.state
+
+        column = self.session.get_columns(self.project)[0]
+        card_ids = state.column_cards[column["id"]]
+
+        # a single card out of place needs a single move
+        card_ids.sort(key=lambda x: state.cards[x]["issue_id"])
+        card_ids.insert(0, card_ids.pop())
+
+        with mock.patch.object(
+            GithubSession, "move_card", wraps=self.session.move_card
+        ) as move_card:
+            self.run_projects("sort", column["name"], "--by", "number")
+
+        numbers = [state.cards[x]["issue_id"] for x in card_ids]
+
+        self.assertEqual(sorted(numbers), numbers)
+        self.assertEqual(1, move_card.call_count)
+
+    def test_projects_snapshot(self, *mocks):
+        """
+        Ensures a snapshot is taken with reads only and diffs against the board
+        """
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        path = os.path.join(tempdir.name, "board.ndjson.gz")
+
+        with mock.patch.object(GithubSession, "request", wraps=self.session.request):
+            self.run_projects("snapshot", "--output", path)
+
+            writes = [
+                x[0][1]
+                for x in GithubSession.request.call_args_list
+                if x[0][0] != "get"
+            ]
+
+        # GraphQL queries are POSTs but do not write
+        self.assertTrue(writes)
+        self.assertEqual([], [x for x in writes if not x.endswith("/graphql")])
+
+        columns = self.session.get_columns(self.project)
+        card = self.session.get_cards(columns[0])[0]
+        self.session.move_card(card, columns[1])
+
+        with mock.patch.object(sys, "stdout", io.StringIO()) as stdout:
+            with mock.patch.object(
+                sys, "argv", ["projects", "board 1", "snapshot", "--diff", path]
+            ):
+                console_scripts.projects()
+
+        lines = stdout.getvalue().splitlines()
+
+        self.assertEqual(1, len(lines))
+        self.assertTrue(lines[0].startswith("moved"))
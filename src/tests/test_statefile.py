@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+from issuebranch.statefile import StateFile
+
+
+class StateFileTestCase(TestCase):
+    def setUp(self):
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+
+        self.path = os.path.join(tempdir.name, "state", "state.json")
+
+    def test_set(self, *mocks):
+        StateFile(self.path).set("issue-closed", 1.5)
+        StateFile(self.path).set("issue-close-done", 2)
+
+        state = StateFile(self.path)
+
+        self.assertEqual(1.5, state.get("issue-closed"))
+        self.assertEqual(2, state.get("issue-close-done"))
+        self.assertEqual(["state.json"], os.listdir(os.path.dirname(self.path)))
+
+    def test_missing(self, *mocks):
+        self.assertEqual(None, StateFile(self.path).get("issue-closed"))
@@ -0,0 +1,95 @@
+from unittest import TestCase
+
+from issuebranch.stats import RequestStats, get_endpoint, get_percentile
+
+
+class GetEndpointTestCase(TestCase):
+    def test_github(self, *mocks):
+        """
+        Ensures owners, repos and ids are replaced with placeholders
+        """
+        self.assertEqual(
+            "/repos/{owner}/{repo}/issues/{id}/labels",
+            get_endpoint(
+                "https://api.github.com/repos/rca/issuebranch/issues/12/labels"
+            ),
+        )
+        self.assertEqual(
+            "/orgs/{owner}/projects",
+            get_endpoint("https://api.github.com/orgs/rca/projects"),
+        )
+        self.assertEqual(
+            "/projects/columns/cards/{id}/moves",
+            get_endpoint("https://api.github.com/projects/columns/cards/55/moves"),
+        )
+
+    def test_other_backends(self, *mocks):
+        """
+        Ensures issue keys and ids with extensions are replaced with placeholders
+        """
+        self.assertEqual(
+            "/api/issues/{key}", get_endpoint("https://yt/api/issues/AB-12")
+        )
+        self.assertEqual("/issues/{id}.json", get_endpoint("https://rm/issues/12.json"))
+
+
+class RequestStatsTestCase(TestCase):
+    def test_get_percentile(self, *mocks):
+        values = list(range(1, 101))
+
+        self.assertEqual(50, get_percentile(values, 50))
+        self.assertEqual(95, get_percentile(values, 95))
+        self.assertEqual(3, get_percentile([3], 95))
+        self.assertEqual(None, get_percentile([], 50))
+
+    def test_get_summary(self, *mocks):
+        """
+        Ensures requests are grouped by method and endpoint
+        """
+        stats = RequestStats()
+
+        for number, elapsed in ((1, 0.1), (2, 0.3), (3, 0.2)):
+            stats.record(
+                "get",
+                f"https://api.github.com/repos/rca/issuebranch/issues/{number}",
+                200,
+                10,
+                elapsed,
+                cache="miss",
+            )
+
+        stats.record(
+            "get",
+            "https://api.github.com/projects/columns/1/cards",
+            304,
+            0,
+            0.05,
+            cache="revalidated",
+        )
+        stats.record_cache("issue", True)
+
+        summary = stats.get_summary()
+
+        self.assertEqual(4, summary["requests"])
+        self.assertEqual({"issue": {"hits": 1, "misses": 0}}, summary["cache"])
+
+        issues, cards = summary["endpoints"]
+
+        self.assertEqual("GET /repos/{owner}/{repo}/issues/{id}", issues["endpoint"])
+        self.assertEqual(3, issues["requests"])
+        self.assertEqual(30, issues["bytes"])
+        self.assertEqual(0.2, issues["p50"])
+        self.assertEqual(0.3, issues["p95"])
+
+        self.assertEqual(1, cards["revalidated"])
+
+    def test_disabled(self, *mocks):
+        """
+        Ensures requests are not recorded unless collection is turned on
+        """
+        stats = RequestStats(enabled=False)
+
+        stats.record("get", "https://api.github.com/projects/1", 200, 10, 0.1)
+        stats.add_requests([{"endpoint": "/projects/{id}"}])
+
+        self.assertEqual([], stats.requests)
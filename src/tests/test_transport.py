@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import requests
+
+from issuebranch import standin, transport
+
+
+class CassetteTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+
+        self.path = os.path.join(self.tempdir, "cassette.json")
+
+        self.server = standin.StandinServer(fixture=standin.get_fixture(cards=10))
+        self.server.start()
+
+        self.url = f"{self.server.base_url}/repos/openslate/openslate/issues"
+
+    def _record(self):
+        cassette = transport.Cassette(self.path, mode="record")
+        session = transport.install(requests.Session(), cassette=cassette)
+
+        responses = [
+            session.get(self.url, params={"per_page": 5, "state": "all"}),
+            session.post(f"{self.url}/1/comments", json={"body": "hello"}),
+        ]
+
+        cassette.save()
+        self.server.stop()
+
+        return responses
+
+    def test_replay(self, *mocks):
+        """
+        Ensures recorded responses are replayed once the server is gone
+        """
+        recorded = self._record()
+
+        cassette = transport.Cassette(self.path)
+        session = transport.install(requests.Session(), cassette=cassette)
+
+        # the order of query parameters does not matter
+        response = session.get(self.url, params={"state": "all", "per_page": 5})
+
+        self.assertEqual(recorded[0].json(), response.json())
+        self.assertEqual(recorded[0].headers["Link"], response.headers["Link"])
+
+        response = session.post(f"{self.url}/1/comments", json={"body": "hello"})
+
+        self.assertEqual(201, response.status_code)
+
+    def test_replay_conditional(self, *mocks):
+        """
+        Ensures conditional requests are answered from the recorded ETag
+        """
+        recorded = self._record()
+
+        cassette = transport.Cassette(self.path)
+        session = transport.install(requests.Session(), cassette=cassette)
+
+        response = session.get(
+            self.url,
+            params={"per_page": 5, "state": "all"},
+            headers={"If-None-Match": recorded[0].headers["ETag"]},
+        )
+
+        self.assertEqual(304, response.status_code)
+
+    def test_missing_request(self, *mocks):
+        self._record()
+
+        cassette = transport.Cassette(self.path)
+        session = transport.install(requests.Session(), cassette=cassette)
+
+        with self.assertRaises(transport.CassetteError):
+            session.get(self.url)
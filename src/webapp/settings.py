@@ -77,11 +77,34 @@ WSGI_APPLICATION = "webapp.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "NAME": os.environ.get(
+            "WEBHOOK_DATABASE_PATH", os.path.join(BASE_DIR, "db.sqlite3")
+        ),
+        # the web process and the workers write to the job queue at the same time
+        "OPTIONS": {"timeout": 20},
     }
 }
 
 
+# Webhook job queue, see `manage.py webhook_worker`
+
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", 4))
+
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", 5))
+
+# seconds before the first retry of a failed job, doubled for each one after
+WEBHOOK_RETRY_DELAY = float(os.environ.get("WEBHOOK_RETRY_DELAY", 30))
+
+# seconds a card move waits for more moves of the same card to merge with
+WEBHOOK_COALESCE_WINDOW = float(os.environ.get("WEBHOOK_COALESCE_WINDOW", 5))
+
+# seconds a job may run before it is taken to be left by a worker that stopped
+WEBHOOK_JOB_TIMEOUT = float(os.environ.get("WEBHOOK_JOB_TIMEOUT", 600))
+
+# seconds handled jobs and received delivery ids are kept
+WEBHOOK_RETENTION = float(os.environ.get("WEBHOOK_RETENTION", 7 * 24 * 3600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
 
@@ -1,3 +1,21 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Delivery, Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "action_type",
+        "status",
+        "attempts",
+        "coalesced",
+        "run_after",
+    )
+    list_filter = ("status", "action_type")
+
+
+@admin.register(Delivery)
+class DeliveryAdmin(admin.ModelAdmin):
+    list_display = ("delivery_id", "job", "received_at")
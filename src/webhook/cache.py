@@ -0,0 +1,205 @@
+"""
+Project and column metadata shared by every webhook handled in a process
+
+Handlers look up the same projects and columns for every card that moves, and
+those rarely change, so they are kept for WEBHOOK_METADATA_TTL seconds instead
+of GITHUB_CACHE_TTL.  The `project` and `project_column` webhooks that GitHub
+sends when a board or column changes drop the affected entries right away.
+
+The cards in the on deck columns are indexed by issue url the same way: each
+column is read once, kept up to date by `project_card` webhooks and the
+handlers' own writes, and read again every WEBHOOK_INDEX_RECONCILE seconds in
+case a webhook was missed.
+"""
+import os
+import threading
+import time
+
+from issuebranch.backends import github
+from issuebranch.backends.github import CardIndex, GithubSession
+from issuebranch.cache import TTLCache
+
+WEBHOOK_METADATA_MAXSIZE = int(os.environ.get("WEBHOOK_METADATA_MAXSIZE", 1024))
+WEBHOOK_METADATA_TTL = float(os.environ.get("WEBHOOK_METADATA_TTL", 3600))
+
+WEBHOOK_INDEX_RECONCILE = float(os.environ.get("WEBHOOK_INDEX_RECONCILE", 900))
+
+METADATA_CACHE = TTLCache(maxsize=WEBHOOK_METADATA_MAXSIZE, ttl=WEBHOOK_METADATA_TTL)
+
+# the session whose connection pool and card indexes every handler uses
+SESSION = None
+
+
+def get_session():
+    """
+    Returns a session that shares the process' connection pool and card indexes
+    """
+    global SESSION
+
+    if SESSION is None:
+        SESSION = GithubSession()
+
+    return GithubSession().share(SESSION)
+
+
+def invalidate_column(column_data):
+    """
+    Drops a column that was created, edited, moved or deleted
+
+    Columns are looked up by name too, so every column found by name is dropped
+    since the name the column had before is not known.
+    """
+    METADATA_CACHE.invalidate("column", key=("url", column_data["url"]))
+
+    ON_DECK.forget(column_data["url"])
+
+    github.invalidate("board", "column", "columns")
+
+
+def invalidate_project(project_data):
+    """
+    Drops a project that was created, edited, closed, reopened or deleted
+    """
+    METADATA_CACHE.invalidate("column", "project", key=("url", project_data["url"]))
+
+    github.invalidate("board", "column", "columns", "projects")
+
+
+class Metadata(object):
+    """
+    Looks up projects and columns in METADATA_CACHE before asking the API
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def _get(self, key, fn, *args):
+        try:
+            return METADATA_CACHE.get(key)
+        except KeyError:
+            return METADATA_CACHE.set(key, fn(*args))
+
+    def get(self, url):
+        """
+        Returns the data at the given project or column url
+        """
+        return self._get(("url", url), self._request, url)
+
+    def get_column(self, project_data, name):
+        return self._get(
+            ("column", project_data["url"], name),
+            self.session.get_column,
+            project_data,
+            name,
+        )
+
+    def get_issue_id(self, url):
+        """
+        Returns the id of the issue at the given url
+
+        Ids never change, so an issue is only fetched when no webhook for it has
+        been seen yet.
+        """
+        return self._get(("issue_id", url), lambda: self._request(url)["id"])
+
+    def get_project(self, name):
+        return self._get(("project", name.lower()), self.session.get_project, name)
+
+    def set_issue_id(self, issue_data):
+        """
+        Records the id of an issue from a webhook payload
+        """
+        METADATA_CACHE.set(("issue_id", issue_data["url"]), issue_data["id"])
+
+    def _request(self, url):
+        response = self.session.request("get", url)
+        response.raise_for_status()
+
+        return response.json()
+
+
+class ColumnIndex(object):
+    """
+    Indexes the cards in columns by their issue url
+
+    Args:
+        reconcile (float): seconds after which a column is read again
+    """
+
+    def __init__(self, reconcile=WEBHOOK_INDEX_RECONCILE):
+        self.reconcile = reconcile
+
+        # column url -> (card index, time the column was read)
+        self.columns = {}
+
+        self._lock = threading.RLock()
+
+    def add(self, card, column_url):
+        """
+        Records a card that was created in or moved to the given column
+        """
+        with self._lock:
+            self.remove(card)
+
+            entry = self.columns.get(column_url)
+            if entry is not None:
+                entry[0].add(card, {"url": column_url})
+
+    def clear(self):
+        with self._lock:
+            self.columns.clear()
+
+    def find(self, session, column_data, content_url):
+        """
+        Returns the card for the issue in the given column or None
+        """
+        try:
+            return self.get(session, column_data).get(content_url)[0]
+        except KeyError:
+            return None
+
+    def get(self, session, column_data):
+        """
+        Returns the column's card index, reading the column when it is not indexed
+        or was last read more than `reconcile` seconds ago
+        """
+        url = column_data["url"]
+
+        with self._lock:
+            entry = self.columns.get(url)
+            if entry is None or time.monotonic() - entry[1] > self.reconcile:
+                github.RESPONSE_CACHE.invalidate(key=("cards", url))
+
+                card_index = CardIndex()
+                for card in session.get_cards(column_data):
+                    card_index.add(card, column_data)
+
+                entry = self.columns[url] = (card_index, time.monotonic())
+
+            return entry[0]
+
+    def forget(self, column_url):
+        """
+        Drops a column's index, so it is read again on next use
+        """
+        with self._lock:
+            self.columns.pop(column_url, None)
+
+    def remove(self, card):
+        with self._lock:
+            for card_index, _ in self.columns.values():
+                card_index.remove(card)
+
+    def update(self, webhook_data):
+        """
+        Records the card in a project_card webhook
+        """
+        card = webhook_data["project_card"]
+
+        if webhook_data["action"] == "deleted":
+            self.remove(card)
+        else:
+            self.add(card, card["column_url"])
+
+
+ON_DECK = ColumnIndex()
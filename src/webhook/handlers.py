@@ -1,15 +1,20 @@
-import functools
 import logging
 
-from issuebranch.backends.github import Backend, GithubSession
 from issuebranch.settings import *
 
+from . import cache
+from .utils import get_from_column_id
+
 
 class BaseHandler(object):
     def __init__(self, data):
         self.data = data
 
-        self.session = GithubSession()
+        self.session = cache.get_session()
+
+    @property
+    def metadata(self):
+        return cache.Metadata(self.session)
 
 
 class IssueHandler(BaseHandler):
@@ -24,18 +29,22 @@ class IssueHandler(BaseHandler):
     def do_opened(self):
         """
         When an issue is opened add it to the parking lot
+
+        The payload has the issue, so it is not fetched again.
         """
-        issue_number = self.data["issue"]["number"]
-        issue_data = Backend(issue_number).issue
+        issue_data = self.data["issue"]
 
-        product_backlog_data = self.session.get_project(PRODUCT_BACKLOG_NAME)
-        parking_log_column_data = self.session.get_column(
+        product_backlog_data = self.metadata.get_project(PRODUCT_BACKLOG_NAME)
+        parking_log_column_data = self.metadata.get_column(
             product_backlog_data, PARKING_LOT_NAME
         )
 
         self.session.create_card(parking_log_column_data, issue_data)
 
     def run(self):
+        # cards for the issue can be created without fetching it from here on
+        self.metadata.set_issue_id(self.data["issue"])
+
         action = self.data["action"]
 
         action_fn_name = f"do_{action}"
@@ -62,38 +71,46 @@ class ProjectHandler(BaseHandler):
 
         card = self.find_card(other_project_on_deck, issue_url)
         if card is None:
-            issue_id = int(issue_url.rsplit("/", 1)[-1])
-            issue_data = Backend(issue_id).issue
+            # creating a card only needs the issue's id
+            issue_data = {"id": self.metadata.get_issue_id(issue_url)}
+
+            response = self.session.create_card(other_project_on_deck, issue_data)
 
-            self.session.create_card(other_project_on_deck, issue_data)
+            cache.ON_DECK.add(response.json(), other_project_on_deck["url"])
 
     def find_card(self, column_data, content_url):
         # look for the card in the other board's on deck
-        for card in self.session.get_cards(column_data):
-            if card["content_url"] == content_url:
-                return card
+        return cache.ON_DECK.find(self.session, column_data, content_url)
 
     def get_other_project_data(self, project_data):
         other_project_name = OTHER_PROJECT.get(project_data["name"].lower())
 
-        return self.session.get_project(other_project_name)
+        return self.metadata.get_project(other_project_name)
 
     def get_project_on_deck(self, project_data):
-        return self.session.get_column(project_data, ON_DECK_COLUMN_NAME)
+        return self.metadata.get_column(project_data, ON_DECK_COLUMN_NAME)
 
-    @functools.lru_cache(maxsize=10)
     def get_request_data(self, url):
-        return self.session.request("get", url).json()
+        return self.metadata.get(url)
 
     @property
     def project_card_data(self):
         return self.data["project_card"]
 
     def run(self):
+        # keep the on deck indexes up to date with every card that changes
+        cache.ON_DECK.update(self.data)
+
         action = self.data["action"]
         if action != "moved":
             return
 
+        # moves within a column, or merged moves that put the card back where it
+        # started, change nothing on the other board
+        from_column_id = get_from_column_id(self.data)
+        if from_column_id == self.project_card_data["column_id"]:
+            return
+
         # check if something was added to the on deck column
         column_url = self.project_card_data["column_url"]
         column_data = self.get_request_data(column_url)
@@ -108,7 +125,7 @@ class ProjectHandler(BaseHandler):
         # replace the url in the column url with the from column to see if the card was removed from on deck
         from_column_url = column_url.replace(
             str(self.project_card_data["column_id"]),
-            str(self.data["changes"]["column_id"]["from"]),
+            str(from_column_id),
         )
         from_column_data = self.get_request_data(from_column_url)
 
@@ -129,5 +146,23 @@ class ProjectHandler(BaseHandler):
         if card_data is not None:
             self.session.delete_card(card_data)
 
+            cache.ON_DECK.remove(card_data)
+
+
+class MetadataHandler(BaseHandler):
+    """
+    Drops cached project and column data when a board or column changes
+    """
+
+    def run(self):
+        if "project_column" in self.data:
+            cache.invalidate_column(self.data["project_column"])
+        else:
+            cache.invalidate_project(self.data["project"])
+
 
-handler_types = {"issue": IssueHandler, "project": ProjectHandler}
+handler_types = {
+    "issue": IssueHandler,
+    "metadata": MetadataHandler,
+    "project": ProjectHandler,
+}
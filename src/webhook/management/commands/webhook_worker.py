@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from webhook.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Handles queued webhook deliveries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, help="number of threads, WEBHOOK_WORKERS by default"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="exit once no jobs are due"
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(workers=options["workers"])
+
+        if options["once"]:
+            count = worker.run_pending()
+
+            self.stdout.write(f"ran {count} jobs")
+
+            return
+
+        worker.run()
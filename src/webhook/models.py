@@ -1,3 +1,225 @@
+import json
+import traceback
+
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+from .utils import get_card_id, merge_card_moves
+
+
+class Job(models.Model):
+    """
+    A webhook delivery waiting to be handled, or handled already
+
+    Deliveries are stored when they are received and handled by `webhook_worker`,
+    so GitHub gets its response before any API calls are made.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUSES = (
+        (QUEUED, "queued"),
+        (RUNNING, "running"),
+        (DONE, "done"),
+        (FAILED, "failed"),
+    )
+
+    action_type = models.CharField(max_length=32)
+    payload = models.TextField()
+
+    # set for project card actions so later moves of the card can be merged in
+    card_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    coalesced = models.PositiveIntegerField(default=0)
+
+    status = models.CharField(max_length=16, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.action_type} job {self.pk} ({self.status})"
+
+    @property
+    def data(self):
+        return json.loads(self.payload)
+
+    @classmethod
+    def claim(cls):
+        """
+        Returns the next job that is due, marked as running, or None
+
+        A job is only handed to the worker whose update marked it running, so
+        workers in other threads or processes never run the same job.
+        """
+        while True:
+            now = timezone.now()
+
+            job = (
+                cls.objects.filter(status=cls.QUEUED, run_after__lte=now)
+                .order_by("run_after", "id")
+                .first()
+            )
+            if job is None:
+                return None
+
+            claimed = cls.objects.filter(pk=job.pk, status=cls.QUEUED).update(
+                status=cls.RUNNING, attempts=F("attempts") + 1, updated_at=now
+            )
+            if claimed:
+                job.refresh_from_db()
+
+                return job
+
+    @classmethod
+    def enqueue(cls, action_type, data):
+        """
+        Queues a delivery and returns its job
+
+        A card move is merged into the queued job for the same card when there is
+        one, so that a card dragged across several columns is handled once, from
+        the column it started in to the one it ended up in.  Card jobs wait
+        WEBHOOK_COALESCE_WINDOW seconds before they are due to give the rest of a
+        drag time to arrive.
+        """
+        card_id = get_card_id(data) if action_type == "project" else None
+
+        if card_id is not None:
+            job = (
+                cls.objects.filter(card_id=card_id, status=cls.QUEUED)
+                .order_by("-id")
+                .first()
+            )
+
+            # a worker may claim the job in the meantime, then a new job is queued;
+            # only moves are merged, other card actions are handled on their own
+            if job is not None and "moved" == data["action"] == job.data["action"]:
+                payload = json.dumps(merge_card_moves(job.data, data))
+
+                merged = cls.objects.filter(pk=job.pk, status=cls.QUEUED).update(
+                    payload=payload,
+                    coalesced=F("coalesced") + 1,
+                    updated_at=timezone.now(),
+                )
+                if merged:
+                    job.refresh_from_db()
+
+                    return job
+
+        run_after = timezone.now()
+        if card_id is not None:
+            run_after += timedelta(seconds=settings.WEBHOOK_COALESCE_WINDOW)
+
+        return cls.objects.create(
+            action_type=action_type,
+            payload=json.dumps(data),
+            card_id=card_id,
+            run_after=run_after,
+        )
+
+    @classmethod
+    def prune(cls):
+        """
+        Deletes the jobs that were handled more than WEBHOOK_RETENTION seconds ago
+
+        Returns:
+            int: the number of jobs deleted
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.WEBHOOK_RETENTION)
+
+        count, _ = cls.objects.filter(
+            status__in=(cls.DONE, cls.FAILED), updated_at__lt=cutoff
+        ).delete()
+
+        return count
+
+    @classmethod
+    def recover(cls):
+        """
+        Queues the jobs left running by a worker that stopped mid-job
+
+        Only jobs that have been running for more than WEBHOOK_JOB_TIMEOUT seconds
+        are queued again, so the jobs of workers that are still running them are
+        left alone.
+
+        Returns:
+            int: the number of jobs queued again
+        """
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=settings.WEBHOOK_JOB_TIMEOUT)
+
+        return cls.objects.filter(status=cls.RUNNING, updated_at__lt=cutoff).update(
+            status=cls.QUEUED, updated_at=now
+        )
+
+    def run(self):
+        """
+        Handles the delivery and records the outcome
+
+        A job that raises is retried with exponential backoff, starting at
+        WEBHOOK_RETRY_DELAY seconds, until it has run WEBHOOK_MAX_ATTEMPTS times.
+        """
+        from . import handlers
+
+        try:
+            handlers.handler_types[self.action_type](self.data).run()
+        except Exception:
+            self.last_error = traceback.format_exc()
+
+            if self.attempts < settings.WEBHOOK_MAX_ATTEMPTS:
+                delay = settings.WEBHOOK_RETRY_DELAY * 2 ** (self.attempts - 1)
+
+                self.status = self.QUEUED
+                self.run_after = timezone.now() + timedelta(seconds=delay)
+            else:
+                self.status = self.FAILED
+        else:
+            self.status = self.DONE
+
+        self.save(update_fields=["status", "last_error", "run_after", "updated_at"])
+
+        return self.status
+
+
+class Delivery(models.Model):
+    """
+    A webhook delivery that was received, by its X-GitHub-Delivery id
+
+    GitHub sends a delivery again when it does not get a response in time or one
+    is redelivered by hand; a delivery that is already recorded is not queued.
+    """
+
+    delivery_id = models.CharField(max_length=64, unique=True)
+    job = models.ForeignKey(Job, null=True, on_delete=models.SET_NULL)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.delivery_id
+
+    @classmethod
+    def prune(cls):
+        """
+        Deletes the deliveries received more than WEBHOOK_RETENTION seconds ago
+
+        Returns:
+            int: the number of deliveries deleted
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.WEBHOOK_RETENTION)
+
+        count, _ = cls.objects.filter(received_at__lt=cutoff).delete()
 
-# Create your models here.
+        return count
@@ -1,10 +1,12 @@
 from unittest import mock
 
 from django.test import TestCase
+from django.utils import timezone
 
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from webhook.models import Delivery, Job
 from webhook.tests.utils import get_project_webhook_data
 
 
@@ -12,7 +14,7 @@ class ProjectTestCase(TestCase):
     @mock.patch("webhook.views.handlers")
     def test_project_call(self, *mocks):
         """
-        Ensure the project action is called
+        Ensure the project action is queued and answered right away
         """
         data = get_project_webhook_data()
 
@@ -22,16 +24,80 @@ class ProjectTestCase(TestCase):
 
         response = client.post(url, data, format="json")
 
-        self.assertEquals(200, response.status_code)
+        self.assertEquals(202, response.status_code)
 
         handlers_mock = mocks[0]
 
         handlers_mock.handler_types.get.assert_called_with("project")
 
+        # nothing is handled until a worker picks up the job
         handler = handlers_mock.handler_types.get.return_value
-        handler.assert_called_with(data)
+        handler.assert_not_called()
+
+        job = Job.objects.get(pk=response.data["job"])
+
+        self.assertEquals("project", job.action_type)
+        self.assertEquals(data, job.data)
+        self.assertEquals(Job.QUEUED, job.status)
+
+    @mock.patch("webhook.views.handlers")
+    def test_duplicate_delivery(self, *mocks):
+        """
+        Ensure a delivery GitHub sends again is not queued again
+        """
+        data = get_project_webhook_data()
+
+        client = APIClient()
+
+        url = reverse("webhook-list")
+
+        for status_code in (202, 200):
+            response = client.post(
+                url, data, format="json", HTTP_X_GITHUB_DELIVERY="delivery-1"
+            )
+
+            self.assertEquals(status_code, response.status_code)
+
+        self.assertEquals(1, Job.objects.count())
+        self.assertEquals(1, Delivery.objects.count())
+
+    @mock.patch("webhook.views.handlers")
+    def test_coalesce_card_moves(self, *mocks):
+        """
+        Ensure moves of the same card are merged into its queued job
+        """
+        client = APIClient()
+
+        url = reverse("webhook-list")
+
+        # the card is dragged from column 1 through 2 to 3
+        for index, (from_id, to_id) in enumerate(((1, 2), (2, 3))):
+            data = get_project_webhook_data()
+            data["changes"]["column_id"]["from"] = from_id
+            data["project_card"]["column_id"] = to_id
+            data["project_card"]["updated_at"] = f"2018-01-17T17:46:3{index}Z"
+
+            response = client.post(
+                url, data, format="json", HTTP_X_GITHUB_DELIVERY=f"delivery-{index}"
+            )
+
+            self.assertEquals(202, response.status_code)
+
+        job = Job.objects.get()
+
+        self.assertEquals(1, job.coalesced)
+        self.assertEquals(1, job.data["changes"]["column_id"]["from"])
+        self.assertEquals(3, job.data["project_card"]["column_id"])
+
+        self.assertEquals(2, Delivery.objects.filter(job=job).count())
+
+        # a move after the job was picked up is queued on its own
+        Job.objects.update(run_after=timezone.now())
+        Job.claim()
+
+        client.post(url, get_project_webhook_data(), format="json")
 
-        handler.return_value.run.assert_called_with()
+        self.assertEquals(2, Job.objects.count())
 
     @mock.patch("webhook.views.WebhookViewSet.logger", new_callable=mock.PropertyMock)
     @mock.patch("webhook.views.get_action_type")
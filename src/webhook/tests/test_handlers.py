@@ -2,9 +2,11 @@ from unittest import mock
 
 from django.test import TestCase
 
-from webhook import handlers
+from issuebranch.settings import ON_DECK_COLUMN_NAME, OTHER_PROJECT
 
-from webhook.tests.utils import get_project_webhook_data
+from webhook import cache, handlers
+
+from webhook.tests.utils import get_issue_opened_data, get_project_webhook_data
 
 from_on_deck_project_data = {
     "action": "moved",
@@ -150,53 +152,116 @@ on_deck_column_data = {
     "updated_at": "2018-01-17T19:26:28Z",
 }
 
+grooming_column_data = {
+    "url": "https://api.github.com/projects/columns/2001376",
+    "project_url": "https://api.github.com/projects/1206552",
+    "cards_url": "https://api.github.com/projects/columns/2001376/cards",
+    "id": 2001376,
+    "name": "Grooming",
+    "created_at": "2018-01-11T19:36:33Z",
+    "updated_at": "2018-01-17T17:46:36Z",
+}
+
 
 class ProjectHandlerTestCase(TestCase):
+    def setUp(self):
+        cache.METADATA_CACHE.clear()
+        cache.ON_DECK.clear()
+
+        self.issue_url = to_on_deck_project_data["project_card"]["content_url"]
+
+        # the boards and columns the handlers look up, as earlier webhooks left them
+        self.project = {
+            "url": on_deck_column_data["project_url"],
+            "name": "Product Backlog",
+        }
+        self.other_project = {
+            "url": "https://api.github.com/projects/1206553",
+            "name": "Kanban Board",
+        }
+        self.other_on_deck = {
+            "url": "https://api.github.com/projects/columns/2001390",
+            "project_url": self.other_project["url"],
+            "cards_url": "https://api.github.com/projects/columns/2001390/cards",
+            "id": 2001390,
+            "name": "On Deck",
+        }
+
+        cache.METADATA_CACHE.set(("url", self.project["url"]), self.project)
+        cache.METADATA_CACHE.set(
+            ("url", on_deck_column_data["url"]), on_deck_column_data
+        )
+        cache.METADATA_CACHE.set(
+            ("url", grooming_column_data["url"]), grooming_column_data
+        )
+        cache.METADATA_CACHE.set(
+            ("project", OTHER_PROJECT["product backlog"].lower()), self.other_project
+        )
+        cache.METADATA_CACHE.set(
+            ("column", self.other_project["url"], ON_DECK_COLUMN_NAME),
+            self.other_on_deck,
+        )
+        cache.METADATA_CACHE.set(("issue_id", self.issue_url), 287430829)
+
     def _get_project_handler(self, data):
         project_handler = handlers.ProjectHandler(data)
         project_handler.session = mock.Mock()
+        project_handler.session.get_cards.return_value = []
 
         return project_handler
 
-    def test_move_grooming_card(self):
-        data = get_project_webhook_data()
-        project_handler = self._get_project_handler(data)
-
-        project_handler.session.request.return_value.json.return_value = {
-            "url": "https://api.github.com/projects/columns/2001376",
-            "project_url": "https://api.github.com/projects/1206552",
-            "cards_url": "https://api.github.com/projects/columns/2001376/cards",
-            "id": 2001376,
-            "name": "Grooming",
-            "created_at": "2018-01-11T19:36:33Z",
-            "updated_at": "2018-01-17T17:46:36Z",
+    def _get_other_card(self):
+        return {
+            "url": "https://api.github.com/projects/columns/cards/6731999",
+            "id": 6731999,
+            "column_url": self.other_on_deck["url"],
+            "content_url": self.issue_url,
         }
 
-        project_handler.sync_on_deck = mock.Mock()
+    def test_net_zero_move(self):
+        """
+        Ensure a card moved back to where it started makes no requests
+        """
+        data = get_project_webhook_data()
+        data["changes"]["column_id"]["from"] = data["project_card"]["column_id"]
 
+        project_handler = self._get_project_handler(data)
         project_handler.run()
 
-        # a grooming card will not sync on deck
-        project_handler.sync_on_deck.assert_not_called()
+        self.assertEquals([], project_handler.session.mock_calls)
 
-    def test_move_on_deck_card(self):
+    def test_move_grooming_card(self):
         data = get_project_webhook_data()
         project_handler = self._get_project_handler(data)
 
         project_handler.session.request.return_value.json.return_value = {
-            "url": "https://api.github.com/projects/columns/2001376",
+            "url": "https://api.github.com/projects/columns/2001375",
             "project_url": "https://api.github.com/projects/1206552",
-            "cards_url": "https://api.github.com/projects/columns/2001376/cards",
-            "id": 2001376,
-            "name": "On Deck",
+            "cards_url": "https://api.github.com/projects/columns/2001375/cards",
+            "id": 2001375,
+            "name": "Backlog",
             "created_at": "2018-01-11T19:36:33Z",
             "updated_at": "2018-01-17T17:46:36Z",
         }
 
         project_handler.run()
 
-        # an on deck card will sync!
-        project_handler.sync_on_deck.assert_called_with()
+        # a grooming card does not change the other board
+        project_handler.session.create_card.assert_not_called()
+        project_handler.session.delete_card.assert_not_called()
+
+    def test_move_on_deck_card(self):
+        """
+        Ensure a card already on the other board's on deck is not added again
+        """
+        project_handler = self._get_project_handler(to_on_deck_project_data)
+        project_handler.session.get_cards.return_value = [self._get_other_card()]
+
+        project_handler.run()
+
+        project_handler.session.get_cards.assert_called_once_with(self.other_on_deck)
+        project_handler.session.create_card.assert_not_called()
+        project_handler.session.request.assert_not_called()
 
     def test_detect_remove_from_on_deck(self):
         project_handler = self._get_project_handler(from_on_deck_project_data)
@@ -204,7 +269,7 @@ class ProjectHandlerTestCase(TestCase):
 
         project_handler.run()
 
-        project_handler.remove_from_on_deck.assert_called_with(mock.ANY)
+        project_handler.remove_from_on_deck.assert_called_with(on_deck_column_data)
 
     def test_detect_add_to_on_deck(self):
         project_handler = self._get_project_handler(to_on_deck_project_data)
@@ -212,12 +277,233 @@ class ProjectHandlerTestCase(TestCase):
 
         project_handler.run()
 
-        project_handler.add_to_on_deck.assert_called_with(mock.ANY)
+        project_handler.add_to_on_deck.assert_called_with(on_deck_column_data)
 
     def test_add_to_on_deck(self):
         project_handler = self._get_project_handler(to_on_deck_project_data)
-        project_handler.add_to_on_deck = mock.Mock()
+
+        card = self._get_other_card()
+        project_handler.session.create_card.return_value.json.return_value = card
 
         project_handler.run()
 
-        project_handler.add_to_on_deck.assert_called_with(mock.ANY)
+        project_handler.session.create_card.assert_called_once_with(
+            self.other_on_deck, {"id": 287430829}
+        )
+        self.assertEquals(
+            card,
+            cache.ON_DECK.find(
+                project_handler.session, self.other_on_deck, self.issue_url
+            ),
+        )
+        project_handler.session.request.assert_not_called()
+
+    def test_remove_from_on_deck(self):
+        project_handler = self._get_project_handler(from_on_deck_project_data)
+
+        card = self._get_other_card()
+        project_handler.session.get_cards.return_value = [card]
+
+        project_handler.run()
+
+        project_handler.session.delete_card.assert_called_once_with(card)
+        self.assertEquals(
+            None,
+            cache.ON_DECK.find(
+                project_handler.session, self.other_on_deck, self.issue_url
+            ),
+        )
+        project_handler.session.request.assert_not_called()
+
+
+class MetadataTestCase(TestCase):
+    def setUp(self):
+        cache.METADATA_CACHE.clear()
+        cache.ON_DECK.clear()
+
+        self.column_url = "https://api.github.com/projects/columns/2001376"
+
+    def _get_project_handler(self):
+        project_handler = handlers.ProjectHandler(get_project_webhook_data())
+        project_handler.session = mock.Mock()
+
+        return project_handler
+
+    def test_shared_between_handlers(self):
+        """
+        Ensure a column fetched for one webhook is not fetched for the next
+        """
+        first = self._get_project_handler()
+        first.get_request_data(self.column_url)
+
+        second = self._get_project_handler()
+        second.get_request_data(self.column_url)
+
+        first.session.request.assert_called_once_with("get", self.column_url)
+        second.session.request.assert_not_called()
+
+    @mock.patch("webhook.cache.github.invalidate")
+    def test_column_event(self, *mocks):
+        """
+        Ensure a project_column webhook drops the column by url and by name
+        """
+        project_data = {"url": "https://api.github.com/projects/1206552"}
+        column_data = {"url": self.column_url, "cards_url": f"{self.column_url}/cards"}
+
+        project_handler = self._get_project_handler()
+        project_handler.session.get_column.return_value = column_data
+        project_handler.session.get_cards.return_value = []
+
+        project_handler.get_request_data(self.column_url)
+        project_handler.get_project_on_deck(project_data)
+        project_handler.find_card(column_data, "issues/1")
+
+        data = {"action": "deleted", "project_column": {"url": self.column_url}}
+        handlers.handler_types["metadata"](data).run()
+
+        self.assertNotIn(self.column_url, cache.ON_DECK.columns)
+
+        project_handler = self._get_project_handler()
+        project_handler.get_request_data(self.column_url)
+        project_handler.get_project_on_deck(project_data)
+
+        project_handler.session.request.assert_called_once_with("get", self.column_url)
+        project_handler.session.get_column.assert_called_once_with(
+            project_data, handlers.ON_DECK_COLUMN_NAME
+        )
+
+    @mock.patch("webhook.cache.github.invalidate")
+    def test_project_event(self, *mocks):
+        """
+        Ensure a project webhook drops the project and its columns
+        """
+        project_handler = self._get_project_handler()
+        project_handler.get_other_project_data({"name": "product backlog"})
+
+        data = {"action": "edited", "project": {"url": "projects/1"}}
+        handlers.handler_types["metadata"](data).run()
+
+        project_handler = self._get_project_handler()
+        project_handler.get_other_project_data({"name": "product backlog"})
+
+        project_handler.session.get_project.assert_called_once_with(mock.ANY)
+
+
+class OnDeckIndexTestCase(TestCase):
+    def setUp(self):
+        self.column = {
+            "url": "https://api.github.com/projects/columns/2001377",
+            "cards_url": "https://api.github.com/projects/columns/2001377/cards",
+        }
+
+        self.session = mock.Mock()
+        self.session.get_cards.return_value = [
+            {"id": 1, "content_url": "issues/1", "column_url": self.column["url"]}
+        ]
+
+        self.index = cache.ColumnIndex()
+
+    def get_card_data(self, action, column_url):
+        data = get_project_webhook_data()
+        data["action"] = action
+        data["project_card"]["column_url"] = column_url
+
+        return data
+
+    def test_seeded_once(self):
+        self.assertEquals(
+            1, self.index.find(self.session, self.column, "issues/1")["id"]
+        )
+        self.assertEquals(None, self.index.find(self.session, self.column, "issues/2"))
+
+        self.session.get_cards.assert_called_once_with(self.column)
+
+    def test_card_webhooks(self):
+        """
+        Ensure cards created in, moved out of and deleted from the column are seen
+        """
+        self.index.get(self.session, self.column)
+
+        data = self.get_card_data("created", self.column["url"])
+        content_url = data["project_card"]["content_url"]
+
+        self.index.update(data)
+        self.assertNotEqual(
+            None, self.index.find(self.session, self.column, content_url)
+        )
+
+        self.index.update(self.get_card_data("moved", "projects/columns/1"))
+        self.assertEquals(None, self.index.find(self.session, self.column, content_url))
+
+        self.index.update(self.get_card_data("moved", self.column["url"]))
+        self.index.update(self.get_card_data("deleted", self.column["url"]))
+        self.assertEquals(None, self.index.find(self.session, self.column, content_url))
+
+        self.session.get_cards.assert_called_once_with(self.column)
+
+    def test_reconcile(self):
+        self.index.get(self.session, self.column)
+
+        self.index.reconcile = 0
+        self.index.get(self.session, self.column)
+
+        self.assertEquals(2, self.session.get_cards.call_count)
+
+
+class PayloadTestCase(TestCase):
+    """
+    Ensure the handlers only make the write a webhook calls for
+    """
+
+    def setUp(self):
+        cache.METADATA_CACHE.clear()
+        cache.ON_DECK.clear()
+
+        self.session = mock.Mock()
+        self.session.get_cards.return_value = []
+        self.session.get_project.return_value = {"url": "projects/2"}
+        self.session.get_column.return_value = {"url": "projects/columns/9"}
+
+    def get_handler(self, handler_cls, data):
+        handler = handler_cls(data)
+        handler.session = self.session
+
+        return handler
+
+    def test_issue_opened(self):
+        data = get_issue_opened_data()
+
+        self.get_handler(handlers.IssueHandler, data).run()
+
+        self.session.create_card.assert_called_with(
+            self.session.get_column.return_value, data["issue"]
+        )
+        self.session.request.assert_not_called()
+
+    def test_add_to_on_deck(self):
+        """
+        Ensure the issue id comes from an earlier issue webhook
+        """
+        issue_data = get_issue_opened_data()["issue"]
+
+        data = get_project_webhook_data()
+        data["project_card"]["content_url"] = issue_data["url"]
+
+        handler = self.get_handler(handlers.ProjectHandler, data)
+        handler.metadata.set_issue_id(issue_data)
+
+        # the board the card moved on was looked up by an earlier webhook
+        column_data = {"project_url": "projects/1"}
+        cache.METADATA_CACHE.set(("url", "projects/1"), {"name": "product backlog"})
+
+        self.session.create_card.return_value.json.return_value = {
+            "id": 5,
+            "content_url": issue_data["url"],
+        }
+
+        handler.add_to_on_deck(column_data)
+
+        self.session.create_card.assert_called_with(
+            self.session.get_column.return_value, {"id": issue_data["id"]}
+        )
+        self.session.request.assert_not_called()
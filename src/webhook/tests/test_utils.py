@@ -3,7 +3,7 @@ from django.test import TestCase
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from webhook.utils import get_action_type
+from webhook.utils import get_action_type, merge_card_moves
 from webhook.tests.utils import get_issue_opened_data, get_project_webhook_data
 
 
@@ -21,3 +21,28 @@ class UtilsTestCase(TestCase):
         action_type = get_action_type(data)
 
         self.assertEquals("issue", action_type)
+
+    def test_get_action_type_metadata(self):
+        data = {"action": "edited", "project_column": {"id": 2001376}}
+
+        action_type = get_action_type(data)
+
+        self.assertEquals("metadata", action_type)
+
+    def test_merge_card_moves_out_of_order(self):
+        """
+        Ensure the later move wins even when it arrives first
+        """
+        first = get_project_webhook_data()
+        first["changes"]["column_id"]["from"] = 1
+        first["project_card"]["column_id"] = 2
+
+        second = get_project_webhook_data()
+        second["changes"]["column_id"]["from"] = 2
+        second["project_card"]["column_id"] = 3
+        second["project_card"]["updated_at"] = "2018-01-17T17:50:00Z"
+
+        merged = merge_card_moves(second, first)
+
+        self.assertEquals(1, merged["changes"]["column_id"]["from"])
+        self.assertEquals(3, merged["project_card"]["column_id"])
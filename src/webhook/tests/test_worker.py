@@ -0,0 +1,128 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from webhook.models import Delivery, Job
+from webhook.tests.utils import get_project_webhook_data
+from webhook.worker import Worker
+
+
+@override_settings(
+    WEBHOOK_COALESCE_WINDOW=0,
+    WEBHOOK_JOB_TIMEOUT=600,
+    WEBHOOK_MAX_ATTEMPTS=3,
+    WEBHOOK_RETRY_DELAY=10,
+)
+@mock.patch("webhook.handlers.handler_types")
+class WorkerTestCase(TestCase):
+    def test_run_pending(self, *mocks):
+        data = get_project_webhook_data()
+        job = Job.enqueue("project", data)
+
+        self.assertEquals(1, Worker(workers=1).run_pending())
+
+        handler_types_mock = mocks[0]
+
+        handler = handler_types_mock.__getitem__.return_value
+        handler.assert_called_with(data)
+        handler.return_value.run.assert_called_with()
+
+        job.refresh_from_db()
+
+        self.assertEquals(Job.DONE, job.status)
+        self.assertEquals(1, job.attempts)
+
+    def test_retry(self, *mocks):
+        """
+        Ensure a job that raises is retried later and fails after the last attempt
+        """
+        handler_types_mock = mocks[0]
+
+        handler = handler_types_mock.__getitem__.return_value
+        handler.return_value.run.side_effect = RuntimeError("github is down")
+
+        job = Job.enqueue("project", get_project_webhook_data())
+
+        worker = Worker(workers=1)
+
+        for attempt, delay in ((1, 10), (2, 20)):
+            self.assertEquals(1, worker.run_pending())
+
+            job.refresh_from_db()
+
+            self.assertEquals(Job.QUEUED, job.status)
+            self.assertEquals(attempt, job.attempts)
+            self.assertIn("github is down", job.last_error)
+
+            expected = timezone.now() + timedelta(seconds=delay)
+            self.assertAlmostEqual(0, (job.run_after - expected).total_seconds(), 0)
+
+            # not due yet
+            self.assertEquals(0, worker.run_pending())
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        self.assertEquals(1, worker.run_pending())
+
+        job.refresh_from_db()
+
+        self.assertEquals(Job.FAILED, job.status)
+        self.assertEquals(3, job.attempts)
+
+    def test_claim(self, *mocks):
+        """
+        Ensure a job is only claimed once
+        """
+        job = Job.enqueue("project", get_project_webhook_data())
+
+        self.assertEquals(job.pk, Job.claim().pk)
+        self.assertEquals(None, Job.claim())
+
+        # a worker that stopped mid-job leaves it running past the timeout
+        Job.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=601)
+        )
+
+        self.assertEquals(1, Job.recover())
+        self.assertEquals(job.pk, Job.claim().pk)
+
+    def test_recover_leaves_running_jobs(self, *mocks):
+        """
+        Ensure a job another worker is still running is not queued again
+        """
+        Job.enqueue("project", get_project_webhook_data())
+
+        self.assertIsNotNone(Job.claim())
+
+        self.assertEquals(0, Job.recover())
+        self.assertEquals(None, Job.claim())
+
+    @override_settings(WEBHOOK_RETENTION=3600)
+    def test_prune(self, *mocks):
+        """
+        Ensure old handled jobs and deliveries are deleted
+        """
+        old = timezone.now() - timedelta(seconds=3601)
+
+        jobs = {}
+        for status in (Job.DONE, Job.FAILED, Job.QUEUED):
+            jobs[status] = Job.objects.create(action_type="project", payload="{}")
+            Job.objects.filter(pk=jobs[status].pk).update(status=status, updated_at=old)
+
+        recent = Job.objects.create(action_type="project", status=Job.DONE)
+
+        Delivery.objects.create(delivery_id="old", job=jobs[Job.DONE])
+        Delivery.objects.create(delivery_id="new", job=recent)
+        Delivery.objects.filter(delivery_id="old").update(received_at=old)
+
+        Worker(workers=1).sweep()
+
+        self.assertEquals(
+            [jobs[Job.QUEUED].pk, recent.pk],
+            list(Job.objects.values_list("pk", flat=True)),
+        )
+        self.assertEquals(
+            ["new"], list(Delivery.objects.values_list("delivery_id", flat=True))
+        )
@@ -4,8 +4,50 @@ def get_action_type(webhook_data):
     if "issue" in webhook_data:
         return "issue"
 
-    if webhook_data.get("action") == "moved":
-        if webhook_data.get("project_card"):
-            return "project"
+    # cards that are moved are mirrored, the rest only update the on deck indexes
+    if webhook_data.get("project_card"):
+        return "project"
+
+    # a board or column was changed
+    if webhook_data.get("project_column") or webhook_data.get("project"):
+        return "metadata"
 
     return action_type
+
+
+def get_card_id(webhook_data):
+    """
+    Returns the id of the card a project action is for, or None
+    """
+    return (webhook_data.get("project_card") or {}).get("id")
+
+
+def get_from_column_id(webhook_data):
+    """
+    Returns the id of the column a card was moved from
+
+    Moves within a column have no `changes`, so the card's own column is returned.
+    """
+    changes = webhook_data.get("changes") or {}
+
+    return (changes.get("column_id") or {}).get(
+        "from", webhook_data["project_card"]["column_id"]
+    )
+
+
+def merge_card_moves(first, second):
+    """
+    Returns a single move for two moves of the same card
+
+    The later move, by the card's `updated_at`, is returned with the column the
+    earlier one moved the card from, so handling it makes the net transition.
+    """
+    if second["project_card"]["updated_at"] < first["project_card"]["updated_at"]:
+        first, second = second, first
+
+    merged = dict(second)
+    merged["changes"] = dict(
+        second.get("changes") or {}, column_id={"from": get_from_column_id(first)}
+    )
+
+    return merged
@@ -1,20 +1,50 @@
 import logging
 
-from rest_framework import viewsets
+from django.db import IntegrityError, transaction
+from rest_framework import status, viewsets
 from rest_framework.response import Response
 
 from . import handlers
+from .models import Delivery, Job
 from .utils import get_action_type
 
+
 # noinspection PyMethodMayBeStatic
 class WebhookViewSet(viewsets.ViewSet):
     @property
     def logger(self):
         return logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
+    def enqueue(self, request, action_type, data):
+        """
+        Queues the delivery unless it was received already
+        """
+        delivery_id = request.META.get("HTTP_X_GITHUB_DELIVERY")
+
+        try:
+            with transaction.atomic():
+                delivery = None
+                if delivery_id:
+                    delivery = Delivery.objects.create(delivery_id=delivery_id)
+
+                job = Job.enqueue(action_type, data)
+
+                if delivery:
+                    delivery.job = job
+                    delivery.save(update_fields=["job"])
+        except IntegrityError:
+            self.logger.info(f"Skipping duplicate delivery={delivery_id}")
+
+            return Response({"duplicate": delivery_id})
+
+        return Response({"job": job.pk}, status=status.HTTP_202_ACCEPTED)
+
     def create(self, request):
         """
         Handles POST requests
+
+        Deliveries with a handler are queued for `webhook_worker` and answered
+        with a 202 right away.
         """
         data = request.data
 
@@ -22,7 +52,7 @@ class WebhookViewSet(viewsets.ViewSet):
         if action_type:
             handler_cls = handlers.handler_types.get(action_type)
             if handler_cls:
-                handler_cls(data).run()
+                return self.enqueue(request, action_type, data)
             else:
                 self.logger.warning(f"No handler found for action_type={action_type}")
         else:
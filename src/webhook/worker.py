@@ -0,0 +1,117 @@
+"""
+A pool of threads that handle queued webhook deliveries
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Delivery, Job
+
+
+class Worker(object):
+    """
+    Runs queued jobs on WEBHOOK_WORKERS threads
+
+    Args:
+        workers (int): the number of threads
+        poll_interval (float): seconds to wait when no job is due
+        sweep_interval (float): seconds between sweeps, see `sweep()`
+    """
+
+    def __init__(self, workers=None, poll_interval=1.0, sweep_interval=60.0):
+        self.workers = workers or settings.WEBHOOK_WORKERS
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+
+        self.stopped = threading.Event()
+
+    @property
+    def logger(self):
+        return logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def run_job(self, job):
+        status = job.run()
+
+        if status == Job.DONE:
+            self.logger.info(f"{job} handled")
+        else:
+            self.logger.warning(
+                f"{job} attempt {job.attempts} raised:\n{job.last_error}"
+            )
+
+        return status
+
+    def run_pending(self):
+        """
+        Runs jobs until none are due
+
+        Returns:
+            int: the number of jobs run
+        """
+        count = 0
+
+        while not self.stopped.is_set():
+            job = Job.claim()
+            if job is None:
+                break
+
+            self.run_job(job)
+            count += 1
+
+        return count
+
+    def loop(self):
+        try:
+            while not self.stopped.is_set():
+                if not self.run_pending():
+                    self.stopped.wait(self.poll_interval)
+        finally:
+            # each thread has its own database connection
+            connection.close()
+
+    def sweep(self):
+        """
+        Queues interrupted jobs again and deletes old jobs and deliveries
+        """
+        recovered = Job.recover()
+        if recovered:
+            self.logger.warning(f"queued {recovered} interrupted jobs again")
+
+        pruned = Job.prune() + Delivery.prune()
+        if pruned:
+            self.logger.info(f"deleted {pruned} old jobs and deliveries")
+
+    def run(self):
+        """
+        Runs jobs until `stop()` is called
+        """
+        self.sweep()
+        swept_at = time.monotonic()
+
+        threads = [
+            threading.Thread(target=self.loop, name=f"webhook-worker-{x}", daemon=True)
+            for x in range(self.workers)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(self.poll_interval)
+
+                    if time.monotonic() - swept_at > self.sweep_interval:
+                        self.sweep()
+                        swept_at = time.monotonic()
+        except KeyboardInterrupt:
+            self.stop()
+
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        self.stopped.set()